@@ -2,11 +2,14 @@
 """
 Advanced project analysis - check for optimization opportunities
 """
-import json
 import os
+import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+
+from common.metadata_store import get_store
 
 def analyze_program_structure():
     """Check if individual program files are still needed"""
@@ -15,10 +18,7 @@ def analyze_program_structure():
     print("=" * 80)
     
     # Check consolidated Program.json
-    with open(f"{BASE_DIR}/Program/Program.json") as f:
-        programs = json.load(f).get('programs', [])
-    
-    program_ids_in_consolidated = {p.get('id') for p in programs}
+    programs = get_store(BASE_DIR)['programs']
     
     # Check individual cancer program files
     individual_files = []
@@ -45,45 +45,27 @@ def check_data_consistency_deep():
     print("5. DETAILED DATA INTEGRITY CHECKS")
     print("=" * 80)
     
-    with open(f"{BASE_DIR}/Program/Program.json") as f:
-        programs = json.load(f).get('programs', [])
-    program_map = {p.get('id'): p.get('name') for p in programs}
-    
-    with open(f"{BASE_DIR}/Program/Program Stage.json") as f:
-        stages = json.load(f).get('programStages', [])
-    
-    with open(f"{BASE_DIR}/Program/Program Indicator.json") as f:
-        indicators = json.load(f).get('programIndicators', [])
+    store = get_store(BASE_DIR)
+    programs = store['programs']
+    stages = store['programStages']
+    indicators = store['programIndicators']
     
     # Check stages per program
     print("\n✓ Program Stage Distribution:")
-    stages_per_program = {}
-    for stage in stages:
-        prog_ref = stage.get('program', {})
-        prog_id = prog_ref.get('id') if isinstance(prog_ref, dict) else prog_ref
-        if prog_id in stages_per_program:
-            stages_per_program[prog_id] += 1
-        else:
-            stages_per_program[prog_id] = 1
+    stages_per_program = stages.grouped_by('program')
     
-    for prog_id, count in sorted(stages_per_program.items()):
-        prog_name = program_map.get(prog_id, 'UNKNOWN')
-        print(f"  • {prog_name}: {count} stages")
+    for prog_id, prog_stages in sorted(stages_per_program.items(), key=lambda kv: str(kv[0])):
+        prog_name = programs.get(prog_id, {}).get('name', 'UNKNOWN')
+        print(f"  • {prog_name}: {len(prog_stages)} stages")
     
     # Check indicators per program
     print("\n✓ Program Indicator Distribution:")
-    indicators_per_program = {}
-    for ind in indicators:
-        prog_ref = ind.get('program', {})
-        prog_id = prog_ref.get('id') if isinstance(prog_ref, dict) else prog_ref
-        if prog_id in indicators_per_program:
-            indicators_per_program[prog_id] += 1
-        else:
-            indicators_per_program[prog_id] = 1
+    indicators_per_program = indicators.grouped_by('program')
     
     total_indicators = 0
-    for prog_id, count in sorted(indicators_per_program.items()):
-        prog_name = program_map.get(prog_id, 'UNKNOWN')
+    for prog_id, prog_indicators in sorted(indicators_per_program.items(), key=lambda kv: str(kv[0])):
+        prog_name = programs.get(prog_id, {}).get('name', 'UNKNOWN')
+        count = len(prog_indicators)
         total_indicators += count
         if count <= 10:
             print(f"  • {prog_name}: {count} indicators")
@@ -100,8 +82,8 @@ def check_required_fields():
     
     # Check Programs
     print("\n✓ Checking Programs...")
-    with open(f"{BASE_DIR}/Program/Program.json") as f:
-        programs = json.load(f).get('programs', [])
+    store = get_store(BASE_DIR)
+    programs = store['programs']
     
     required_prog_fields = ['id', 'name', 'shortName', 'trackedEntityType']
     missing = 0
@@ -118,8 +100,7 @@ def check_required_fields():
     
     # Check Program Stages
     print("\n✓ Checking Program Stages...")
-    with open(f"{BASE_DIR}/Program/Program Stage.json") as f:
-        stages = json.load(f).get('programStages', [])
+    stages = store['programStages']
     
     required_stage_fields = ['id', 'name', 'program']
     missing = 0
@@ -135,8 +116,7 @@ def check_required_fields():
     
     # Check Data Elements
     print("\n✓ Checking Data Elements...")
-    with open(f"{BASE_DIR}/Data Element/Data Element.json") as f:
-        elements = json.load(f).get('dataElements', [])
+    elements = store['dataElements']
     
     required_de_fields = ['id', 'name', 'shortName', 'domainType', 'valueType']
     missing = 0
@@ -160,36 +140,31 @@ def check_duplicates():
     
     # Check Program IDs
     print("\n✓ Checking Program IDs...")
-    with open(f"{BASE_DIR}/Program/Program.json") as f:
-        programs = json.load(f).get('programs', [])
+    store = get_store(BASE_DIR)
+    programs = store['programs']
     
-    prog_ids = [p.get('id') for p in programs]
-    if len(prog_ids) == len(set(prog_ids)):
-        print(f"  ✅ All program IDs unique ({len(prog_ids)} programs)")
+    if not programs.duplicate_ids:
+        print(f"  ✅ All program IDs unique ({len(programs)} programs)")
     else:
         print(f"  ❌ Duplicate program IDs found")
         duplicates_found = True
     
     # Check Program Stage IDs
     print("\n✓ Checking Program Stage IDs...")
-    with open(f"{BASE_DIR}/Program/Program Stage.json") as f:
-        stages = json.load(f).get('programStages', [])
+    stages = store['programStages']
     
-    stage_ids = [s.get('id') for s in stages]
-    if len(stage_ids) == len(set(stage_ids)):
-        print(f"  ✅ All stage IDs unique ({len(stage_ids)} stages)")
+    if not stages.duplicate_ids:
+        print(f"  ✅ All stage IDs unique ({len(stages)} stages)")
     else:
         print(f"  ❌ Duplicate stage IDs found")
         duplicates_found = True
     
     # Check Data Element IDs
     print("\n✓ Checking Data Element IDs...")
-    with open(f"{BASE_DIR}/Data Element/Data Element.json") as f:
-        elements = json.load(f).get('dataElements', [])
+    elements = store['dataElements']
     
-    de_ids = [e.get('id') for e in elements]
-    if len(de_ids) == len(set(de_ids)):
-        print(f"  ✅ All data element IDs unique ({len(de_ids)} elements)")
+    if not elements.duplicate_ids:
+        print(f"  ✅ All data element IDs unique ({len(elements)} elements)")
     else:
         print(f"  ❌ Duplicate data element IDs found")
         duplicates_found = True
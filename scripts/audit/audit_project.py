@@ -2,42 +2,80 @@
 """
 Comprehensive project audit - identify all issues
 """
-import json
+import argparse
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from collections import defaultdict
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "scripts"))
 
-def validate_json_files():
-    """Check all JSON files for validity"""
+from common.metadata_store import get_store, ref_id
+from common.parse_cache import CACHE_DIR, DEFAULT_MAX_BYTES, ParseCache, check_json_file
+
+def list_json_files():
+    """All JSON files in the project, in os.walk order"""
+    filepaths = []
+    for root, dirs, files in os.walk(BASE_DIR):
+        # Skip hidden directories, node_modules and the parse cache itself
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d != 'node_modules'
+                   and Path(root, d) != CACHE_DIR]
+        
+        for file in files:
+            if file.endswith('.json'):
+                filepaths.append(os.path.join(root, file))
+    return filepaths
+
+def validate_json_files(cache=None, jobs=1):
+    """Check all JSON files for validity.
+    
+    Unchanged files are answered from the parse cache; the rest are checked
+    in-process or, with jobs > 1, across a process pool (largest first).
+    """
     print("=" * 80)
     print("1. JSON SYNTAX VALIDATION")
     print("=" * 80)
     
+    filepaths = list_json_files()
+    results = {}
+    pending = []
+    for filepath in filepaths:
+        entry = cache.lookup(filepath) if cache is not None else None
+        if entry is not None:
+            cache.hits += 1
+            results[filepath] = (entry['valid'], entry['error'])
+        else:
+            pending.append(filepath)
+    
+    known = [cache.known(fp) if cache is not None else None for fp in pending]
+    if jobs > 1 and len(pending) > 1:
+        # Largest files first so Organisation Unit.json and the bundles don't straggle
+        order = sorted(range(len(pending)), key=lambda i: os.path.getsize(pending[i]), reverse=True)
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            checked = dict(zip(order, pool.map(check_json_file,
+                                               [pending[i] for i in order],
+                                               [known[i] for i in order])))
+        checked = [checked[i] for i in range(len(pending))]
+    else:
+        checked = [check_json_file(fp, k) for fp, k in zip(pending, known)]
+    
+    for filepath, (ok, error, digest) in zip(pending, checked):
+        results[filepath] = (ok, error)
+        if cache is not None and digest is not None:
+            cache.misses += 1
+            cache.record(filepath, ok, error, digest)
+    
     valid_files = 0
     invalid_files = 0
     errors = []
-    
-    for root, dirs, files in os.walk(BASE_DIR):
-        # Skip hidden directories and node_modules
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != 'node_modules']
-        
-        for file in files:
-            if file.endswith('.json'):
-                filepath = os.path.join(root, file)
-                rel_path = os.path.relpath(filepath, BASE_DIR)
-                
-                try:
-                    with open(filepath, 'r') as f:
-                        json.load(f)
-                    valid_files += 1
-                except json.JSONDecodeError as e:
-                    invalid_files += 1
-                    errors.append((rel_path, str(e)))
-                except Exception as e:
-                    invalid_files += 1
-                    errors.append((rel_path, str(e)))
+    for filepath in filepaths:
+        ok, error = results[filepath]
+        if ok:
+            valid_files += 1
+        else:
+            invalid_files += 1
+            errors.append((os.path.relpath(filepath, BASE_DIR), error))
     
     print(f"\n✅ Valid JSON files: {valid_files}")
     if invalid_files > 0:
@@ -46,6 +84,8 @@ def validate_json_files():
             print(f"   - {filepath}: {error[:100]}")
     else:
         print(f"✅ No JSON syntax errors found")
+    if cache is not None:
+        print(f"   (parse cache: {cache.hits} unchanged, {cache.misses} re-checked)")
     
     return invalid_files == 0
 
@@ -57,38 +97,21 @@ def validate_data_consistency():
     
     issues = []
     
-    # Load all data
-    with open(f"{BASE_DIR}/Program/Program.json") as f:
-        programs = json.load(f).get('programs', [])
-    program_ids = {p.get('id') for p in programs}
-    
-    with open(f"{BASE_DIR}/Program/Program Stage.json") as f:
-        stages = json.load(f).get('programStages', [])
-    stage_ids = {s.get('id') for s in stages}
-    stage_program_refs = defaultdict(list)
-    
-    for stage in stages:
-        prog_ref = stage.get('program', {})
-        prog_id = prog_ref.get('id') if isinstance(prog_ref, dict) else prog_ref
-        if prog_id:
-            stage_program_refs[prog_id].append(stage.get('id'))
-    
-    with open(f"{BASE_DIR}/Program/Program Indicator.json") as f:
-        indicators = json.load(f).get('programIndicators', [])
-    
-    with open(f"{BASE_DIR}/Data Element/Data Element.json") as f:
-        data_elements = json.load(f).get('dataElements', [])
-    de_ids = {de.get('id') for de in data_elements}
-    
-    with open(f"{BASE_DIR}/Dashboard/Dashboard.json") as f:
-        dashboards = json.load(f).get('dashboards', [])
+    # Load all data (parsed once, shared through the metadata store)
+    store = get_store(BASE_DIR)
+    programs = store['programs']
+    stages = store['programStages']
+    indicators = store['programIndicators']
+    data_elements = store['dataElements']
+    dashboards = store['dashboards']
+    stage_program_refs = stages.grouped_by('program')
     
     # Check program references
     print("\n✓ Checking Program References...")
     orphaned_stages = 0
-    for prog_id in stage_program_refs.keys():
-        if prog_id not in program_ids:
-            orphaned_stages += stage_program_refs[prog_id].__len__()
+    for prog_id, prog_stages in stage_program_refs.items():
+        if prog_id and prog_id not in programs:
+            orphaned_stages += len(prog_stages)
             issues.append(f"Stages reference non-existent program {prog_id}")
     
     if orphaned_stages == 0:
@@ -102,7 +125,7 @@ def validate_data_consistency():
     for stage in stages:
         for item in stage.get('programStageDataElements', []):
             de_id = item.get('dataElement', {}).get('id')
-            if de_id and de_id not in de_ids:
+            if de_id and de_id not in data_elements:
                 invalid_de_refs += 1
                 issues.append(f"Stage {stage.get('id')} references non-existent data element {de_id}")
     
@@ -115,9 +138,8 @@ def validate_data_consistency():
     print("\n✓ Checking Program Indicator Program References...")
     invalid_ind_refs = 0
     for ind in indicators:
-        prog_ref = ind.get('program', {})
-        prog_id = prog_ref.get('id') if isinstance(prog_ref, dict) else prog_ref
-        if prog_id and prog_id not in program_ids:
+        prog_id = ref_id(ind.get('program', {}))
+        if prog_id and prog_id not in programs:
             invalid_ind_refs += 1
     
     if invalid_ind_refs == 0:
@@ -177,7 +199,8 @@ def check_file_coverage():
             continue
         json_count = 0
         for root, dirs, files in os.walk(path):
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
+            dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__'
+                       and Path(root, d) != CACHE_DIR]
             json_count += sum(1 for f in files if f.endswith('.json'))
         folders[folder] = json_count
 
@@ -188,14 +211,30 @@ def check_file_coverage():
         print(f"  {status} {folder}: {count} files")
 
 def main():
+    parser = argparse.ArgumentParser(description="Comprehensive project audit")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-parse every file instead of using artifacts/cache")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="validate JSON files across N worker processes (default: %(default)s)")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="size budget for cached parse results (default: %(default)s)")
+    args = parser.parse_args()
+    
+    cache = None
+    if not args.no_cache:
+        cache = ParseCache(max_bytes=args.cache_max_mb * 1024 * 1024)
+        get_store(BASE_DIR, cache=cache)
+    
     print("\n")
     print("█" * 80)
     print("COMPREHENSIVE PROJECT AUDIT - CANCER REGISTRY")
     print("█" * 80)
     
-    json_ok = validate_json_files()
+    json_ok = validate_json_files(cache, jobs=args.jobs)
     consistency_ok = validate_data_consistency()
     check_file_coverage()
+    if cache is not None:
+        cache.save()
     
     print("\n" + "=" * 80)
     print("AUDIT SUMMARY")
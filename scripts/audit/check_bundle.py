@@ -1,45 +1,51 @@
-import json
+import sys
+from pathlib import Path
 
-# Load the bundle
-bundle = json.load(open('programs_bundle_cancer.json'))
-rules = bundle.get('programRules', [])
-actions = bundle.get('programRuleActions', [])
-variables = bundle.get('programRuleVariables', [])
+base = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(base / "scripts"))
+
+from common.metadata_store import ref_id
+from common.rule_graph import RuleGraph
+
+bundle_path = base / "artifacts" / "bundles" / "programs_bundle_cancer.json"
+
+# Index the rule types of the bundle once; every lookup below is a dict hit
+graph = RuleGraph.from_bundle(bundle_path)
+rules = graph.collections['programRules']
 
 # Find the rule about 'HIDE: Biopsy performed'
-matching_rules = [r for r in rules if 'Biopsy' in r.get('name', '') or 'biopsy' in r.get('name', '').lower()]
+matching_rules = [r for r in rules if 'biopsy' in (r.get('name') or '').lower()]
 print(f'Found {len(matching_rules)} rules mentioning biopsy')
 
 for rule in matching_rules[:5]:
     rule_name = rule.get('name')
     rule_id = rule.get('id')
-    program_id = rule.get('program', {}).get('id')
-    stage_id = rule.get('programStage', {}).get('id')
+    program_id = ref_id(rule.get('program'))
+    stage_id = ref_id(rule.get('programStage'))
     
     print(f'\nRule: {rule_name} (id: {rule_id})')
     print(f'  Program: {program_id}')
     print(f'  Stage: {stage_id}')
     
-    # Find related actions
-    rule_actions = [a for a in actions if a.get('programRule', {}).get('id') == rule_id]
+    # Related actions
+    rule_actions = graph.actions_of(rule_id)
     print(f'  Actions: {len(rule_actions)}')
     for action in rule_actions:
-        de = action.get('dataElement', {}).get('id')
+        de = ref_id(action.get('dataElement'))
         print(f'    - Action DataElement: {de}')
     
-    # Find related variables
-    rule_vars = [v for v in variables if v.get('programRule', {}).get('id') == rule_id]
+    # Variables the condition reads (variables belong to the program, not the rule)
+    rule_vars = sorted(graph.targets(('rule', rule_id), 'reads'), key=graph.name)
     print(f'  Variables: {len(rule_vars)}')
     for var in rule_vars:
-        de = var.get('dataElement', {}).get('id')
-        print(f'    - Variable DataElement: {de}')
+        field = graph.field_of(var[1])
+        print(f'    - Variable DataElement: {field[1] if field else None} ({graph.name(var)})')
 
 # Now specifically check for AswNlG485pW
 print('\n\n--- Checking for AswNlG485pW ---')
-matching_actions = [a for a in actions if a.get('dataElement', {}).get('id') == 'AswNlG485pW']
+matching_actions = graph.sources(('dataElement', 'AswNlG485pW'), 'targets')
 print(f'Found {len(matching_actions)} actions using AswNlG485pW')
-for action in matching_actions:
-    rule_id = action.get('programRule', {}).get('id')
-    rule = next((r for r in rules if r.get('id') == rule_id), None)
+for _, action_id in sorted(matching_actions):
+    rule = rules.get(graph.rule_of(action_id))
     if rule:
-        print(f'  Rule: {rule.get("name")} (stage: {rule.get("programStage", {}).get("id")})')
+        print(f'  Rule: {rule.get("name")} (stage: {ref_id(rule.get("programStage"))})')
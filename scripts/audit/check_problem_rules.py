@@ -1,21 +1,29 @@
-import json
+import sys
+from pathlib import Path
 
-bundle = json.load(open('programs_bundle_cancer.json'))
-actions = bundle.get('programRuleActions', [])
-variables = bundle.get('programRuleVariables', [])
+base = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(base / "scripts"))
+
+from common.metadata_store import ref_id
+from common.rule_graph import RuleGraph
+
+bundle_path = base / "artifacts" / "bundles" / "programs_bundle_cancer.json"
+
+graph = RuleGraph.from_bundle(bundle_path)
 
 # Find actions and variables for the problematic rules
 problem_rule_ids = {'CqzE5oOx1iU', 'OjEkm0XCaKC'}
 
-problem_actions = [a for a in actions if a.get('programRule', {}).get('id') in problem_rule_ids]
-problem_vars = [v for v in variables if v.get('programRule', {}).get('id') in problem_rule_ids]
+problem_actions = [a for rule_id in sorted(problem_rule_ids) for a in graph.actions_of(rule_id)]
+problem_vars = sorted(set().union(*(graph.targets(('rule', rule_id), 'reads') for rule_id in problem_rule_ids)),
+                      key=graph.name)
 
 print(f"Actions for problematic rules: {len(problem_actions)}")
 for action in problem_actions:
-    de = action.get('dataElement', {}).get('id')
+    de = ref_id(action.get('dataElement'))
     print(f"  DataElement: {de}")
 
 print(f"\nVariables for problematic rules: {len(problem_vars)}")
 for var in problem_vars:
-    de = var.get('dataElement', {}).get('id')
-    print(f"  DataElement: {de}")
+    field = graph.field_of(var[1])
+    print(f"  DataElement: {field[1] if field else None} ({graph.name(var)})")
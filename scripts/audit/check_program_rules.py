@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Static checks of all program rules in a bundle (see common/rule_analysis.py).
+
+    python3 scripts/audit/check_program_rules.py
+    python3 scripts/audit/check_program_rules.py --bundle artifacts/bundles/programs_bundle_cancer_filtered.json
+    python3 scripts/audit/check_program_rules.py --strict --json > findings.json
+
+Exits 1 when there are errors (with --strict: any finding), so it can gate
+a bundle build.
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+
+from common.rule_analysis import ERROR, analyse
+from common.rule_graph import DEFAULT_BUNDLE, RuleGraph
+
+
+def check_bundle(path, strict=False, ignore=(), quiet=False):
+    """Print the findings for a bundle; returns True when it passes"""
+    started = time.perf_counter()
+    graph = RuleGraph.from_bundle(path)
+    findings = [f for f in analyse(graph) if f['code'] not in ignore]
+    elapsed = time.perf_counter() - started
+    rules = graph.collections['programRules']
+    errors = sum(1 for f in findings if f['severity'] == ERROR)
+    warnings = len(findings) - errors
+
+    if not quiet:
+        for f in findings:
+            icon = "❌" if f['severity'] == ERROR else "⚠️ "
+            rule = rules.get(f['rule'])
+            where = f" [{rule.get('name')}]" if rule else (f" [rule {f['rule']}]" if f['rule'] else "")
+            print(f"{icon} {f['code']}: {f['message']}{where}")
+        if findings:
+            print()
+    counts = Counter(f['code'] for f in findings)
+    print(f"📊 {len(rules)} rules, {len(graph.collections['programRuleActions'])} actions checked "
+          f"in {elapsed * 1000:.0f} ms: {errors} errors, {warnings} warnings"
+          + (f" ({', '.join(f'{code} {n}' for code, n in sorted(counts.items()))})" if counts else ""))
+    passed = not errors and not (strict and warnings)
+    print("✅ Program rules passed" if passed else "❌ Program rules failed")
+    return passed, findings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statically check the program rules of a bundle")
+    parser.add_argument('--bundle', type=Path, default=DEFAULT_BUNDLE,
+                        help=f"metadata bundle (default: {DEFAULT_BUNDLE.relative_to(BASE_DIR)})")
+    parser.add_argument('--strict', action='store_true', help="fail on warnings too")
+    parser.add_argument('--ignore', action='append', default=[], metavar='CODE',
+                        help="skip a finding code, e.g. NOT_IN_BUNDLE (repeatable)")
+    parser.add_argument('--json', action='store_true', help="print the findings as JSON")
+    args = parser.parse_args()
+
+    if args.json:
+        graph = RuleGraph.from_bundle(args.bundle)
+        findings = [f for f in analyse(graph) if f['code'] not in args.ignore]
+        print(json.dumps(findings, indent=2, ensure_ascii=True))
+        errors = any(f['severity'] == ERROR for f in findings)
+        sys.exit(1 if errors or (args.strict and findings) else 0)
+    passed, _ = check_bundle(args.bundle, args.strict, args.ignore)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
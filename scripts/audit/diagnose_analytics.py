@@ -1,32 +1,37 @@
 #!/usr/bin/env python3
 """
 Validate program indicators and find analytics issues
+
+Expressions and filters are parsed and every reference is resolved against
+the metadata (see common/indicator_expressions.py).
 """
-import json
-import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+
+from common.indicator_expressions import IndicatorValidator, ReferenceIndex
+from common.metadata_store import get_store, ref_id
 
 print("=" * 80)
 print("ANALYTICS ISSUE INVESTIGATION")
 print("=" * 80)
 
 # Load all data
-with open('Program/Program Indicator.json') as f:
-    pi_data = json.load(f)
-indicators = pi_data.get('programIndicators', [])
-
-with open('Program/Program.json') as f:
-    prog_data = json.load(f)
-programs = prog_data.get('programs', [])
-program_ids = {p.get('id') for p in programs}
-
-with open('Data Element/Data Element.json') as f:
-    de_data = json.load(f)
-de_ids = {de.get('id') for de in de_data.get('dataElements', [])}
+store = get_store(BASE_DIR, tolerant=True)
+index = ReferenceIndex(store)
+indicators = index.indicators()
+programs = index.program_ids
+data_elements = index.data_elements
+validator = IndicatorValidator(index)
 
 print(f"\n📊 Data Summary:")
 print(f"   Program Indicators: {len(indicators)}")
 print(f"   Programs: {len(programs)}")
-print(f"   Data Elements: {len(de_ids)}")
+print(f"   Data Elements: {len(data_elements)}")
 
 # Check indicators for issues
 print(f"\n🔍 Indicator Validation:")
@@ -34,8 +39,9 @@ print(f"\n🔍 Indicator Validation:")
 missing_program = []
 missing_expression = []
 orphaned_programs = []
-invalid_expressions = []
+invalid_expressions = defaultdict(list)   # issue code -> [(shortname, field, message)]
 
+started = time.perf_counter()
 for ind in indicators:
     shortname = ind.get('shortName', ind.get('id', 'UNKNOWN'))
     
@@ -43,22 +49,19 @@ for ind in indicators:
     if not ind.get('program'):
         missing_program.append(shortname)
     else:
-        prog_ref = ind.get('program', {})
-        prog_id = prog_ref.get('id') if isinstance(prog_ref, dict) else prog_ref
-        if prog_id and prog_id not in program_ids:
+        prog_id = ref_id(ind.get('program', {}))
+        if prog_id and prog_id not in programs:
             orphaned_programs.append((shortname, prog_id))
     
     # Check expression
     if not ind.get('expression'):
         missing_expression.append(shortname)
-    else:
-        # Parse expression for data element references
-        expr = ind.get('expression', '')
-        # Look for #{...} patterns (data element references)
-        matches = re.findall(r'#\{([a-zA-Z0-9]{11})\}', expr)
-        for match in matches:
-            if match not in de_ids:
-                invalid_expressions.append((shortname, match))
+
+    # Parse expression and filter, resolve their references
+    for issue in validator.validate(ind):
+        invalid_expressions[issue['code']].append((shortname, issue['field'], issue['message']))
+elapsed = time.perf_counter() - started
+print(f"   Checked the expressions and filters of {len(indicators)} indicators in {elapsed * 1000:.0f} ms")
 
 # Report issues
 issues_found = 0
@@ -81,11 +84,11 @@ if missing_expression:
         print(f"   - {shortname}")
     issues_found += len(missing_expression)
 
-if invalid_expressions:
-    print(f"\n❌ Invalid Expression References ({len(invalid_expressions)}):")
-    for shortname, elem_id in invalid_expressions[:5]:
-        print(f"   - {shortname}: {elem_id} (element not found)")
-    issues_found += len(invalid_expressions)
+for code, found in sorted(invalid_expressions.items()):
+    print(f"\n❌ Invalid Expression References - {code} ({len(found)}):")
+    for shortname, field, message in found[:5]:
+        print(f"   - {shortname} ({field}): {message}")
+    issues_found += len(found)
 
 if issues_found == 0:
     print(f"\n✅ No validation issues found in program indicators")
@@ -101,6 +104,6 @@ if issues_found > 0:
     if orphaned_programs:
         print("1. Fix orphaned program references - verify program IDs are correct")
     if invalid_expressions:
-        print("2. Fix invalid expression references - verify data element IDs in expressions")
+        print("2. Fix invalid expression references - verify stage, data element and attribute IDs in expressions and filters")
     if missing_program or missing_expression:
         print("3. Add missing program and expression fields")
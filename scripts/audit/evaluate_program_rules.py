@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Evaluate the program rules offline against test events.
+
+    # effects for events in a file (one event, a list, or JSONL)
+    python3 scripts/audit/evaluate_program_rules.py --events events.json
+
+    # thousands of synthetic events; how often each rule fires
+    python3 scripts/audit/evaluate_program_rules.py --synthetic 5000
+
+    # before a rule change: record the effects; after it: compare
+    python3 scripts/audit/evaluate_program_rules.py --synthetic 5000 --record before.jsonl
+    python3 scripts/audit/evaluate_program_rules.py --expect before.jsonl
+
+    # fire rates over a large export, column-wise (per rule and per stage)
+    python3 scripts/audit/evaluate_program_rules.py --batch --events events_export.json --report
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+
+from common.metadata_store import get_store
+from common.program_rules import RuleEngine, synthetic_events
+from common import rule_batch
+
+DEFAULT_REPORT = BASE_DIR / "artifacts" / "reports" / "program_rule_fire_rates.json"
+
+
+def load_events(path):
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(data, dict):
+        return data.get('events') or [data]
+    return data
+
+
+def effect_keys(result):
+    """Comparable form of an evaluation's effects"""
+    return sorted(f"{e['type']} {e['target']} {e['value'] if e['value'] is not None else ''}".rstrip()
+                  for e in result.effects)
+
+
+def print_result(event, result, names):
+    print(f"\n📋 Event {event.get('event', '')} (stage {event.get('programStage')}): "
+          f"{len(result.fired)} rules fired")
+    for effect in result.effects:
+        value = f" = {effect['value']}" if effect['value'] is not None else ""
+        print(f"   {effect['type']:<18} {effect['target']}{value}  [{names.get(effect['rule'], effect['rule'])}]")
+    for rule_id, error in result.errors.items():
+        print(f"   ⚠️  {names.get(rule_id, rule_id)}: {error}")
+
+
+def print_rates(result, names):
+    """Fire rates per rule and per program stage from a batch evaluation"""
+    never, always = [], []
+    for rule, fired, applicable in result.rule_rates():
+        if not applicable:
+            continue
+        if not fired:
+            never.append(rule)
+        elif fired == applicable:
+            always.append(rule)
+        print(f"   {fired / applicable:>6.1%}  {fired:>8} / {applicable:<8} {rule['name']}")
+    for stage, rates in result.stage_rates().items():
+        firing = [(rule, fired) for rule, fired, _ in rates if fired]
+        print(f"\n📋 Stage {stage}: {result.stage_events[stage]} events, "
+              f"{len(firing)} of {len(rates)} rules fired")
+        for rule, fired in sorted(firing, key=lambda item: -item[1])[:10]:
+            print(f"   {fired / result.stage_events[stage]:>6.1%}  {rule['name']}")
+    if never:
+        print(f"\n⚠️  {len(never)} rules never fired:")
+        for rule in never:
+            print(f"   - {rule['name']} ({rule['id']})")
+    if always:
+        print(f"\n⚠️  {len(always)} rules fired for every event they apply to:")
+        for rule in always:
+            print(f"   - {rule['name']} ({rule['id']})")
+    errors = [(rule_id, count) for rule_id, count in result.errors.most_common() if count]
+    if errors:
+        print(f"⚠️  Evaluation errors:")
+        for rule_id, count in errors:
+            print(f"   {names.get(rule_id, rule_id)}: {count} events")
+    return never, always
+
+
+def run_batch(args, engine, names):
+    if args.events:
+        events = rule_batch.load_events(args.events)
+    else:
+        events = list(synthetic_events(engine, args.synthetic, args.seed, args.stage))
+    started = time.perf_counter()
+    result = rule_batch.evaluate_batch(engine, events)
+    elapsed = time.perf_counter() - started
+    mode = "column-wise" if rule_batch.np is not None else "per event (NumPy not installed)"
+    print(f"\n📊 {result.events} events evaluated {mode} in {elapsed:.2f}s "
+          f"({result.events / elapsed if elapsed else 0:.0f} events/s)")
+    never, always = print_rates(result, names)
+    if args.report:
+        report = result.as_dict()
+        report['neverFired'] = [rule['id'] for rule in never]
+        report['alwaysFired'] = [rule['id'] for rule in always]
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=True)
+            f.write('\n')
+        print(f"✅ Fire rates written to {args.report}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate program rules against test events")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--events', type=Path, help="JSON/JSONL file of events")
+    source.add_argument('--synthetic', type=int, metavar='N', help="generate N random events")
+    source.add_argument('--expect', type=Path, metavar='RECORD',
+                        help="re-evaluate a --record file and report changed effects")
+    parser.add_argument('--seed', type=int, default=0, help="seed for --synthetic")
+    parser.add_argument('--stage', help="only events of this program stage (--synthetic)")
+    parser.add_argument('--record', type=Path, metavar='OUT',
+                        help="write each event with its effects as JSONL")
+    parser.add_argument('--quiet', '-q', action='store_true', help="only the summary")
+    parser.add_argument('--batch', action='store_true',
+                        help="fire rates only, evaluated column-wise (for large event sets)")
+    parser.add_argument('--report', type=Path, nargs='?', const=DEFAULT_REPORT, metavar='JSON',
+                        help=f"with --batch: write the fire rates as JSON (default: "
+                             f"{DEFAULT_REPORT.relative_to(BASE_DIR)})")
+    args = parser.parse_args()
+    if args.batch and (args.expect or args.record):
+        parser.error("--batch only reports fire rates; it cannot be combined with --expect or --record")
+    if args.report and not args.batch:
+        parser.error("--report requires --batch")
+
+    store = get_store(BASE_DIR, tolerant=True)
+    started = time.perf_counter()
+    engine = RuleEngine.from_store(store)
+    names = {rule['id']: rule['name'] for rule in engine.rules}
+    print(f"📦 {len(engine.rules)} rules, {len(engine.variables)} variables loaded "
+          f"in {time.perf_counter() - started:.2f}s")
+    for rule_id, error in engine.parse_errors.items():
+        print(f"❌ Rule {rule_id}: {error}")
+
+    if args.batch:
+        run_batch(args, engine, names)
+        return
+
+    expected = None
+    if args.expect:
+        records = load_events(args.expect)
+        events = [r['event'] for r in records]
+        expected = [r['effects'] for r in records]
+    elif args.events:
+        events = load_events(args.events)
+    else:
+        events = list(synthetic_events(engine, args.synthetic, args.seed, args.stage))
+    verbose = not args.quiet and args.events is not None
+
+    fired = Counter()
+    errors = Counter()
+    changed = 0
+    record_file = open(args.record, 'w', encoding='utf-8') if args.record else None
+    started = time.perf_counter()
+    for index, event in enumerate(events):
+        result = engine.evaluate(event)
+        fired.update(result.fired)
+        errors.update(result.errors)
+        if verbose:
+            print_result(event, result, names)
+        if record_file:
+            record_file.write(json.dumps({'event': event, 'effects': effect_keys(result)},
+                                         ensure_ascii=True) + '\n')
+        if expected is not None and effect_keys(result) != expected[index]:
+            changed += 1
+            if changed <= 20 and not args.quiet:
+                now, before = set(effect_keys(result)), set(expected[index])
+                print(f"\n🔀 Event {event.get('event', index)}:")
+                for key in sorted(before - now):
+                    print(f"   - {key}")
+                for key in sorted(now - before):
+                    print(f"   + {key}")
+    elapsed = time.perf_counter() - started
+    if record_file:
+        record_file.close()
+
+    print(f"\n📊 {len(events)} events evaluated in {elapsed:.2f}s "
+          f"({len(events) / elapsed if elapsed else 0:.0f} events/s)")
+    if not verbose:
+        never = [rule for rule in engine.rules if not fired[rule['id']]]
+        for rule in engine.rules:
+            if fired[rule['id']]:
+                print(f"   {fired[rule['id']] / len(events):>6.1%}  {rule['name']}")
+        if never:
+            print(f"⚠️  {len(never)} rules never fired:")
+            for rule in never:
+                print(f"   - {rule['name']} ({rule['id']})")
+    if errors:
+        print(f"⚠️  Evaluation errors:")
+        for rule_id, count in errors.most_common():
+            print(f"   {names.get(rule_id, rule_id)}: {count} events")
+    if args.record:
+        print(f"✅ Effects written to {args.record}")
+    if expected is not None:
+        if changed:
+            print(f"❌ Effects changed for {changed} of {len(events)} events")
+            sys.exit(1)
+        print(f"✅ Effects unchanged for all {len(events)} events")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,12 @@
-import json
+import sys
 from pathlib import Path
 
 base = Path(__file__).resolve().parents[2]
-bundle_path = base / "artifacts" / "bundles" / "programs_bundle_cancer.json"
+sys.path.insert(0, str(base / "scripts"))
+
+from common.metadata_stream import file_layout, iter_objects, write_document
 
-# Load bundle
-bundle = json.loads(bundle_path.read_text())
+bundle_path = base / "artifacts" / "bundles" / "programs_bundle_cancer.json"
 
 # Filter out the Pap smear and HPV rules that are causing issues
 problem_rule_ids = {
@@ -13,29 +14,43 @@ problem_rule_ids = {
     'OjEkm0XCaKC',  # HIDE: Pap smear screening type
 }
 
-original_rules = bundle.get('programRules', [])
-filtered_rules = [r for r in original_rules if r.get('id') not in problem_rule_ids]
-
-print(f"Original rules: {len(original_rules)}")
-print(f"Filtered rules: {len(filtered_rules)}")
-print(f"Removed: {len(original_rules) - len(filtered_rules)}")
-
-if len(filtered_rules) < len(original_rules):
-    bundle['programRules'] = filtered_rules
-    
-    # Also remove associated actions for these rules
-    original_actions = bundle.get('programRuleActions', [])
-    filtered_actions = [a for a in original_actions 
-                       if a.get('programRule', {}).get('id') not in problem_rule_ids]
-    
-    print(f"Original actions: {len(original_actions)}")
-    print(f"Filtered actions: {len(filtered_actions)}")
-    
-    bundle['programRuleActions'] = filtered_actions
-    
+# Count first (streams only the rules), so nothing is written if no rule matches
+original_rules = 0
+filtered_rules = 0
+for rule in iter_objects(bundle_path, 'programRules'):
+    original_rules += 1
+    if rule.get('id') not in problem_rule_ids:
+        filtered_rules += 1
+
+print(f"Original rules: {original_rules}")
+print(f"Filtered rules: {filtered_rules}")
+print(f"Removed: {original_rules - filtered_rules}")
+
+if filtered_rules < original_rules:
+    original_actions = 0
+
+    def keep(key):
+        global original_actions
+        for obj in iter_objects(bundle_path, key):
+            if key == 'programRules' and obj.get('id') in problem_rule_ids:
+                continue
+            if key == 'programRuleActions':
+                # Also remove associated actions for these rules
+                original_actions += 1
+                if obj.get('programRule', {}).get('id') in problem_rule_ids:
+                    continue
+            yield obj
+
+    def sections():
+        for key, is_array, value in file_layout(bundle_path):
+            yield key, keep(key) if is_array else value
+
     # Save filtered bundle
     out_path = base / "artifacts" / "bundles" / "programs_bundle_cancer_filtered.json"
-    out_path.write_text(json.dumps(bundle, separators=(",", ":")))
+    counts = write_document(out_path, sections())
+
+    print(f"Original actions: {original_actions}")
+    print(f"Filtered actions: {counts.get('programRuleActions', 0)}")
     print(f"\nWrote filtered bundle to {out_path.name}")
 else:
     print("No rules were removed")
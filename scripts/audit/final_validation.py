@@ -2,12 +2,14 @@
 """
 Final comprehensive project validation and report
 """
-import json
-import os
+import sys
 from pathlib import Path
 from datetime import datetime
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+
+from common.metadata_store import get_store
 
 def generate_final_report():
     """Generate comprehensive project report"""
@@ -20,23 +22,15 @@ def generate_final_report():
     report.append("\n" + "-" * 80)
     
     # Load and analyze all data
-    with open(f"{BASE_DIR}/Program/Program.json") as f:
-        programs = json.load(f).get('programs', [])
-    
-    with open(f"{BASE_DIR}/Program/Program Stage.json") as f:
-        stages = json.load(f).get('programStages', [])
-    
-    with open(f"{BASE_DIR}/Program/Program Indicator.json") as f:
-        indicators = json.load(f).get('programIndicators', [])
-    
-    with open(f"{BASE_DIR}/Data Element/Data Element.json") as f:
-        data_elements = json.load(f).get('dataElements', [])
-    
-    with open(f"{BASE_DIR}/Dashboard/Dashboard.json") as f:
-        dashboards = json.load(f).get('dashboards', [])
-    
-    with open(f"{BASE_DIR}/Validation/Validation Rule.json") as f:
-        validation_rules = json.load(f).get('validationRules', [])
+    store = get_store(BASE_DIR)
+    programs = store['programs']
+    stages = store['programStages']
+    indicators = store['programIndicators']
+    data_elements = store['dataElements']
+    dashboards = store['dashboards']
+    validation_rules = store['validationRules']
+    stages_by_program = stages.grouped_by('program')
+    indicators_by_program = indicators.grouped_by('program')
     
     # Build report
     report.append("\n📊 PROJECT STATISTICS")
@@ -64,8 +58,8 @@ def generate_final_report():
         name = prog.get('name')
         short = prog.get('shortName')
         prog_id = prog.get('id')
-        stage_count = sum(1 for s in stages if s.get('program', {}).get('id') == prog_id)
-        indicator_count = sum(1 for i in indicators if i.get('program', {}).get('id') == prog_id)
+        stage_count = len(stages_by_program.get(prog_id, []))
+        indicator_count = len(indicators_by_program.get(prog_id, []))
         report.append(f"\n  {name} ({short})")
         report.append(f"    - ID: {prog_id}")
         report.append(f"    - Stages: {stage_count}")
@@ -84,19 +78,14 @@ def generate_final_report():
     report.append("-" * 80)
     
     # Check all references
-    program_ids = {p.get('id') for p in programs}
-    de_ids = {de.get('id') for de in data_elements}
-    
     stage_refs_ok = all(
-        s.get('program', {}).get('id') in program_ids or 
-        s.get('program', {}).get('id') is None
-        for s in stages
+        prog_id is None or prog_id in programs
+        for prog_id in stages_by_program
     )
     
     indicator_refs_ok = all(
-        i.get('program', {}).get('id') in program_ids or 
-        i.get('program', {}).get('id') is None
-        for i in indicators
+        prog_id is None or prog_id in programs
+        for prog_id in indicators_by_program
     )
     
     dashboard_items_ok = all(
@@ -2,11 +2,14 @@
 """
 Final project cleanup and issue resolution summary
 """
-import json
 import os
+import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+
+from common.metadata_store import get_store, ref_id
 
 def verify_all_fixes():
     """Verify all originally reported issues have been fixed"""
@@ -16,11 +19,11 @@ def verify_all_fixes():
     print("=" * 80)
     
     fixes = []
+    store = get_store(BASE_DIR)
     
     # Issue 1: Dashboards showing "item type is missing"
     print("\n1️⃣ DASHBOARDS - Item Type Missing")
-    with open(f"{BASE_DIR}/Dashboard/Dashboard.json") as f:
-        dashboards = json.load(f).get('dashboards', [])
+    dashboards = store['dashboards']
     
     items_without_type = 0
     for dashboard in dashboards:
@@ -36,8 +39,7 @@ def verify_all_fixes():
     
     # Issue 2: Program stages have no data elements
     print("\n2️⃣ PROGRAM STAGES - Missing Data Elements")
-    with open(f"{BASE_DIR}/Program/Program Stage.json") as f:
-        stages = json.load(f).get('programStages', [])
+    stages = store['programStages']
     
     stages_with_elements = sum(1 for s in stages if s.get('programStageDataElements'))
     if stages_with_elements == len(stages):
@@ -48,8 +50,7 @@ def verify_all_fixes():
     
     # Issue 3: CECAP naming
     print("\n3️⃣ PROGRAM NAMING - CECAP Not Uniform")
-    with open(f"{BASE_DIR}/Program/Program.json") as f:
-        programs = json.load(f).get('programs', [])
+    programs = store['programs']
     
     cervical_prog = next((p for p in programs if 'Cervical' in p.get('name', '')), None)
     if cervical_prog and cervical_prog.get('shortName') == 'CCP':
@@ -65,15 +66,12 @@ def verify_all_fixes():
     
     # Issue 5: Analytics generation failure
     print("\n5️⃣ ANALYTICS GENERATION - Problem with Generated Analytics")
-    with open(f"{BASE_DIR}/Program/Program Indicator.json") as f:
-        indicators = json.load(f).get('programIndicators', [])
+    indicators = store['programIndicators']
     
-    program_ids = {p.get('id') for p in programs}
     invalid_refs = 0
     for ind in indicators:
-        prog_ref = ind.get('program', {})
-        prog_id = prog_ref.get('id') if isinstance(prog_ref, dict) else prog_ref
-        if prog_id and prog_id not in program_ids:
+        prog_id = ref_id(ind.get('program', {}))
+        if prog_id and prog_id not in programs:
             invalid_refs += 1
     
     if invalid_refs == 0:
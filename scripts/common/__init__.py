@@ -0,0 +1,3 @@
+"""
+Shared helpers for the cancer registry maintenance scripts
+"""
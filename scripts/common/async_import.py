@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Asyncio import runner for independent metadata files.
+
+Each file is one task. An asyncio.Semaphore bounds how many are in flight,
+and an optional token bucket per endpoint caps the request rate
+(requests/second), so a burst of small per-cancer files cannot overwhelm
+the server. The HTTP calls themselves go through the pooled keep-alive
+DHIS2Client on a worker thread per slot (the scripts have no async HTTP
+dependency), and a progress line is refreshed as tasks finish.
+
+    results = run_imports(client, [(path, description), ...], concurrency=6,
+                          rate_limits={'/api/metadata': 3})
+"""
+import argparse
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common.dhis2_client import import_stats
+
+METADATA_ENDPOINT = "/api/metadata"
+# Endpoints the runner sends requests to, and so can rate-limit
+RATE_LIMITED_ENDPOINTS = (METADATA_ENDPOINT,)
+
+
+class RateLimiter:
+    """Token bucket: at most ``rate`` acquisitions per second, bursts up to ``burst``"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self.updated is not None:
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ImportResult:
+    """Outcome of one file import"""
+
+    def __init__(self, path, description):
+        self.path = path
+        self.description = description
+        self.ok = False
+        self.status = None
+        self.created = 0
+        self.updated = 0
+        self.error = None
+        self.seconds = 0.0
+
+
+class Progress:
+    """Single refreshed status line on a terminal; one line per finished file otherwise"""
+
+    def __init__(self, total, stream=sys.stdout):
+        self.total = total
+        self.stream = stream
+        self.live = stream.isatty()
+        self.running = self.done = self.failed = 0
+        self.started = time.perf_counter()
+
+    def line(self):
+        elapsed = time.perf_counter() - self.started
+        return (f"⏳ [{self.done}/{self.total}] running {self.running} | "
+                f"✅ {self.done - self.failed} ❌ {self.failed} | {elapsed:.1f}s")
+
+    def refresh(self):
+        if self.live:
+            self.stream.write("\r" + self.line() + "\033[K")
+            self.stream.flush()
+
+    def start(self):
+        self.running += 1
+        self.refresh()
+
+    def finish(self, result):
+        self.running -= 1
+        self.done += 1
+        if not result.ok:
+            self.failed += 1
+        if self.live:
+            self.stream.write("\r\033[K")
+        if result.ok:
+            message = (f"✅ {result.description}: {result.status}, created {result.created}, "
+                       f"updated {result.updated} ({result.seconds:.1f}s)")
+        else:
+            message = f"❌ {result.description}: {str(result.error)[:150]} ({result.seconds:.1f}s)"
+        self.stream.write(message + "\n")
+        self.refresh()
+
+    def close(self):
+        if self.live:
+            self.stream.write("\r\033[K")
+        self.stream.write(self.line() + "\n")
+        self.stream.flush()
+
+
+async def import_all(client, files_to_import, concurrency=4, rate_limits=None, params=None,
+                     progress=True):
+    """Import (path, description) pairs concurrently; returns ImportResults in input order"""
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    limiters = {endpoint: RateLimiter(rate, burst=max(1, int(rate)))
+                for endpoint, rate in (rate_limits or {}).items()}
+    tracker = Progress(len(files_to_import)) if progress else None
+
+    async def run(executor, path, description):
+        result = ImportResult(path, description)
+        async with semaphore:
+            limiter = limiters.get(METADATA_ENDPOINT)
+            if limiter is not None:
+                await limiter.acquire()
+            if tracker:
+                tracker.start()
+            started = time.perf_counter()
+            try:
+                response = await loop.run_in_executor(executor, client.import_file, path, params)
+                result.status, result.created, result.updated = import_stats(response)
+                result.ok = result.status != 'ERROR'
+            except Exception as e:
+                result.error = e
+            result.seconds = time.perf_counter() - started
+            if tracker:
+                tracker.finish(result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = await asyncio.gather(*(run(executor, path, description)
+                                         for path, description in files_to_import))
+    if tracker:
+        tracker.close()
+    return results
+
+
+def run_imports(client, files_to_import, concurrency=4, rate_limits=None, params=None, progress=True):
+    """Synchronous entry point for import_all()"""
+    return asyncio.run(import_all(client, files_to_import, concurrency, rate_limits, params, progress))
+
+
+def rate_limit(spec):
+    """argparse type for '[ENDPOINT=]PER_SEC' -> (endpoint, rate); a bare number limits /api/metadata"""
+    endpoint, _, rate = spec.rpartition('=')
+    endpoint = endpoint or METADATA_ENDPOINT
+    try:
+        rate = float(rate)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a number of requests per second: {rate!r}") from None
+    if not rate > 0:
+        raise argparse.ArgumentTypeError(f"rate must be positive: {spec!r}")
+    if endpoint not in RATE_LIMITED_ENDPOINTS:
+        raise argparse.ArgumentTypeError(
+            f"cannot rate-limit {endpoint}; supported: {', '.join(RATE_LIMITED_ENDPOINTS)}")
+    return endpoint, rate
+
+
+def parse_rate_limits(specs):
+    """['/api/metadata=2', ...] or rate_limit() pairs -> {'/api/metadata': 2.0}"""
+    limits = {}
+    for spec in specs or []:
+        endpoint, rate = rate_limit(spec) if isinstance(spec, str) else spec
+        limits[endpoint] = rate
+    return limits
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Chunked /api/metadata imports.
+
+A metadata document is split per type into chunks bounded by object count
+and serialised size, and the chunks are sent in dependency order (option
+sets before data elements, programs before stages, parents before child
+organisation units, ...). Each chunk is retried on its own, and the import
+reports are summed into one ImportTotals. When the source is a file, types
+are streamed one at a time, so only a chunk's worth of objects is held in
+memory (organisation units are the exception: they are sorted by level).
+
+With a Checkpoint (common/import_checkpoint.py) every acknowledged chunk
+of a file is recorded by content digest, and chunks already recorded are
+skipped, so an interrupted import can resume where it stopped.
+"""
+import hashlib
+import http.client
+import time
+from pathlib import Path
+
+from common.dhis2_client import DHIS2Error, encode_json, import_report
+from common.metadata_stream import file_layout, iter_objects
+
+DEFAULT_MAX_OBJECTS = 500
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+DEFAULT_RETRIES = 3
+
+# Import order used when chunks go out as separate requests: referenced
+# types before the types that reference them. Pairs that point at each
+# other (program <-> programStage, programRule <-> programRuleAction) follow
+# the owning side first, as DHIS2's own importer does.
+METADATA_ORDER = [
+    'attributes', 'optionSets', 'options', 'optionGroups', 'optionGroupSets',
+    'categoryOptions', 'categories', 'categoryCombos', 'categoryOptionCombos',
+    'categoryOptionGroups', 'categoryOptionGroupSets',
+    'organisationUnitLevels', 'organisationUnits', 'organisationUnitGroups',
+    'organisationUnitGroupSets',
+    'userRoles', 'users', 'userGroups',
+    'legendSets', 'indicatorTypes', 'dataElements', 'dataElementGroups', 'dataElementGroupSets',
+    'indicators', 'indicatorGroups', 'indicatorGroupSets', 'dataSets', 'sections',
+    'validationRules', 'validationRuleGroups',
+    'trackedEntityAttributes', 'trackedEntityTypes',
+    'programs', 'programStages', 'programStageSections', 'programSections',
+    'programTrackedEntityAttributes', 'programIndicators', 'programIndicatorGroups',
+    'programRuleVariables', 'programRules', 'programRuleActions',
+    'visualizations', 'eventVisualizations', 'eventCharts', 'eventReports', 'maps', 'reports',
+    'dashboards',
+]
+# Types that reference their own type and must be imported in waves
+HIERARCHICAL = {'organisationUnits': lambda ou: ou.get('level') or len(ou.get('path', '').split('/'))}
+# Failures worth retrying: transport errors and server-side errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def ordered_types(type_keys):
+    """Type keys in import order (unknown types last, in their original order)"""
+    rank = {key: i for i, key in enumerate(METADATA_ORDER)}
+    keys = list(dict.fromkeys(type_keys))
+    return sorted(keys, key=lambda k: (rank.get(k, len(rank)), keys.index(k)))
+
+
+class ImportTotals:
+    """Stats and error reports summed over chunk imports"""
+
+    def __init__(self):
+        self.stats = {'created': 0, 'updated': 0, 'deleted': 0, 'ignored': 0, 'total': 0}
+        self.chunks = 0
+        self.skipped = 0
+        self.failed_chunks = []
+        self.error_reports = []
+        self.type_reports = {}
+        self.statuses = []
+
+    def add(self, result):
+        report = import_report(result)
+        self.chunks += 1
+        self.statuses.append(report.get('status', 'UNKNOWN'))
+        for key, value in report.get('stats', {}).items():
+            self.stats[key] = self.stats.get(key, 0) + value
+        for type_report in report.get('typeReports', []):
+            self._add_type_report(type_report)
+            for object_report in type_report.get('objectReports', []):
+                self.error_reports.extend(object_report.get('errorReports', []))
+
+    def _add_type_report(self, type_report):
+        merged = self.type_reports.setdefault(
+            type_report.get('klass'), {'klass': type_report.get('klass'), 'stats': {}, 'objectReports': []})
+        for key, value in type_report.get('stats', {}).items():
+            merged['stats'][key] = merged['stats'].get(key, 0) + value
+        # Only object reports with errors are kept (for report_parser.py)
+        merged['objectReports'].extend(o for o in type_report.get('objectReports', [])
+                                       if o.get('errorReports'))
+
+    def skip(self):
+        """A chunk already imported by an earlier, interrupted run"""
+        self.chunks += 1
+        self.skipped += 1
+
+    def fail(self, label, error):
+        self.chunks += 1
+        self.statuses.append('ERROR')
+        self.failed_chunks.append((label, str(error)))
+
+    @property
+    def status(self):
+        """Worst status over all chunks (OK < WARNING < ERROR)"""
+        for status in ('ERROR', 'WARNING'):
+            if status in self.statuses:
+                return status
+        return 'OK' if self.statuses else 'UNKNOWN'
+
+    def merge(self, other):
+        for key, value in other.stats.items():
+            self.stats[key] = self.stats.get(key, 0) + value
+        self.chunks += other.chunks
+        self.skipped += other.skipped
+        self.failed_chunks.extend(other.failed_chunks)
+        self.error_reports.extend(other.error_reports)
+        for type_report in other.type_reports.values():
+            self._add_type_report(type_report)
+        self.statuses.extend(other.statuses)
+
+    def as_dict(self):
+        """Shaped like a single /api/metadata import report"""
+        return {'status': self.status, 'stats': dict(self.stats), 'chunks': self.chunks,
+                'skippedChunks': self.skipped,
+                'failedChunks': [{'chunk': c, 'error': e} for c, e in self.failed_chunks],
+                'typeReports': list(self.type_reports.values())}
+
+
+def _source_types(source):
+    if isinstance(source, dict):
+        return [k for k, v in source.items() if isinstance(v, list)]
+    return [key for key, is_array, _ in file_layout(source) if is_array]
+
+
+def _source_objects(source, type_key):
+    if isinstance(source, dict):
+        return iter(source.get(type_key, []))
+    return iter_objects(source, type_key)
+
+
+def iter_waves(source):
+    """Yield (type_key, objects) groups that may be imported once earlier groups are in.
+
+    Most types form one wave; hierarchical types form one wave per level.
+    """
+    for type_key in ordered_types(_source_types(source)):
+        objects = _source_objects(source, type_key)
+        level_of = HIERARCHICAL.get(type_key)
+        if level_of is None:
+            yield type_key, objects
+            continue
+        by_level = {}
+        for obj in objects:
+            by_level.setdefault(level_of(obj), []).append(obj)
+        for level in sorted(by_level):
+            yield type_key, iter(by_level[level])
+
+
+def iter_chunks(objects, max_objects=DEFAULT_MAX_OBJECTS, max_bytes=DEFAULT_MAX_BYTES):
+    """Split objects into lists of at most max_objects and (roughly) max_bytes compact JSON"""
+    for chunk, _ in iter_hashed_chunks(objects, max_objects, max_bytes):
+        yield chunk
+
+
+def iter_hashed_chunks(objects, max_objects=DEFAULT_MAX_OBJECTS, max_bytes=DEFAULT_MAX_BYTES):
+    """iter_chunks() yielding (chunk, content digest) pairs"""
+    chunk, size, digest = [], 0, hashlib.blake2b(digest_size=16)
+    for obj in objects:
+        encoded = encode_json(obj)
+        obj_size = len(encoded) + 1
+        if chunk and (len(chunk) >= max_objects or size + obj_size > max_bytes):
+            yield chunk, digest.hexdigest()
+            chunk, size, digest = [], 0, hashlib.blake2b(digest_size=16)
+        chunk.append(obj)
+        size += obj_size
+        digest.update(encoded + b"\n")
+    if chunk:
+        yield chunk, digest.hexdigest()
+
+
+def post_chunk(client, type_key, objects, params=None, retries=DEFAULT_RETRIES, backoff=1.0):
+    """Import one chunk, retrying transport and 5xx failures with exponential backoff.
+
+    A 409 is DHIS2 reporting object-level errors, so its body is returned as
+    the import report rather than retried.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return client.import_metadata({type_key: objects}, params)
+        except DHIS2Error as e:
+            if e.status == 409 and isinstance(e.body, dict):
+                return e.body
+            if e.status not in RETRY_STATUSES or attempt == retries:
+                raise
+        except (OSError, http.client.HTTPException):
+            if attempt == retries:
+                raise
+        time.sleep(backoff * 2 ** attempt)
+
+
+def import_chunked(client, source, max_objects=DEFAULT_MAX_OBJECTS, max_bytes=DEFAULT_MAX_BYTES,
+                   params=None, retries=DEFAULT_RETRIES, progress=None, checkpoint=None):
+    """Import a document (dict or file path) chunk by chunk; returns ImportTotals.
+
+    Waves go out in dependency order; within a wave up to client.concurrency
+    chunks are in flight at once. A checkpoint applies to file sources only.
+    """
+    totals = ImportTotals()
+    if isinstance(source, (str, Path)):
+        source = Path(source)
+    else:
+        checkpoint = None
+
+    def send(job):
+        label, type_key, objects, digest = job
+        try:
+            result = post_chunk(client, type_key, objects, params, retries)
+        except Exception as e:
+            return label, None, e
+        if checkpoint is not None and import_report(result).get('status') != 'ERROR':
+            checkpoint.mark_chunk(source, digest)
+        return label, result, None
+
+    for type_key, objects in iter_waves(source):
+        window = []
+        for chunk, digest in iter_hashed_chunks(objects, max_objects, max_bytes):
+            if checkpoint is not None and checkpoint.chunk_done(source, digest):
+                totals.skip()
+                continue
+            window.append((f"{type_key}#{totals.chunks + len(window) + 1}", type_key, chunk, digest))
+            if len(window) >= client.concurrency:
+                _flush(client, send, window, totals, progress)
+                window = []
+        _flush(client, send, window, totals, progress)
+    return totals
+
+
+def _flush(client, send, window, totals, progress):
+    for label, result, error in client.map(send, window):
+        if error is not None:
+            totals.fail(label, error)
+        else:
+            totals.add(result)
+        if progress is not None:
+            progress(label, result, error)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Delta imports: send only the metadata objects that changed since the last
+successful import.
+
+After a successful import the manifest (artifacts/import_manifest.json)
+records, per target server and per file, a content hash for every object
+keyed by type and UID. In changed-only mode the files are streamed, each
+object is hashed and compared with the manifest, and only new or changed
+objects are kept. The result is one small payload (imported in dependency
+order, see common/chunked_import.py) plus a DELETE import for UIDs that
+left the tree. Objects that merely moved between the files being imported
+are updated, not deleted.
+
+Hashes ignore server-maintained fields (created, lastUpdated, ...), so a
+fresh export of unchanged metadata does not count as a change.
+"""
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+
+from common.chunked_import import DEFAULT_MAX_BYTES, DEFAULT_MAX_OBJECTS, METADATA_ORDER, import_chunked
+from common.dhis2_client import import_report, import_stats
+from common.metadata_stream import file_layout, iter_objects
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+MANIFEST_PATH = BASE_DIR / "artifacts" / "import_manifest.json"
+VOLATILE_FIELDS = {'created', 'lastUpdated', 'createdBy', 'lastUpdatedBy', 'href', 'access'}
+TYPE_KEYS = set(METADATA_ORDER)
+
+
+def object_hash(obj):
+    """Content hash of a metadata object, ignoring server-maintained fields"""
+    content = {k: v for k, v in obj.items() if k not in VOLATILE_FIELDS}
+    text = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+    return hashlib.blake2b(text.encode('ascii'), digest_size=10).hexdigest()
+
+
+def file_key(path):
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def hash_file(path, keep=None):
+    """{type: {uid: hash}} for a file's metadata arrays.
+
+    keep(type_key, uid, digest) -> bool selects objects to return as well;
+    returns (hashes, {type: [kept objects]}). Objects without an id are
+    always kept, since they cannot be compared.
+    """
+    hashes, kept = {}, {}
+    types = [key for key, is_array, _ in file_layout(path) if is_array and key in TYPE_KEYS]
+    for type_key in dict.fromkeys(types):
+        type_hashes = hashes.setdefault(type_key, {})
+        for obj in iter_objects(path, type_key):
+            if not isinstance(obj, dict):
+                continue
+            uid = obj.get('id')
+            digest = object_hash(obj)
+            if isinstance(uid, str):
+                type_hashes[uid] = digest
+            if keep is not None and (not isinstance(uid, str) or keep(type_key, uid, digest)):
+                kept.setdefault(type_key, []).append(obj)
+    return hashes, kept
+
+
+class Manifest:
+    """Per-object content hashes of the last successful import, per target server"""
+
+    def __init__(self, target, path=MANIFEST_PATH):
+        self.path = Path(path)
+        self.target = target
+        self.data = {'targets': {}}
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                self.data = json.load(f)
+        self.files = self.data['targets'].setdefault(target, {}).setdefault('files', {})
+
+    def hashes(self, path):
+        return self.files.get(file_key(path), {})
+
+    def record(self, path, hashes=None):
+        """Store a file's hashes (computed now unless given) as successfully imported"""
+        if hashes is None:
+            hashes, _ = hash_file(path)
+        self.files[file_key(path)] = hashes
+
+    def save(self):
+        self.data['targets'][self.target]['updated'] = datetime.now().isoformat(timespec='seconds')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=True, sort_keys=True)
+            f.write('\n')
+        tmp_path.replace(self.path)
+
+
+class Delta:
+    """Objects to create, update and delete for a set of files"""
+
+    def __init__(self):
+        self.upserts = {}
+        self.created = 0
+        self.updated = 0
+        self.deletes = {}
+        self.hashes = {}
+        self.errors = {}
+        self.conflicts = []     # (type, uid, earlier file, later file): same UID, different content
+
+    @property
+    def deleted(self):
+        return sum(len(ids) for ids in self.deletes.values())
+
+    def __bool__(self):
+        return bool(self.upserts or self.deletes)
+
+
+def compute_delta(paths, manifest):
+    """Diff the files against the manifest in one streaming pass per file.
+
+    When several files hold the same UID, the copy in the last of them is
+    the one compared and sent, as in a full import of the same files in
+    plan order (see common/import_plan.py).
+    """
+    delta = Delta()
+    known = {}
+    for path in paths:
+        for type_key, entries in manifest.hashes(path).items():
+            for uid, digest in entries.items():
+                known[(type_key, uid)] = digest
+    present = {}    # (type, uid) -> (hash, file) of the latest copy seen
+    changed = {}    # (type, uid) -> latest copy, when it differs from the manifest
+    current = None
+
+    def keep(type_key, uid, digest):
+        key = (type_key, uid)
+        earlier = present.get(key)
+        if earlier is not None and earlier[0] != digest:
+            delta.conflicts.append((type_key, uid, earlier[1], current))
+        present[key] = (digest, current)
+        # A later copy replaces whatever an earlier file would have sent
+        changed.pop(key, None)
+        return known.get(key) != digest
+
+    for path in paths:
+        current = path
+        try:
+            hashes, kept = hash_file(path, keep)
+        except Exception as e:
+            delta.errors[path] = str(e)
+            continue
+        delta.hashes[path] = hashes
+        for type_key, objects in kept.items():
+            for obj in objects:
+                uid = obj.get('id')
+                if isinstance(uid, str):
+                    changed[(type_key, uid)] = obj
+                else:
+                    delta.upserts.setdefault(type_key, []).append(obj)
+
+    for (type_key, uid), obj in changed.items():
+        delta.upserts.setdefault(type_key, []).append(obj)
+        if (type_key, uid) in known:
+            delta.updated += 1
+        else:
+            delta.created += 1
+
+    for path in paths:
+        if path in delta.errors:
+            continue
+        for type_key, entries in manifest.hashes(path).items():
+            for uid in entries:
+                if (type_key, uid) not in present:
+                    delta.deletes.setdefault(type_key, []).append({'id': uid})
+    return delta
+
+
+def import_changed(client, files_to_import, manifest, params=None, max_objects=None, max_bytes=None):
+    """Import only what changed in (path, description) pairs. Returns (success, fail) file counts."""
+    paths = [Path(path) for path, _ in files_to_import]
+    delta = compute_delta(paths, manifest)
+    for path, error in delta.errors.items():
+        print(f"\n❌ {path}: {error[:150]}")
+    conflicting = {}
+    for type_key, uid, earlier, later in delta.conflicts:
+        files = conflicting.setdefault((type_key, uid), [Path(earlier).name])
+        files.append(Path(later).name)
+    for (type_key, uid), files in conflicting.items():
+        print(f"⚠️  {type_key} {uid} differs in {', '.join(dict.fromkeys(files))}; "
+              f"the copy in {files[-1]} is the one imported")
+
+    print(f"\n📤 Changes since last import: {delta.created} created, "
+          f"{delta.updated} updated, {delta.deleted} deleted")
+    ok = True
+    if delta.upserts:
+        totals = import_chunked(client, delta.upserts, max_objects or DEFAULT_MAX_OBJECTS,
+                                max_bytes or DEFAULT_MAX_BYTES, params)
+        status, created, updated = import_stats(totals.as_dict())
+        print(f"   ✅ Status: {status}")
+        print(f"      Created: {created}, Updated: {updated} ({totals.chunks} chunks)")
+        for label, error in totals.failed_chunks:
+            print(f"   ❌ Chunk {label} failed: {error[:150]}")
+        ok = not totals.failed_chunks and status != 'ERROR'
+    if delta.deletes and ok:
+        try:
+            result = client.import_metadata(delta.deletes, dict(params or {}, importStrategy='DELETE'))
+            status, _, _ = import_stats(result)
+            deleted = import_report(result).get('stats', {}).get('deleted', 0)
+            print(f"   ✅ Delete status: {status} ({deleted} deleted)")
+            ok = status != 'ERROR'
+        except Exception as e:
+            print(f"   ❌ Delete failed: {str(e)[:150]}")
+            ok = False
+    if not delta:
+        print("   ✅ Nothing to send")
+
+    if ok:
+        for path, hashes in delta.hashes.items():
+            manifest.record(path, hashes)
+        manifest.save()
+    else:
+        print("   ⚠️  Manifest not updated; the changes will be sent again next run")
+    success = len(delta.hashes) if ok else 0
+    return success, len(paths) - success
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Shared DHIS2 Web API client for the import scripts.
+
+Connections are pooled and kept alive (stdlib http.client), so a run that
+imports dozens of files pays the TCP/TLS handshake once per worker rather
+than once per request, and the Basic auth header is built once. Requests
+can be fanned out over a bounded number of worker threads with map().
+
+JSON bodies are serialised compactly and, with compress=True, gzip-encoded
+as they are serialised (Content-Encoding: gzip). If the server refuses a
+compressed body the request is repeated uncompressed, and compression stays
+off for the rest of the run once a plain retry has succeeded.
+
+    with DHIS2Client() as client:
+        result = client.import_metadata(data)
+        client.rebuild_resource_tables()
+"""
+import base64
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from common.report_parser import parse_report
+
+DHIS2_URL = os.environ.get('DHIS2_URL', "http://localhost:8085")
+USERNAME = os.environ.get('DHIS2_USERNAME', "Meduletu_Kamati")
+PASSWORD = os.environ.get('DHIS2_PASSWORD', "Covid19!#@$")
+METADATA_PARAMS = {'importStrategy': 'CREATE_AND_UPDATE', 'atomicMode': 'NONE'}
+
+# Errors that mean a kept-alive connection was closed by the server between requests
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                           ConnectionResetError, BrokenPipeError)
+# Statuses a server answers with when it cannot decode a gzip request body;
+# a 400 only counts when its body blames the encoding (else the payload is bad)
+GZIP_REFUSED = (411, 415)
+GZIP_ERROR_WORDS = ('gzip', 'encoding', 'compress', 'decod')
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+
+class DHIS2Error(Exception):
+    """Non-2xx response; carries the status and the (parsed) body"""
+
+    def __init__(self, status, reason, body):
+        self.status = status
+        self.reason = reason
+        self.body = body
+        message = body.get('message') if isinstance(body, dict) else None
+        super().__init__(f"HTTP Error {status}: {message or reason}")
+
+
+def gzip_refused(error):
+    """Whether a DHIS2Error means the server could not read a gzip body"""
+    if error.status in GZIP_REFUSED:
+        return True
+    text = json.dumps(error.body) if isinstance(error.body, (dict, list)) else str(error.body or '')
+    return error.status == 400 and any(word in text.lower() for word in GZIP_ERROR_WORDS)
+
+
+class ConnectionPool:
+    """Thread-safe pool of keep-alive connections to one host"""
+
+    def __init__(self, base_url, size, timeout):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or 'http'
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.size = size
+        self.opened = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def _new(self):
+        cls = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def get(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._new()
+
+    def put(self, conn):
+        if self._idle.qsize() < self.size:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def note_connect(self, conn):
+        """Count (re)connects; http.client reconnects lazily when sock is None"""
+        if conn.sock is None:
+            with self._lock:
+                self.opened += 1
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class DHIS2Client:
+    """Pooled keep-alive client for the DHIS2 Web API"""
+
+    def __init__(self, base_url=DHIS2_URL, username=USERNAME, password=PASSWORD,
+                 timeout=60, concurrency=1, compress=False):
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = max(1, concurrency)
+        self.pool = ConnectionPool(self.base_url, self.concurrency, timeout)
+        token = base64.b64encode(f"{username}:{password}".encode('utf-8')).decode('ascii')
+        self.headers = {
+            'Authorization': f"Basic {token}",
+            'Accept': 'application/json',
+            'Connection': 'keep-alive',
+        }
+        self.compress = compress
+        # None until the server has accepted or refused a gzip body
+        self.gzip_supported = None
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_uncompressed = 0
+        # Set to a list to record (method, path, status, seconds, bytes sent) per request
+        self.request_log = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.close()
+
+    @property
+    def connections_opened(self):
+        return self.pool.opened
+
+    def url(self, path, params=None):
+        url = self.pool.prefix + path
+        if params:
+            url += ('&' if '?' in url else '?') + urlencode(params)
+        return url
+
+    def request(self, method, path, body=None, params=None, headers=None, compress=None):
+        """Send a request; returns (status, parsed JSON body or text). Raises DHIS2Error on >= 400.
+
+        dict/list bodies are serialised compactly; compress (default: the
+        client's setting) gzip-encodes them.
+        """
+        if compress is None:
+            compress = self.compress
+        url = self.url(path, params)
+        gzipped = None
+        if isinstance(body, (dict, list)):
+            data = body
+            if compress and self.gzip_supported is not False:
+                gzipped, raw_size = encode_json_gzip(data)
+                if raw_size < GZIP_MIN_BYTES:
+                    gzipped = None
+            if gzipped is None:
+                body = encode_json(data)
+
+        if gzipped is not None:
+            try:
+                result = self._request(method, url, gzipped, headers, raw_size,
+                                       {'Content-Encoding': 'gzip'})
+                self.gzip_supported = True
+                return result
+            except DHIS2Error as e:
+                if self.gzip_supported or not gzip_refused(e):
+                    raise
+            # Refused (or rejected as unreadable): repeat uncompressed
+            body = encode_json(data)
+            result = self._request(method, url, body, headers, len(body))
+            if self.gzip_supported is None:
+                print("   ⚠️  Server refused gzip request bodies; sending uncompressed from now on")
+            self.gzip_supported = False
+            return result
+        return self._request(method, url, body, headers, len(body) if body else 0)
+
+    def _request(self, method, url, body, headers, raw_size, extra_headers=None):
+        all_headers = dict(self.headers)
+        if body is not None:
+            all_headers['Content-Type'] = 'application/json'
+        all_headers.update(extra_headers or {})
+        all_headers.update(headers or {})
+
+        started = time.perf_counter()
+        status, reason, raw = self._send(method, url, body, all_headers)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += len(body) if body else 0
+            self.bytes_uncompressed += raw_size
+            if self.request_log is not None:
+                self.request_log.append((method, url.split('?')[0], status, elapsed,
+                                         len(body) if body else 0))
+
+        text = raw.decode('utf-8', errors='replace')
+        try:
+            parsed = json.loads(text) if text else {}
+        except ValueError:
+            parsed = text
+        if status >= 400:
+            raise DHIS2Error(status, reason, parsed)
+        return status, parsed
+
+    def _send(self, method, url, body, headers):
+        conn = self.pool.get()
+        for attempt in range(2):
+            reused = conn.sock is not None
+            self.pool.note_connect(conn)
+            try:
+                conn.request(method, url, body=body, headers=headers)
+                response = conn.getresponse()
+                raw = response.read()
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if not reused or attempt:
+                    raise
+                continue
+            except Exception:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            self.pool.put(conn)
+            return response.status, response.reason, raw
+
+    def get_json(self, path, params=None):
+        return self.request('GET', path, params=params)[1]
+
+    def post_json(self, path, data, params=None):
+        return self.request('POST', path, body=data, params=params)[1]
+
+    def put_json(self, path, data, params=None):
+        return self.request('PUT', path, body=data, params=params)[1]
+
+    def import_metadata(self, data, params=None):
+        """POST a metadata document to /api/metadata and return the import report"""
+        return self.post_json("/api/metadata", data, params=dict(METADATA_PARAMS, **(params or {})))
+
+    def import_file(self, path, params=None):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return self.import_metadata(data, params)
+
+    def rebuild_resource_tables(self):
+        return self.request('POST', "/api/resourceTables/rebuild")[1]
+
+    def map(self, func, items):
+        """Run func(item) over items with up to ``concurrency`` requests in flight (results in order)"""
+        items = list(items)
+        if self.concurrency == 1 or len(items) < 2:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(func, items))
+
+
+def encode_json(data):
+    """Compact UTF-8 JSON (no indentation whitespace on the wire)"""
+    return json.dumps(data, separators=(",", ":")).encode('utf-8')
+
+
+def encode_json_gzip(data, level=6):
+    """gzip-compressed compact JSON, compressed while it is serialised.
+
+    Returns (compressed bytes, uncompressed size); the uncompressed text is
+    never held in memory as a whole.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    out = []
+    raw_size = 0
+    pending = []
+    pending_size = 0
+    for piece in json.JSONEncoder(separators=(",", ":")).iterencode(data):
+        pending.append(piece)
+        pending_size += len(piece)
+        if pending_size >= 65536:
+            chunk = "".join(pending).encode('utf-8')
+            raw_size += len(chunk)
+            out.append(compressor.compress(chunk))
+            pending, pending_size = [], 0
+    chunk = "".join(pending).encode('utf-8')
+    raw_size += len(chunk)
+    out.append(compressor.compress(chunk))
+    out.append(compressor.flush())
+    return b"".join(out), raw_size
+
+
+def import_report(result):
+    """The import report inside a response (newer DHIS2 versions wrap it in 'response')"""
+    if not isinstance(result, dict):
+        return {}
+    if 'stats' not in result and isinstance(result.get('response'), dict):
+        return result['response']
+    return result
+
+
+def import_stats(result):
+    """(status, created, updated) from an /api/metadata import report"""
+    report = import_report(result)
+    stats = report.get('stats', {})
+    return report.get('status', 'UNKNOWN'), stats.get('created', 0), stats.get('updated', 0)
+
+
+def import_files(client, files_to_import, params=None, max_objects=None, max_bytes=None,
+                 manifest=None, checkpoint=None, run_log=None):
+    """Import (path, description) pairs, printing a report per file. Returns (success, fail).
+
+    With max_objects/max_bytes each file is split into chunks (see
+    common/chunked_import.py); files then go one after another in list
+    order and the client's concurrency is spent on chunks instead.
+    Files imported successfully are recorded in manifest (see
+    common/delta_import.py), which is saved at the end. With a checkpoint
+    (common/import_checkpoint.py) completed files and chunks are recorded
+    as they are acknowledged, and ones recorded earlier are skipped.
+    With a run_log (common/report_parser.py) every file's parsed import
+    report is appended to its JSONL log.
+    """
+    chunked = max_objects is not None or max_bytes is not None
+
+    def run(entry):
+        filepath, description = entry
+        lines = [f"\n📤 Importing {description}..."]
+        if checkpoint is not None and checkpoint.file_done(filepath):
+            lines.append("   ⏭️  Already imported (unchanged since the checkpoint)")
+            return True, lines, None
+        try:
+            if chunked:
+                totals = import_chunked_file(client, filepath, params, max_objects, max_bytes,
+                                             checkpoint)
+                response = totals.as_dict()
+            else:
+                response = client.import_file(filepath, params)
+            record = parse_report(response)
+            status, created, updated = import_stats(response)
+            lines.append(f"   ✅ Status: {status}")
+            lines.append(f"      Created: {created}, Updated: {updated}")
+            ok = True
+            if chunked:
+                lines[-1] += f" ({totals.chunks} chunks"
+                lines[-1] += f", {totals.skipped} already imported)" if totals.skipped else ")"
+                for label, error in totals.failed_chunks:
+                    lines.append(f"   ❌ Chunk {label} failed: {error[:150]}")
+                    record.setdefault('message', f"Chunk {label} failed: {error}")
+                ok = not totals.failed_chunks
+            if ok and checkpoint is not None:
+                checkpoint.mark_file(filepath)
+        except Exception as e:
+            lines.append(f"   ❌ ERROR: {str(e)[:150]}")
+            ok = False
+            record = error_record(e)
+        return ok, lines, record
+
+    success_count = fail_count = 0
+    results = map(run, files_to_import) if chunked else client.map(run, files_to_import)
+    for (filepath, description), (ok, lines, record) in zip(files_to_import, results):
+        print("\n".join(lines))
+        if run_log is not None and record is not None:
+            run_log.add(record, filepath, description)
+        if ok:
+            success_count += 1
+            if manifest is not None:
+                manifest.record(filepath)
+        else:
+            fail_count += 1
+    if manifest is not None and success_count:
+        manifest.save()
+    if client.bytes_uncompressed:
+        print(f"\n📦 Sent {client.bytes_sent / 1024:.0f} KB on the wire "
+              f"for {client.bytes_uncompressed / 1024:.0f} KB of JSON")
+    if run_log is not None:
+        errors = run_log.totals.errors
+        print(f"\n📝 Import results logged to {run_log.path}"
+              + (f" ({errors} object errors)" if errors else ""))
+    return success_count, fail_count
+
+
+def add_import_arguments(parser):
+    """The options shared by the file import scripts (see run_file_imports())"""
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="files (or, with --chunk-size, chunks) to import concurrently")
+    parser.add_argument('--no-gzip', action='store_true', help="send request bodies uncompressed")
+    parser.add_argument('--chunk-size', type=int, metavar='N',
+                        help="split each file into imports of at most N objects per type")
+    parser.add_argument('--max-chunk-mb', type=float, metavar='MB',
+                        help="also cap each chunk's JSON size (implies chunking)")
+    # A delta is recomputed from the manifest on every run, so there is nothing to resume
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--changed-only', action='store_true',
+                      help="send only objects created, changed or deleted since the last successful import")
+    mode.add_argument('--resume', action='store_true',
+                      help="skip files and chunks an interrupted run completed (verified by content hash)")
+
+
+def max_chunk_bytes(args):
+    return int(args.max_chunk_mb * 1024 * 1024) if args.max_chunk_mb else None
+
+
+def run_file_imports(client, args, files_to_import):
+    """Import (path, description) pairs as add_import_arguments() options ask. Returns (success, fail).
+
+    Sends only the delta with --changed-only, else every file with a
+    manifest, checkpoint and run log (the checkpoint is cleared once no
+    file failed). Imported lazily: those modules import this one.
+    """
+    from common.delta_import import Manifest, import_changed
+    from common.import_checkpoint import Checkpoint
+    from common.report_parser import RunLog
+
+    manifest = Manifest(client.base_url)
+    if args.changed_only:
+        return import_changed(client, files_to_import, manifest,
+                              max_objects=args.chunk_size, max_bytes=max_chunk_bytes(args))
+    checkpoint = Checkpoint(client.base_url, resume=args.resume)
+    success_count, fail_count = import_files(
+        client, files_to_import, max_objects=args.chunk_size, max_bytes=max_chunk_bytes(args),
+        manifest=manifest, checkpoint=checkpoint, run_log=RunLog())
+    if fail_count == 0:
+        checkpoint.clear()
+    return success_count, fail_count
+
+
+def error_record(error):
+    """report_parser record for an exception raised by an import"""
+    http_error = isinstance(error, DHIS2Error)
+    body = error.body if http_error and isinstance(error.body, dict) else {}
+    record = parse_report(body, error.status if http_error else None)
+    record['status'] = 'ERROR'
+    record.setdefault('message', str(error))
+    return record
+
+
+def import_chunked_file(client, path, params=None, max_objects=None, max_bytes=None, checkpoint=None):
+    """import_chunked() with defaults for unset bounds (imported lazily: it imports this module)"""
+    from common.chunked_import import DEFAULT_MAX_BYTES, DEFAULT_MAX_OBJECTS, import_chunked
+    return import_chunked(client, path, max_objects or DEFAULT_MAX_OBJECTS,
+                          max_bytes or DEFAULT_MAX_BYTES, params, checkpoint=checkpoint)
+
+
+def rebuild_analytics(client, fallback="Analytics rebuild request sent"):
+    """Trigger a resource table rebuild and print the server's message"""
+    print(f"\n📊 Triggering analytics rebuild...")
+    try:
+        result = client.rebuild_resource_tables()
+        message = result.get('message', 'Analytics rebuild initiated') if isinstance(result, dict) \
+            else 'Analytics rebuild initiated'
+        print(f"   ✅ {message}")
+    except Exception:
+        print(f"   ⚠️  {fallback}")
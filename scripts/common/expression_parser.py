@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Parser for DHIS2 rule and indicator expressions.
+
+Program rule conditions, program rule action data and program indicator
+expressions/filters share one syntax:
+
+    d2:hasValue(#{dob}) && d2:yearsBetween(A{dob}, V{enrollment_date}) >= 15
+
+parse() turns an expression into a small AST (Literal, Ref, Call, Unary,
+Binary) and caches it by text, so each distinct expression is parsed once
+per process. References keep their sigil: '#' (data element or rule
+variable), 'A' (attribute), 'V' (environment variable), 'C' (constant),
+'D' and 'I' (indicator forms); program indicator filters may also use
+PS_EVENTDATE:<stage>, a Ref of kind 'PS_EVENTDATE'. What a name means is
+left to the evaluator or validator.
+"""
+import re
+from functools import lru_cache
+
+# Precedence climbing, loosest first
+BINARY_LEVELS = [
+    ('||',),
+    ('&&',),
+    ('==', '!='),
+    ('<', '<=', '>', '>='),
+    ('+', '-'),
+    ('*', '/', '%'),
+]
+COMPARISONS = {'==', '!=', '<', '<=', '>', '>='}
+KEYWORD_OPERATORS = {'and': '&&', 'or': '||', 'not': '!'}
+REF_SIGILS = '#ACVDIR'
+
+TOKEN_RE = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<ref>[#ACVDIR]\{[^}]*\})
+  | (?P<psdate>PS_EVENTDATE:\s*[A-Za-z0-9]+)
+  | (?P<name>(?:d2:)?[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op>&&|\|\||==|!=|<=|>=|[<>!+\-*/%(),])
+""", re.VERBOSE)
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r'}
+
+
+class ExpressionError(ValueError):
+    """Syntax error, with the offset into the expression"""
+
+    def __init__(self, message, expression, pos):
+        self.expression = expression
+        self.pos = pos
+        super().__init__(f"{message} at position {pos}")
+
+
+class Node:
+    __slots__ = ('pos',)
+
+    def children(self):
+        return ()
+
+
+class Literal(Node):
+    __slots__ = ('value',)
+
+    def __init__(self, value, pos=0):
+        self.value = value
+        self.pos = pos
+
+    def __repr__(self):
+        return f"Literal({self.value!r})"
+
+
+class Ref(Node):
+    """#{name}, A{name}, V{name}, C{uid}, ... ('#{stage.de}' keeps the dot)"""
+    __slots__ = ('kind', 'name')
+
+    def __init__(self, kind, name, pos=0):
+        self.kind = kind
+        self.name = name
+        self.pos = pos
+
+    def __repr__(self):
+        return f"Ref({self.kind}{{{self.name}}})"
+
+
+class Call(Node):
+    __slots__ = ('name', 'args')
+
+    def __init__(self, name, args, pos=0):
+        self.name = name
+        self.args = args
+        self.pos = pos
+
+    def children(self):
+        return self.args
+
+    def __repr__(self):
+        return f"Call({self.name}, {self.args!r})"
+
+
+class Unary(Node):
+    __slots__ = ('op', 'operand')
+
+    def __init__(self, op, operand, pos=0):
+        self.op = op
+        self.operand = operand
+        self.pos = pos
+
+    def children(self):
+        return (self.operand,)
+
+    def __repr__(self):
+        return f"Unary({self.op}, {self.operand!r})"
+
+
+class Binary(Node):
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, op, left, right, pos=0):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.pos = pos
+
+    def children(self):
+        return (self.left, self.right)
+
+    def __repr__(self):
+        return f"Binary({self.op}, {self.left!r}, {self.right!r})"
+
+
+def _unquote(text):
+    body = text[1:-1]
+    if '\\' not in body:
+        return body
+    return re.sub(r'\\(.)', lambda m: ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def tokenize(text):
+    """List of (kind, value, pos); kind is number/string/ref/name/op/end"""
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = TOKEN_RE.match(text, pos)
+        if match is None:
+            raise ExpressionError(f"Unexpected character {text[pos]!r}", text, pos)
+        kind = match.lastgroup
+        value = match.group()
+        if kind == 'number':
+            tokens.append((kind, float(value) if any(c in value for c in '.eE') else int(value), pos))
+        elif kind == 'string':
+            tokens.append((kind, _unquote(value), pos))
+        elif kind == 'ref':
+            tokens.append((kind, (value[0], value[2:-1].strip()), pos))
+        elif kind == 'psdate':
+            tokens.append(('ref', ('PS_EVENTDATE', value.split(':', 1)[1].strip()), pos))
+        elif kind == 'name' and value.lower() in KEYWORD_OPERATORS:
+            tokens.append(('op', KEYWORD_OPERATORS[value.lower()], pos))
+        elif kind != 'space':
+            tokens.append((kind, value, pos))
+        pos = match.end()
+    tokens.append(('end', None, len(text)))
+    return tokens
+
+
+class Parser:
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.index = 0
+
+    def peek(self):
+        return self.tokens[self.index]
+
+    def take(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def expect(self, value):
+        kind, found, pos = self.take()
+        if kind != 'op' or found != value:
+            raise ExpressionError(f"Expected {value!r}, found {found if kind != 'end' else 'end'!r}",
+                                  self.text, pos)
+
+    def parse(self):
+        if self.peek()[0] == 'end':
+            raise ExpressionError("Empty expression", self.text, 0)
+        node = self.binary(0)
+        kind, value, pos = self.peek()
+        if kind != 'end':
+            raise ExpressionError(f"Unexpected {value!r}", self.text, pos)
+        return node
+
+    def binary(self, level):
+        if level == len(BINARY_LEVELS):
+            return self.unary()
+        node = self.binary(level + 1)
+        while True:
+            kind, value, pos = self.peek()
+            if kind != 'op' or value not in BINARY_LEVELS[level]:
+                return node
+            self.take()
+            node = Binary(value, node, self.binary(level + 1), pos)
+
+    def unary(self):
+        kind, value, pos = self.peek()
+        if kind == 'op' and value in ('!', '-', '+'):
+            self.take()
+            return Unary(value, self.unary(), pos)
+        return self.primary()
+
+    def primary(self):
+        kind, value, pos = self.take()
+        if kind in ('number', 'string'):
+            return Literal(value, pos)
+        if kind == 'ref':
+            return Ref(value[0], value[1], pos)
+        if kind == 'op' and value == '(':
+            node = self.binary(0)
+            self.expect(')')
+            return node
+        if kind == 'name':
+            lowered = value.lower()
+            if lowered in ('true', 'false'):
+                return Literal(lowered == 'true', pos)
+            if lowered == 'null':
+                return Literal(None, pos)
+            if self.peek()[:2] == ('op', '('):
+                self.take()
+                return Call(value, self.arguments(), pos)
+            raise ExpressionError(f"Unknown name {value!r}", self.text, pos)
+        found = 'end of expression' if kind == 'end' else repr(value)
+        raise ExpressionError(f"Unexpected {found}", self.text, pos)
+
+    def arguments(self):
+        args = []
+        if self.peek()[:2] == ('op', ')'):
+            self.take()
+            return args
+        while True:
+            args.append(self.binary(0))
+            kind, value, pos = self.take()
+            if kind == 'op' and value == ')':
+                return args
+            if kind != 'op' or value != ',':
+                raise ExpressionError("Expected ',' or ')' in argument list", self.text, pos)
+
+
+@lru_cache(maxsize=None)
+def parse(text):
+    """AST for an expression (cached by text); raises ExpressionError"""
+    return Parser(text).parse()
+
+
+def walk(node):
+    """Every node of a tree, parents before children"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(reversed(current.children()))
+
+
+def refs(node):
+    return [n for n in walk(node) if isinstance(n, Ref)]
+
+
+def calls(node):
+    return [n for n in walk(node) if isinstance(n, Call)]
+
+
+def compared_literals(node):
+    """(Ref, value) for each 'ref <op> literal' comparison, e.g. #{result} == 'Positive'"""
+    found = []
+    for current in walk(node):
+        if isinstance(current, Binary) and current.op in COMPARISONS:
+            if isinstance(current.left, Ref) and isinstance(current.right, Literal):
+                found.append((current.left, current.right.value))
+            elif isinstance(current.right, Ref) and isinstance(current.left, Literal):
+                found.append((current.right, current.left.value))
+    return found
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Single-pass fix engine for metadata files.
+
+Fixes register as visitors for a file pattern and a metadata type. The
+pipeline groups visitors by file, parses each file once, runs every
+matching visitor over each object in one traversal, and writes the file
+back at most once (only if something changed).
+
+    pipeline = FixPipeline(BASE_DIR)
+
+    @pipeline.fix("Users/User.json", 'users')
+    def remove_user_avatars(user, ctx):
+        return user.pop('avatar', None) is not None
+"""
+import json
+from collections import defaultdict
+from pathlib import Path
+
+
+class Fix:
+    """A registered visitor: func(obj, ctx) -> True if it changed obj"""
+
+    def __init__(self, name, patterns, type_key, func, description):
+        self.name = name
+        self.patterns = patterns
+        self.type_key = type_key
+        self.func = func
+        self.description = description
+
+
+class FixPipeline:
+    def __init__(self, base_dir):
+        self.base_dir = Path(base_dir)
+        self.fixes = []
+        self.skipped = []
+
+    def fix(self, patterns, type_key, description=None):
+        """Decorator registering func(obj, ctx) for objects of type_key in matching files.
+
+        ``patterns`` is a glob (or list of globs) relative to base_dir. ``ctx``
+        is a dict shared by one fix across a single file, for state such as
+        codes already seen.
+        """
+        if isinstance(patterns, str):
+            patterns = [patterns]
+
+        def register(func):
+            doc = (func.__doc__ or "").strip().splitlines()
+            self.fixes.append(Fix(func.__name__, patterns, type_key, func,
+                                  description or (doc[0] if doc else func.__name__)))
+            return func
+        return register
+
+    def plan(self, only=None):
+        """Map file path -> fixes that apply to it"""
+        by_file = defaultdict(list)
+        for fix in self.fixes:
+            if only and fix.name not in only:
+                continue
+            for pattern in fix.patterns:
+                for path in sorted(self.base_dir.glob(pattern)):
+                    if fix not in by_file[path]:
+                        by_file[path].append(fix)
+        return by_file
+
+    def run(self, only=None, dry_run=False):
+        """Apply all fixes; returns {fix name: objects changed}"""
+        changed_by_fix = {fix.name: 0 for fix in self.fixes if not only or fix.name in only}
+        files_written = 0
+        self.skipped = []
+        plan = self.plan(only)
+        for path, fixes in sorted(plan.items()):
+            rel_path = path.relative_to(self.base_dir)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except ValueError as e:
+                # Never rewrite a file we could not parse completely
+                print(f"  ❌ Skipping {rel_path}: invalid JSON ({e})")
+                self.skipped.append(rel_path)
+                continue
+
+            by_type = defaultdict(list)
+            for fix in fixes:
+                by_type[fix.type_key].append(fix)
+            contexts = {fix.name: {'path': path} for fix in fixes}
+
+            file_changes = defaultdict(int)
+            for type_key, type_fixes in by_type.items():
+                for obj in data.get(type_key, []):
+                    for fix in type_fixes:
+                        if fix.func(obj, contexts[fix.name]):
+                            file_changes[fix.name] += 1
+
+            if not file_changes:
+                continue
+            for name, count in file_changes.items():
+                changed_by_fix[name] += count
+            summary = ", ".join(f"{name} ({count})" for name, count in file_changes.items())
+            if dry_run:
+                print(f"  - Would fix {rel_path}: {summary}")
+                continue
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=True)
+                f.write('\n')
+            files_written += 1
+            print(f"  - Fixed {rel_path}: {summary}")
+
+        print(f"✅ {len(plan)} files read once, {files_written} written, {len(self.skipped)} skipped")
+        return changed_by_fix
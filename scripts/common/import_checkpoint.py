@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Checkpoints for resumable imports.
+
+Every file or chunk the server acknowledges is recorded straight away in
+artifacts/import_checkpoint.json, keyed by target server and file, with
+content hashes: a SHA-256 of the file, and a digest of each chunk's
+compact JSON. With --resume, a file whose hash still matches is skipped
+when it was completed, and its completed chunks are skipped when it was
+not. A file that changed since the checkpoint is imported from scratch.
+The checkpoint is removed once a run finishes without failures.
+"""
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+CHECKPOINT_PATH = BASE_DIR / "artifacts" / "import_checkpoint.json"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def checkpoint_key(path):
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        return str(path)
+
+
+class Checkpoint:
+    """Completed files and chunks of an interrupted import, per target server"""
+
+    def __init__(self, target, path=CHECKPOINT_PATH, resume=True):
+        self.path = Path(path)
+        self.target = target
+        self.data = {'targets': {}}
+        if resume and self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                self.data = json.load(f)
+        self.files = self.data['targets'].setdefault(target, {})
+        if not resume:
+            self.files.clear()
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def _sha(self, path):
+        key = checkpoint_key(path)
+        if key not in self._hashes:
+            self._hashes[key] = file_sha256(path)
+        return self._hashes[key]
+
+    def _entry(self, path):
+        """The file's entry, reset when the file changed since it was recorded"""
+        key = checkpoint_key(path)
+        sha = self._sha(path)
+        entry = self.files.get(key)
+        if entry is None or entry.get('sha256') != sha:
+            entry = self.files[key] = {'sha256': sha, 'complete': False, 'chunks': []}
+        return entry
+
+    def file_done(self, path):
+        with self._lock:
+            entry = self.files.get(checkpoint_key(path))
+            return bool(entry and entry.get('complete') and entry.get('sha256') == self._sha(path))
+
+    def chunk_done(self, path, digest):
+        with self._lock:
+            return digest in self._entry(path)['chunks']
+
+    def mark_chunk(self, path, digest):
+        with self._lock:
+            entry = self._entry(path)
+            if digest not in entry['chunks']:
+                entry['chunks'].append(digest)
+            self._save()
+
+    def mark_file(self, path):
+        with self._lock:
+            entry = self._entry(path)
+            entry['complete'] = True
+            entry['chunks'] = []
+            self._save()
+
+    def clear(self):
+        """Forget this target's progress (after a run without failures)"""
+        with self._lock:
+            self.files.clear()
+            self.data['targets'].pop(self.target, None)
+            if self.data['targets']:
+                self._save()
+            elif self.path.exists():
+                self.path.unlink()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=True)
+            f.write('\n')
+        tmp_path.replace(self.path)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Dependency-ordered import planning.
+
+Every metadata file in the tree is scanned once. Each object's own id is
+recorded against its file, and every {"id": ...} reference nested inside it
+is collected. A reference to an id defined in another file becomes an edge
+"this file depends on that file". The file graph is then:
+
+- condensed into strongly connected components: files that reference each
+  other (programs <-> program stages, users <-> user groups) must go out as
+  one merged payload, because DHIS2 only resolves such cycles within a
+  single import;
+- layered topologically into waves: every unit in a wave depends only on
+  earlier waves, so the units of one wave can be imported in parallel;
+- split into weakly connected groups: independent subgraphs that share no
+  references at all.
+
+A UID defined differently in several files chains those files in file
+order, so they never share a wave and the last file's copy is the one left
+on the server.
+References to ids that are not defined anywhere in the tree (objects that
+already exist on the server) add no edges. References within one file
+(organisation unit parents) are left to the importer; see HIERARCHICAL in
+common/chunked_import.py.
+
+    plan = build_plan()
+    for wave in plan.waves:
+        ...  # each unit is a list of files to import as one payload
+"""
+import json
+from pathlib import Path
+
+from common.chunked_import import METADATA_ORDER
+from common.delta_import import object_hash
+from common.metadata_stream import file_layout, iter_objects
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+PLAN_PATH = BASE_DIR / "artifacts" / "import_plan.json"
+# Top-level directories that do not hold importable metadata
+SKIP_DIRS = {'.git', 'archive', 'artifacts', 'docs', 'logs', 'scripts', 'cache', '__pycache__'}
+# Fields whose references never constrain import order (ownership, sharing, audit)
+IGNORED_FIELDS = {'createdBy', 'lastUpdatedBy', 'user', 'sharing', 'userAccesses',
+                  'userGroupAccesses', 'translations', 'access', 'favorites'}
+TYPE_RANK = {key: i for i, key in enumerate(METADATA_ORDER)}
+
+
+def metadata_files(base_dir=BASE_DIR):
+    """JSON files in the metadata directories (one level below base_dir, and deeper)"""
+    base_dir = Path(base_dir)
+    files = []
+    for directory in sorted(p for p in base_dir.iterdir() if p.is_dir()):
+        if directory.name in SKIP_DIRS or directory.name.startswith('.'):
+            continue
+        files.extend(sorted(directory.rglob('*.json')))
+    return files
+
+
+def collect_refs(value, refs):
+    """Add the ids of nested {"id": ...} references in value to refs"""
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            ref = value.get('id')
+            if isinstance(ref, str):
+                refs.add(ref)
+            stack.extend(child for key, child in value.items()
+                         if key not in IGNORED_FIELDS and isinstance(child, (dict, list)))
+        elif isinstance(value, list):
+            stack.extend(child for child in value if isinstance(child, (dict, list)))
+
+
+class FileScan:
+    """Ids defined (with their content hashes) and referenced by one metadata file"""
+
+    def __init__(self, path, types, defined, refs):
+        self.path = path
+        self.types = types
+        self.defined = defined
+        self.refs = refs
+
+    @property
+    def rank(self):
+        """Position of the file's earliest type in METADATA_ORDER"""
+        return min(TYPE_RANK[t] for t in self.types)
+
+
+def scan_file(path):
+    """FileScan for a file, or None when it has no importable metadata arrays"""
+    types = [key for key, is_array, _ in file_layout(path) if is_array and key in TYPE_RANK]
+    types = list(dict.fromkeys(types))
+    if not types:
+        return None
+    defined, refs = {}, set()
+    for type_key in types:
+        for obj in iter_objects(path, type_key):
+            if not isinstance(obj, dict):
+                continue
+            uid = obj.get('id')
+            if isinstance(uid, str):
+                defined[uid] = object_hash(obj)
+            for key, child in obj.items():
+                if key not in IGNORED_FIELDS and isinstance(child, (dict, list)):
+                    collect_refs(child, refs)
+    return FileScan(path, types, defined, refs - defined.keys())
+
+
+def strongly_connected(nodes, edges):
+    """Tarjan's algorithm (iterative); components come out dependencies-first"""
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+    for root in nodes:
+        if root in index:
+            continue
+        work = [(root, iter(sorted(edges[root])))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(sorted(edges[child]))))
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
+class ImportPlan:
+    """Import waves built from the cross-file reference graph"""
+
+    def __init__(self, scans, skipped, base_dir=BASE_DIR):
+        self.base_dir = Path(base_dir)
+        self.scans = {scan.path: scan for scan in scans}
+        self.skipped = skipped
+        owners = {}
+        for scan in scans:
+            for uid in scan.defined:
+                owners.setdefault(uid, set()).add(scan.path)
+        self.depends_on = {}
+        for scan in scans:
+            deps = set()
+            for uid in scan.refs:
+                deps.update(owners.get(uid, ()))
+            deps.discard(scan.path)
+            self.depends_on[scan.path] = deps
+        # Files defining the same UID differently go out one after another, in
+        # file order, so the last file's copy ends up on the server (as in a
+        # sequential import); identical copies need no order
+        self.shared = {}
+        for uid, paths in owners.items():
+            if len(paths) > 1 and len({self.scans[p].defined[uid] for p in paths}) > 1:
+                ordered = sorted(paths, key=self._sort_key)
+                for earlier, later in zip(ordered, ordered[1:]):
+                    self.depends_on[later].add(earlier)
+                self.shared[uid] = ordered
+
+        order = sorted(self.scans, key=self._sort_key)
+        self.units = [sorted(c, key=self._sort_key)
+                      for c in strongly_connected(order, self.depends_on)]
+        self.waves = self._layer()
+        self.groups = self._groups()
+
+    def _sort_key(self, path):
+        return self.scans[path].rank, str(path)
+
+    def _layer(self):
+        """Longest-path layering of the condensed graph: wave n depends only on waves < n"""
+        unit_index = {path: i for i, unit in enumerate(self.units) for path in unit}
+        deps = [set() for _ in self.units]
+        for i, unit in enumerate(self.units):
+            for path in unit:
+                deps[i].update(unit_index[d] for d in self.depends_on[path])
+            deps[i].discard(i)
+        level = {}
+        # Tarjan emits components dependencies-first, so one pass suffices
+        for i in range(len(self.units)):
+            level[i] = 1 + max((level[d] for d in deps[i]), default=-1)
+        waves = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for i, unit in enumerate(self.units):
+            waves[level[i]].append(unit)
+        for wave in waves:
+            wave.sort(key=lambda unit: self._sort_key(unit[0]))
+        return waves
+
+    def _groups(self):
+        """Weakly connected groups of files (independent subgraphs)"""
+        parent = {path: path for path in self.scans}
+
+        def find(path):
+            while parent[path] != path:
+                parent[path] = parent[parent[path]]
+                path = parent[path]
+            return path
+
+        for path, deps in self.depends_on.items():
+            for dep in deps:
+                parent[find(path)] = find(dep)
+        groups = {}
+        for path in sorted(self.scans, key=self._sort_key):
+            groups.setdefault(find(path), []).append(path)
+        return sorted(groups.values(), key=len, reverse=True)
+
+    def relative(self, path):
+        try:
+            return str(Path(path).relative_to(self.base_dir))
+        except ValueError:
+            return str(path)
+
+    def as_dict(self):
+        rel = self.relative
+        return {
+            'waves': [[[rel(p) for p in unit] for unit in wave] for wave in self.waves],
+            'groups': [[rel(p) for p in group] for group in self.groups],
+            'dependsOn': {rel(p): sorted(rel(d) for d in deps)
+                          for p, deps in sorted(self.depends_on.items()) if deps},
+            'types': {rel(p): scan.types for p, scan in sorted(self.scans.items())},
+            'sharedDefinitions': {uid: [rel(p) for p in paths] for uid, paths in sorted(self.shared.items())},
+            'skipped': {rel(p): reason for p, reason in sorted(self.skipped.items())},
+        }
+
+    def save(self, path=PLAN_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2, ensure_ascii=True)
+            f.write('\n')
+        return path
+
+
+def build_plan(paths=None, base_dir=BASE_DIR):
+    """Scan files (default: every metadata file in the tree) and plan their import"""
+    scans, skipped = [], {}
+    for path in paths if paths is not None else metadata_files(base_dir):
+        path = Path(path)
+        try:
+            scan = scan_file(path)
+        except Exception as e:
+            skipped[path] = f"unreadable: {str(e)[:100]}"
+            continue
+        if scan is None:
+            skipped[path] = "no importable metadata arrays"
+        else:
+            scans.append(scan)
+    return ImportPlan(scans, skipped, base_dir)
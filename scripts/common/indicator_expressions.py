@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Compiled program indicator expressions and filters, with reference checks.
+
+compile_expression() parses an expression/filter (common/expression_parser.py)
+once per distinct text, keyed by its SHA-1, and keeps the references and
+function calls it uses, including those inside d2:condition('...') and
+d2:countIfCondition(..., '...') strings. Cloned indicators share their
+expressions, so validating thousands of them parses each text only once.
+
+IndicatorValidator resolves every reference of an indicator against the
+metadata store (ReferenceIndex):
+
+    #{stage.de}       stage exists, belongs to the indicator's program, has the data element
+    A{attribute}      attribute exists and is one of the program's attributes
+    V{variable}       a program indicator variable (event_date, tei_count, ...)
+    C{constant}       constant exists (when constants are available)
+    PS_EVENTDATE:stage, d2:/other functions and their argument counts
+
+    validator = IndicatorValidator(ReferenceIndex())   # tolerant store by default
+    for indicator in indicators:
+        for issue in validator.validate(indicator): ...
+
+A check is skipped, rather than failed, when the store has no file for
+that metadata type (e.g. no constants export).
+"""
+import hashlib
+
+from common.expression_parser import Call, ExpressionError, Literal, Ref, parse, walk
+from common.metadata_store import SOURCES, get_store, ref_id
+from common.program_rules import ARITY, arity_error
+
+# Program indicator variables (V{...})
+VARIABLES = {
+    'analytics_period_end', 'analytics_period_start', 'completed_date', 'creation_date',
+    'current_date', 'due_date', 'enrollment_count', 'enrollment_date', 'enrollment_status',
+    'event_count', 'event_date', 'event_status', 'execution_date', 'incident_date',
+    'org_unit_count', 'program_stage_id', 'program_stage_name', 'reporting_period_end',
+    'reporting_period_start', 'scheduled_date', 'sync_date', 'tei_count', 'value_count',
+    'zero_pos_value_count',
+}
+# Functions the program rule engine also has, with the same argument counts
+SHARED_FUNCTIONS = (
+    'd2:addDays', 'd2:ceil', 'd2:concatenate', 'd2:condition', 'd2:count', 'd2:countIfValue',
+    'd2:daysBetween', 'd2:floor', 'd2:hasValue', 'd2:left', 'd2:length', 'd2:modulus',
+    'd2:monthsBetween', 'd2:oizp', 'd2:right', 'd2:round', 'd2:split', 'd2:substring',
+    'd2:validatePattern', 'd2:weeksBetween', 'd2:yearsBetween', 'd2:zing', 'd2:zpvc',
+)
+# Functions: (min args, max args or None for any)
+FUNCTIONS = {
+    'd2:countIfCondition': (2, 2), 'd2:hasUserRole': (1, None), 'd2:inOrgUnitGroup': (1, None),
+    'd2:lastEventDate': (1, 1), 'd2:maxValue': (1, 1), 'd2:minValue': (1, 1),
+    'd2:minutesBetween': (2, 2), 'd2:relationshipCount': (0, 1),
+    'd2:zScoreHFA': (3, 3), 'd2:zScoreWFA': (3, 3), 'd2:zScoreWFH': (3, 3),
+    'if': (3, 3), 'isNull': (1, 1), 'isNotNull': (1, 1), 'firstNonNull': (1, None),
+    'greatest': (1, None), 'least': (1, None), 'log': (1, 2), 'log10': (1, 1),
+    **{name: ARITY[name] for name in SHARED_FUNCTIONS},
+}
+# Functions whose first argument must be a data element / attribute reference
+REFERENCE_ARGUMENT = {'d2:hasValue', 'd2:count', 'd2:countIfValue', 'd2:countIfCondition',
+                      'd2:maxValue', 'd2:minValue', 'd2:lastEventDate', 'd2:zpvc',
+                      'isNull', 'isNotNull'}
+# Functions with a quoted condition argument: name -> argument index
+CONDITION_ARGUMENT = {'d2:condition': 0, 'd2:countIfCondition': 1}
+
+# Files read for each metadata type, after the store's own SOURCES file; all that exist are merged
+EXTRA_SOURCES = {
+    'programIndicators': ["artifacts/bundles/programs_bundle_cancer.json"],
+    'programs': ["Program/Program_*.json", "artifacts/bundles/programs_bundle_cancer.json"],
+    'programStages': ["artifacts/bundles/programs_bundle_cancer.json"],
+    'trackedEntityAttributes': ["Tracked Entity/Tracked Entity Attribute.json"],
+    'constants': [],
+}
+
+_COMPILED = {}
+
+
+class CompiledExpression:
+    """An expression's tree and the references/calls it uses (nested conditions included)"""
+    __slots__ = ('digest', 'text', 'tree', 'error', 'refs', 'calls')
+
+    def __init__(self, digest, text):
+        self.digest = digest
+        self.text = text
+        self.tree = None
+        self.error = None
+        self.refs = []       # Ref nodes
+        self.calls = []      # Call nodes
+        try:
+            self.tree = parse(text)
+        except ExpressionError as e:
+            self.error = str(e)
+            return
+        for node in walk(self.tree):
+            if isinstance(node, Ref):
+                self.refs.append(node)
+            elif isinstance(node, Call):
+                self.calls.append(node)
+                index = CONDITION_ARGUMENT.get(node.name)
+                if index is not None and index < len(node.args) and isinstance(node.args[index], Literal) \
+                        and isinstance(node.args[index].value, str):
+                    inner = compile_expression(node.args[index].value)
+                    if inner.error:
+                        self.error = f"in {node.name} condition: {inner.error}"
+                    self.refs.extend(inner.refs)
+                    self.calls.extend(inner.calls)
+
+
+def expression_digest(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def compile_expression(text):
+    """CompiledExpression for a text, cached by its SHA-1"""
+    digest = expression_digest(text)
+    compiled = _COMPILED.get(digest)
+    if compiled is None:
+        compiled = _COMPILED[digest] = CompiledExpression(digest, text)
+    return compiled
+
+
+class ReferenceIndex:
+    """UID indexes of what indicator expressions can refer to"""
+
+    def __init__(self, store=None):
+        # Tolerant: Data Element.json is damaged, and a strict store would stop at it
+        self.store = store or get_store(tolerant=True)
+        self.known = {}
+        programs = self._objects('programs')
+        stages = self._objects('programStages')
+        self.program_ids = {p.get('id') for p in programs}
+        self.stage_program = {}
+        self.stage_elements = {}
+        self.program_attributes = {}
+        for program in programs:
+            self.program_attributes.setdefault(program.get('id'), set()).update(
+                ref_id(item.get('trackedEntityAttribute'))
+                for item in program.get('programTrackedEntityAttributes') or [])
+            for stage in program.get('programStages') or []:
+                self.stage_program.setdefault(ref_id(stage), program.get('id'))
+        for stage in stages:
+            self.stage_program[stage.get('id')] = ref_id(stage.get('program'))
+            self.stage_elements[stage.get('id')] = {ref_id(item.get('dataElement'))
+                                                    for item in stage.get('programStageDataElements') or []}
+        self.data_elements = {de.get('id') for de in self._objects('dataElements')}
+        for elements in self.stage_elements.values():
+            self.data_elements |= elements
+        self.attributes = {a.get('id') for a in self._objects('trackedEntityAttributes')}
+        for attributes in self.program_attributes.values():
+            self.attributes |= attributes
+        self.constants = {c.get('id') for c in self._objects('constants')}
+
+    def _paths(self, type_key):
+        candidates = [SOURCES[type_key]] if type_key in SOURCES else []
+        for pattern in EXTRA_SOURCES.get(type_key, []):
+            if '*' in pattern:
+                candidates.extend(str(p.relative_to(self.store.base_dir))
+                                  for p in sorted(self.store.base_dir.glob(pattern)))
+            else:
+                candidates.append(pattern)
+        return [path for path in dict.fromkeys(candidates) if self.store.exists(path)]
+
+    def _objects(self, type_key):
+        """Objects of a type from every source file (first occurrence of a uid wins)"""
+        seen = {}
+        paths = self._paths(type_key)
+        for path in paths:
+            for obj in self.store.collection(type_key, path):
+                seen.setdefault(obj.get('id'), obj)
+        self.known[type_key] = bool(paths)
+        return list(seen.values())
+
+    def indicators(self):
+        return self._objects('programIndicators')
+
+
+def issue(severity, code, message, field=None):
+    return {'severity': severity, 'code': code, 'field': field, 'message': message}
+
+
+class IndicatorValidator:
+    """Checks indicator expressions/filters; results are cached per (expression, program)"""
+
+    FIELDS = ('expression', 'filter')
+
+    def __init__(self, index):
+        self.index = index
+        self._results = {}
+
+    def validate(self, indicator):
+        """Issues ({severity, code, field, message}) for one program indicator"""
+        program = ref_id(indicator.get('program'))
+        issues = []
+        for field in self.FIELDS:
+            text = indicator.get(field)
+            if not text or not text.strip():
+                continue
+            compiled = compile_expression(text)
+            key = (compiled.digest, program)
+            if key not in self._results:
+                self._results[key] = self._check(compiled, program)
+            issues.extend(dict(found, field=field) for found in self._results[key])
+        return issues
+
+    def _check(self, compiled, program):
+        if compiled.error and compiled.tree is None:
+            return [issue('error', 'SYNTAX', compiled.error)]
+        found = []
+        if compiled.error:
+            found.append(issue('error', 'SYNTAX', compiled.error))
+        for ref in compiled.refs:
+            problem = self._reference(ref, program)
+            if problem:
+                found.append(problem)
+        for call in compiled.calls:
+            problem = self._call(call)
+            if problem:
+                found.append(problem)
+        # One issue per distinct problem
+        return list({(f['code'], f['message']): f for f in found}.values())
+
+    def _reference(self, ref, program):
+        index = self.index
+        text = f"{ref.kind}{{{ref.name}}}"
+        if ref.kind == '#':
+            stage, _, element = ref.name.partition('.')
+            if not element:
+                return issue('error', 'STAGE_REQUIRED', f"{text} needs the form #{{programStage.dataElement}}")
+            if element not in index.data_elements and index.known.get('dataElements'):
+                return issue('error', 'UNKNOWN_DATA_ELEMENT', f"{text}: data element {element} not found")
+            if stage == '*':
+                return None
+            return self._stage(stage, program, text) or (
+                issue('error', 'DATA_ELEMENT_NOT_IN_STAGE', f"{text}: stage {stage} has no data element {element}")
+                if stage in index.stage_elements and element not in index.stage_elements[stage] else None)
+        if ref.kind == 'PS_EVENTDATE':
+            return self._stage(ref.name, program, f"PS_EVENTDATE:{ref.name}")
+        if ref.kind == 'A':
+            if ref.name not in index.attributes:
+                return issue('error', 'UNKNOWN_ATTRIBUTE', f"{text}: attribute not found")
+            attributes = index.program_attributes.get(program)
+            if attributes and ref.name not in attributes:
+                return issue('error', 'ATTRIBUTE_NOT_IN_PROGRAM',
+                             f"{text}: not an attribute of program {program}")
+            return None
+        if ref.kind == 'V':
+            if ref.name not in VARIABLES:
+                return issue('error', 'UNKNOWN_VARIABLE', f"{text}: no such program indicator variable")
+            return None
+        if ref.kind == 'C':
+            if index.known.get('constants') and ref.name not in index.constants:
+                return issue('error', 'UNKNOWN_CONSTANT', f"{text}: constant not found")
+            return None
+        return issue('error', 'UNSUPPORTED_REFERENCE', f"{text} cannot be used in a program indicator")
+
+    def _stage(self, stage, program, text):
+        owner = self.index.stage_program.get(stage)
+        if owner is None:
+            if self.index.stage_program:
+                return issue('error', 'UNKNOWN_STAGE', f"{text}: program stage {stage} not found")
+            return None
+        if program and owner != program:
+            return issue('error', 'STAGE_PROGRAM', f"{text}: stage {stage} belongs to program {owner}")
+        return None
+
+    def _call(self, call):
+        if call.name not in FUNCTIONS:
+            return issue('error', 'UNKNOWN_FUNCTION', f"{call.name} is not a program indicator function")
+        message = arity_error(call, FUNCTIONS)
+        if message:
+            return issue('error', 'ARGUMENT_COUNT', message)
+        if call.name in REFERENCE_ARGUMENT and call.args and not isinstance(call.args[0], Ref):
+            return issue('warning', 'REFERENCE_ARGUMENT',
+                         f"{call.name} expects a data element or attribute reference")
+        return None
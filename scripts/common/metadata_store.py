@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Shared in-memory metadata store for the audit scripts.
+
+Every metadata file is parsed at most once per process, and each metadata
+type keeps persistent UID, code and name indexes so lookups are O(1).
+"""
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from common.tolerant_json import load_tolerant
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+# Default file for each metadata type (relative to BASE_DIR)
+SOURCES = {
+    'programs': "Program/Program.json",
+    'programStages': "Program/Program Stage.json",
+    'programIndicators': "Program/Program Indicator.json",
+    'dataElements': "Data Element/Data Element.json",
+    'dashboards': "Dashboard/Dashboard.json",
+    'validationRules': "Validation/Validation Rule.json",
+    'programRules': "Program Rule/Program Rule.json",
+    'programRuleActions': "Program Rule/Program Rule Action.json",
+    'programRuleVariables': "Program Rule/Program Rule Variable.json",
+    'organisationUnits': "Organisation Unit/Organisation Unit.json",
+}
+
+
+def ref_id(ref):
+    """Return the id of a reference ({"id": ...} or a bare UID string)"""
+    if isinstance(ref, dict):
+        return ref.get('id')
+    return ref
+
+
+class MetadataCollection:
+    """All objects of one metadata type with UID/code/name indexes"""
+
+    def __init__(self, type_key, objects):
+        self.type_key = type_key
+        self.objects = objects
+        self.by_id = {}
+        self.by_code = {}
+        self.by_name = {}
+        self.duplicate_ids = []
+        self._groups = {}
+
+        for obj in objects:
+            uid = obj.get('id')
+            if uid is not None:
+                if uid in self.by_id:
+                    self.duplicate_ids.append(uid)
+                else:
+                    self.by_id[uid] = obj
+            code = obj.get('code')
+            if code is not None:
+                self.by_code.setdefault(code, obj)
+            name = obj.get('name')
+            if name is not None:
+                self.by_name.setdefault(name, obj)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    def __contains__(self, uid):
+        return uid in self.by_id
+
+    @property
+    def ids(self):
+        return self.by_id.keys()
+
+    def get(self, uid, default=None):
+        return self.by_id.get(uid, default)
+
+    def grouped_by(self, field):
+        """Map referenced id -> objects, e.g. grouped_by('program') for stages"""
+        if field not in self._groups:
+            groups = defaultdict(list)
+            for obj in self.objects:
+                groups[ref_id(obj.get(field))].append(obj)
+            self._groups[field] = dict(groups)
+        return self._groups[field]
+
+
+class MetadataStore:
+    """Parses metadata files once and hands out indexed collections"""
+
+    def __init__(self, base_dir=BASE_DIR, cache=None, tolerant=False):
+        self.base_dir = Path(base_dir)
+        self.cache = cache
+        # Salvage well-formed items from damaged files instead of raising
+        self.tolerant = tolerant
+        self.reports = {}
+        self._documents = {}
+        self._collections = {}
+
+    def path(self, rel_path):
+        return self.base_dir / rel_path
+
+    def exists(self, rel_path):
+        return self.path(rel_path).exists()
+
+    def document(self, rel_path):
+        """Parsed JSON document for a file, loaded on first use"""
+        rel_path = str(rel_path)
+        if rel_path not in self._documents:
+            try:
+                self._documents[rel_path] = self._parse(rel_path)
+            except ValueError:
+                if not self.tolerant:
+                    raise
+                doc, report = load_tolerant(self.path(rel_path))
+                print(f"⚠️  {rel_path} is damaged; salvaged well-formed items only")
+                for error in report.errors:
+                    print(f"   - skipped {error}")
+                self.reports[rel_path] = report
+                self._documents[rel_path] = doc
+        return self._documents[rel_path]
+
+    def _parse(self, rel_path):
+        if self.cache is not None:
+            return self.cache.load(self.path(rel_path))
+        with open(self.path(rel_path), encoding='utf-8') as f:
+            return json.load(f)
+
+    def collection(self, type_key, rel_path=None):
+        """Indexed collection for a metadata type (default file from SOURCES)"""
+        rel_path = str(rel_path or SOURCES[type_key])
+        key = (rel_path, type_key)
+        if key not in self._collections:
+            objects = self.document(rel_path).get(type_key, [])
+            self._collections[key] = MetadataCollection(type_key, objects)
+        return self._collections[key]
+
+    def __getitem__(self, type_key):
+        return self.collection(type_key)
+
+    def clear(self):
+        self._documents.clear()
+        self._collections.clear()
+
+
+_stores = {}
+
+
+def get_store(base_dir=BASE_DIR, cache=None, tolerant=None):
+    """Process-wide store, so every caller shares the same parsed files.
+
+    Passing a ParseCache attaches it, so documents are served from the
+    on-disk cache when unchanged; tolerant=True salvages damaged files.
+    """
+    key = Path(base_dir).resolve()
+    if key not in _stores:
+        _stores[key] = MetadataStore(key)
+    if cache is not None:
+        _stores[key].cache = cache
+    if tolerant is not None:
+        _stores[key].tolerant = tolerant
+    return _stores[key]
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Streaming readers and writers for large metadata files.
+
+iter_objects() yields the objects under any "<type>.item" path one at a
+time, so peak memory is one object rather than the whole document. It uses
+ijson when installed (same as comprehensive_fixes) and otherwise falls back
+to the chunked scanner in tolerant_json, which streams top-level arrays.
+"""
+import json
+from pathlib import Path
+
+from common.tolerant_json import iter_items, iter_layout
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def iter_objects(path, item_path):
+    """Yield objects at an ijson-style path, e.g. 'organisationUnits.item'.
+
+    A bare type key ('organisationUnits') is accepted as shorthand for
+    '<type>.item'. Nested paths ('programs.item.programStages.item') need
+    ijson; without it only top-level arrays can be streamed.
+    """
+    if not item_path.endswith('.item'):
+        item_path = f"{item_path}.item"
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            yield from ijson.items(f, item_path, use_float=True)
+        return
+    type_key = item_path[:-len('.item')]
+    if '.' in type_key:
+        raise RuntimeError(f"ijson is required to stream nested path {item_path!r} "
+                           "(pip install ijson)")
+    yield from iter_items(path, type_key)
+
+
+def file_layout(path):
+    """List of (key, is_array, value) for a file's top-level keys (arrays not decoded)"""
+    return list(iter_layout(path))
+
+
+def write_document(out_path, sections, indent=None):
+    """Write {key: value, ...} incrementally.
+
+    ``sections`` yields (key, value) pairs where value is either a plain JSON
+    value or an iterator of array items; items are written as they arrive.
+    With indent=None the output is compact (like the existing bundles).
+    """
+    counts = {}
+    if indent is None:
+        item_sep, key_sep, dump_kwargs = ",", ":", {'separators': (",", ":")}
+        open_pad = close_pad = item_pad = ""
+    else:
+        pad = " " * indent
+        item_sep, key_sep, dump_kwargs = ",", ": ", {'indent': indent}
+        open_pad, close_pad, item_pad = "\n" + pad, "\n", "\n" + pad * 2
+
+    out_path = Path(out_path)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write("{")
+        first_key = True
+        for key, value in sections:
+            f.write(("" if first_key else item_sep) + open_pad)
+            f.write(json.dumps(key) + key_sep)
+            first_key = False
+            if isinstance(value, (dict, str, int, float, bool)) or value is None:
+                text = json.dumps(value, **dump_kwargs)
+                if indent is not None:
+                    text = text.replace("\n", open_pad)
+                f.write(text)
+                continue
+            f.write("[")
+            count = 0
+            for item in value:
+                text = json.dumps(item, **dump_kwargs)
+                if indent is not None:
+                    text = text.replace("\n", item_pad)
+                f.write(("" if count == 0 else item_sep) + item_pad + text)
+                count += 1
+            f.write((open_pad if count and indent is not None else "") + "]")
+            counts[key] = counts.get(key, 0) + count
+        f.write(close_pad + "}")
+        if indent is not None:
+            f.write("\n")
+    tmp_path.replace(out_path)
+    return counts
+
+
+def merge_documents(paths, out_path):
+    """Concatenate the top-level arrays of several metadata files into one bundle.
+
+    Non-array values keep the first occurrence ("system" from the first file
+    that has one). Only one object is held in memory at a time.
+    """
+    key_order = []
+    array_sources = {}
+    values = {}
+    for path in paths:
+        for key, is_array, value in file_layout(path):
+            if key not in array_sources and key not in values:
+                key_order.append(key)
+            if is_array:
+                array_sources.setdefault(key, []).append(path)
+            else:
+                values.setdefault(key, value)
+
+    def sections():
+        if 'system' in values:
+            yield 'system', values['system']
+        for key in key_order:
+            if key == 'system':
+                continue
+            if key in array_sources:
+                yield key, (obj for path in array_sources[key] for obj in iter_objects(path, key))
+            else:
+                yield key, values[key]
+
+    return write_document(out_path, sections())
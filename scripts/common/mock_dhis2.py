@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the parts of the DHIS2 Web API the import scripts use.
+
+    /api/metadata                  POST  import report (CREATE_AND_UPDATE, CREATE,
+                                         UPDATE, DELETE; atomicMode ALL or NONE)
+    /api/resourceTables/rebuild    POST  job notification
+    /api/<type>                    POST  one object, or {"<type>": [...]} in bulk
+                                         (dataElementGroups, indicatorGroups, ...)
+    /api/<type>/<id>               GET (?fields=a,b), PUT, DELETE
+    /api/system/info               GET
+    /api/mock/stats                GET   request counters (for benchmarks)
+
+Objects live in memory (optionally seeded from metadata files), so imports
+report realistic created/updated counts and typeReports with error reports
+for invalid UIDs. Latency, random error injection and a request body size
+limit are configurable to exercise retries and chunking. Gzip request
+bodies are accepted unless disabled (then 415, like a server without
+request decompression).
+
+    python3 scripts/common/mock_dhis2.py --port 8085 --latency 0.05 --error-rate 0.02
+
+    with MockDHIS2Server(latency=0.01) as server:
+        client = DHIS2Client(server.url)
+"""
+import argparse
+import gzip
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+if __name__ == '__main__':
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.chunked_import import METADATA_ORDER
+from common.metadata_stream import file_layout, iter_objects
+from common.uid_allocator import UidAllocator, is_valid_uid
+
+TYPE_KEYS = set(METADATA_ORDER)
+# Java class names DHIS2 puts in typeReports, derived from the type key
+KLASS_PREFIX = "org.hisp.dhis."
+OBJECT_PATH_RE = re.compile(r'^/api/(\w+)(?:/([^/]+))?/?$')
+# Server-side ids: unique within the mock, without scanning the tree
+_uids = UidAllocator(existing=(), reservations_path=None)
+
+
+def klass(type_key):
+    name = type_key[:-1] if type_key.endswith('s') else type_key
+    if type_key.endswith('ies'):
+        name = type_key[:-3] + 'y'
+    return KLASS_PREFIX + name[0].upper() + name[1:]
+
+
+def web_message(status_code, status="OK", message=None, response=None):
+    """DHIS2 WebMessage envelope"""
+    body = {'httpStatus': 'OK' if status_code < 300 else 'Conflict' if status_code == 409 else 'Error',
+            'httpStatusCode': status_code, 'status': status}
+    if status_code == 201:
+        body['httpStatus'] = 'Created'
+    if message:
+        body['message'] = message
+    if response is not None:
+        body['response'] = response
+    return body
+
+
+class MockStore:
+    """In-memory metadata objects by type and UID"""
+
+    def __init__(self):
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def load(self, path):
+        for key, is_array, _ in file_layout(path):
+            if is_array and key in TYPE_KEYS:
+                for obj in iter_objects(path, key):
+                    if isinstance(obj, dict) and obj.get('id'):
+                        self.objects.setdefault(key, {})[obj['id']] = obj
+
+    def import_metadata(self, document, strategy='CREATE_AND_UPDATE', atomic='NONE'):
+        """Apply a metadata document; returns (http status, import report)"""
+        totals = {'created': 0, 'updated': 0, 'deleted': 0, 'ignored': 0, 'total': 0}
+        type_reports = []
+        changes = []
+        with self.lock:
+            for type_key, objects in document.items():
+                if type_key not in TYPE_KEYS or not isinstance(objects, list):
+                    continue
+                existing = self.objects.get(type_key, {})
+                stats = {'created': 0, 'updated': 0, 'deleted': 0, 'ignored': 0, 'total': 0}
+                object_reports = []
+                for index, obj in enumerate(objects):
+                    uid = obj.get('id') if isinstance(obj, dict) else None
+                    error = None
+                    if not isinstance(obj, dict):
+                        error = ('E5002', "Object is not a JSON object")
+                    elif uid is not None and not is_valid_uid(uid):
+                        error = ('E4014', f"Invalid UID `{uid}` for property `{type_key}`")
+                    elif strategy == 'CREATE' and uid in existing:
+                        error = ('E5003', f"Property `id` with value `{uid}` on object {uid} already exists")
+                    elif strategy in ('UPDATE', 'DELETE') and uid not in existing:
+                        error = ('E5001', f"No matching object for reference `{uid}`")
+                    if error is not None:
+                        stats['ignored'] += 1
+                        object_reports.append({
+                            'klass': klass(type_key), 'index': index, 'uid': uid,
+                            'errorReports': [{'message': error[1], 'mainKlass': klass(type_key),
+                                              'errorCode': error[0], 'mainId': uid,
+                                              'errorProperty': 'id'}],
+                        })
+                        continue
+                    if strategy == 'DELETE':
+                        stats['deleted'] += 1
+                        changes.append(('delete', type_key, uid, None))
+                        continue
+                    if uid is None:
+                        obj = dict(obj, id=_uids.allocate())
+                        uid = obj['id']
+                    stats['updated' if uid in existing else 'created'] += 1
+                    changes.append(('put', type_key, uid, obj))
+                stats['total'] = sum(v for k, v in stats.items() if k != 'total')
+                for key, value in stats.items():
+                    totals[key] += value
+                type_reports.append({'klass': klass(type_key), 'stats': stats,
+                                     'objectReports': object_reports})
+
+            failed = totals['ignored'] > 0
+            if failed and atomic == 'ALL':
+                # Nothing is committed when any object fails in atomic mode
+                for key in ('created', 'updated', 'deleted'):
+                    totals[key] = 0
+                totals['ignored'] = totals['total']
+                changes = []
+            for action, type_key, uid, obj in changes:
+                if action == 'delete':
+                    self.objects.get(type_key, {}).pop(uid, None)
+                else:
+                    self.objects.setdefault(type_key, {})[uid] = obj
+
+        status = 'ERROR' if failed and (atomic == 'ALL' or not changes) else 'WARNING' if failed else 'OK'
+        report = {'responseType': 'ImportReport', 'status': status, 'stats': totals,
+                  'typeReports': type_reports}
+        code = 409 if status == 'ERROR' else 200
+        return code, web_message(code, status, None if code == 200 else "One or more errors occurred",
+                                 report)
+
+
+class MockConfig:
+    """Behaviour knobs shared by all handler threads"""
+
+    def __init__(self, latency=0.0, latency_per_kb=0.0, jitter=0.0, error_rate=0.0,
+                 error_status=503, max_body_bytes=None, gzip=True, seed=None):
+        self.latency = latency
+        self.latency_per_kb = latency_per_kb
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_body_bytes = max_body_bytes
+        self.gzip = gzip
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'bytesReceived': 0, 'bytesDecoded': 0, 'injectedErrors': 0,
+                      'rejectedTooLarge': 0, 'byEndpoint': {}}
+
+    def draw(self):
+        """(jitter factor, inject error?) for one request"""
+        with self.lock:
+            return self.random.uniform(-1, 1), self.random.random() < self.error_rate
+
+    def count(self, endpoint, received, decoded):
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['bytesReceived'] += received
+            self.stats['bytesDecoded'] += decoded
+            by_endpoint = self.stats['byEndpoint']
+            by_endpoint[endpoint] = by_endpoint.get(endpoint, 0) + 1
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockDHIS2/2.40"
+    # Headers and body go out in separate writes; without this Nagle adds ~40 ms per response
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        if self.server.verbose:
+            super().log_message(*args)
+
+    def send_json(self, code, body):
+        data = json.dumps(body, separators=(',', ':')).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json;charset=UTF-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self):
+        """(parsed body or None, error response or None)"""
+        config = self.server.config
+        raw = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        decoded = raw
+        if self.headers.get('Content-Encoding', '').lower() == 'gzip':
+            if not config.gzip:
+                return None, (415, web_message(415, 'ERROR', "Content-Encoding gzip is not supported"))
+            try:
+                decoded = gzip.decompress(raw)
+            except OSError:
+                return None, (400, web_message(400, 'ERROR', "Invalid gzip body"))
+        config.count(self.endpoint, len(raw), len(decoded))
+        if config.max_body_bytes is not None and len(decoded) > config.max_body_bytes:
+            with config.lock:
+                config.stats['rejectedTooLarge'] += 1
+            return None, (413, web_message(413, 'ERROR', "Request entity too large"))
+        if not decoded:
+            return None, None
+        try:
+            return json.loads(decoded), None
+        except ValueError as e:
+            return None, (400, web_message(400, 'ERROR', f"JSON parse error: {e}"))
+
+    def simulate(self, size):
+        """Sleep for the configured latency; returns an injected error response or None"""
+        config = self.server.config
+        factor, inject = config.draw()
+        delay = config.latency + config.latency_per_kb * size / 1024 + config.jitter * factor
+        if delay > 0:
+            time.sleep(delay)
+        if inject:
+            with config.lock:
+                config.stats['injectedErrors'] += 1
+            return config.error_status, web_message(config.error_status, 'ERROR', "Injected failure")
+        return None
+
+    def handle_method(self, method):
+        url = urlsplit(self.path)
+        self.endpoint = url.path
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        body, error = (None, None)
+        if method in ('POST', 'PUT'):
+            body, error = self.read_body()
+        else:
+            self.server.config.count(self.endpoint, 0, 0)
+        if error is None:
+            error = self.simulate(int(self.headers.get('Content-Length') or 0))
+        if error is not None:
+            return self.send_json(*error)
+        self.send_json(*self.route(method, url.path, body))
+
+    def do_GET(self):
+        self.handle_method('GET')
+
+    def do_POST(self):
+        self.handle_method('POST')
+
+    def do_PUT(self):
+        self.handle_method('PUT')
+
+    def do_DELETE(self):
+        self.handle_method('DELETE')
+
+    def route(self, method, path, body):
+        store = self.server.store
+        if path == '/api/metadata' and method == 'POST':
+            if not isinstance(body, dict):
+                return 400, web_message(400, 'ERROR', "Expected a metadata document")
+            return store.import_metadata(body, self.query.get('importStrategy', 'CREATE_AND_UPDATE'),
+                                         self.query.get('atomicMode', 'ALL'))
+        if path == '/api/resourceTables/rebuild' and method == 'POST':
+            return 200, web_message(200, 'OK', "Initiated RESOURCE_TABLE",
+                                    {'jobType': 'RESOURCE_TABLE', 'id': _uids.allocate()})
+        if path == '/api/system/info' and method == 'GET':
+            return 200, {'version': '2.40.5', 'serverDate': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                         'contextPath': self.server.url}
+        if path == '/api/mock/stats' and method == 'GET':
+            with self.server.config.lock:
+                return 200, json.loads(json.dumps(self.server.config.stats))
+
+        match = OBJECT_PATH_RE.match(path)
+        if match is None or match.group(1) not in TYPE_KEYS:
+            return 404, web_message(404, 'ERROR', f"Not found: {path}")
+        type_key, uid = match.groups()
+        if uid is None:
+            if method != 'POST' or not isinstance(body, dict):
+                return 405, web_message(405, 'ERROR', f"{method} not supported on {path}")
+            if isinstance(body.get(type_key), list):
+                # Bulk form used by import_cancer_groups.py
+                code, message = store.import_metadata({type_key: body[type_key]}, 'CREATE_AND_UPDATE')
+                report = message['response']
+                message['response'] = dict(report['stats'], typeReports=report['typeReports'],
+                                           errorReports=[e for t in report['typeReports']
+                                                         for o in t['objectReports']
+                                                         for e in o['errorReports']])
+                return code, message
+            body = dict(body, id=body.get('id') or _uids.allocate())
+            code, message = store.import_metadata({type_key: [body]}, 'CREATE')
+            if code != 200:
+                return code, message
+            return 201, web_message(201, 'OK', None, {'responseType': 'ObjectReport',
+                                                       'klass': klass(type_key), 'uid': body['id']})
+
+        if method == 'GET':
+            with store.lock:
+                obj = store.objects.get(type_key, {}).get(uid)
+            if obj is None:
+                return 404, web_message(404, 'ERROR', f"{type_key[:-1]} with id {uid} could not be found.")
+            fields = self.query.get('fields')
+            if fields and fields not in ('*', ':all'):
+                wanted = {f.split('[')[0] for f in fields.split(',')}
+                obj = {k: v for k, v in obj.items() if k in wanted}
+            return 200, obj
+        if method == 'PUT':
+            if not isinstance(body, dict):
+                return 400, web_message(400, 'ERROR', "Expected an object")
+            code, message = store.import_metadata({type_key: [dict(body, id=uid)]}, 'UPDATE')
+            if code == 200:
+                message['response'] = {'responseType': 'ObjectReport', 'klass': klass(type_key), 'uid': uid}
+            return code, message
+        if method == 'DELETE':
+            code, message = store.import_metadata({type_key: [{'id': uid}]}, 'DELETE')
+            return (200 if code == 200 else 404), message
+        return 405, web_message(405, 'ERROR', f"{method} not supported on {path}")
+
+
+class MockDHIS2Server:
+    """Threaded mock server; use as a context manager or call start()/stop()"""
+
+    def __init__(self, host='127.0.0.1', port=0, seed_files=(), verbose=False, **config):
+        self.httpd = ThreadingHTTPServer((host, port), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = MockConfig(**config)
+        self.httpd.store = MockStore()
+        self.httpd.verbose = verbose
+        self.httpd.url = f"http://{host}:{self.httpd.server_address[1]}"
+        for path in seed_files:
+            self.httpd.store.load(path)
+        self._thread = None
+
+    @property
+    def url(self):
+        return self.httpd.url
+
+    @property
+    def store(self):
+        return self.httpd.store
+
+    @property
+    def stats(self):
+        return self.httpd.config.stats
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local mock DHIS2 server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8085)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument('--latency-per-kb', type=float, default=0.0,
+                        help="seconds added per KB of request body")
+    parser.add_argument('--jitter', type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="fraction of requests answered with --error-status")
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--max-body-mb', type=float, help="answer 413 to larger request bodies")
+    parser.add_argument('--no-gzip', action='store_true', help="refuse gzip request bodies (415)")
+    parser.add_argument('--seed-random', type=int, help="seed for jitter and error injection")
+    parser.add_argument('--load', action='append', type=Path, default=[], metavar='FILE',
+                        help="preload metadata objects from FILE (repeatable)")
+    parser.add_argument('--verbose', '-v', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    server = MockDHIS2Server(
+        args.host, args.port, seed_files=args.load, verbose=args.verbose,
+        latency=args.latency, latency_per_kb=args.latency_per_kb, jitter=args.jitter,
+        error_rate=args.error_rate, error_status=args.error_status,
+        max_body_bytes=int(args.max_body_mb * 1024 * 1024) if args.max_body_mb else None,
+        gzip=not args.no_gzip, seed=args.seed_random)
+    loaded = sum(len(v) for v in server.store.objects.values())
+    print(f"🧪 Mock DHIS2 listening on {server.url} ({loaded} objects preloaded)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"📊 {server.stats['requests']} requests, {server.stats['bytesReceived'] / 1024:.0f} KB received")
+
+
+if __name__ == '__main__':
+    main()
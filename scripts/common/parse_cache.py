@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Persistent parse cache for metadata JSON files.
+
+Entries are keyed by path and checked against mtime/size first, then by
+SHA-256 of the content, so unchanged files are neither re-read nor
+re-validated. Parsed documents are kept as pickle blobs under
+artifacts/cache/ and evicted least-recently-used once the cache grows
+past its size budget.
+"""
+import hashlib
+import json
+import os
+import pickle
+import time
+from pathlib import Path
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+CACHE_DIR = BASE_DIR / "artifacts" / "cache"
+INDEX_NAME = "parse_cache.json"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Files above this size are syntax-checked with ijson (when installed)
+# instead of being decoded into memory in one go
+STREAM_THRESHOLD = 4 * 1024 * 1024
+
+
+class ParseCache:
+    """mtime/hash keyed cache of validation results and parsed documents"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, base_dir=BASE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.base_dir = Path(base_dir)
+        self.index_path = self.cache_dir / INDEX_NAME
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self.entries = {}
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, encoding='utf-8') as f:
+                    self.entries = json.load(f).get('entries', {})
+            except (ValueError, OSError):
+                # A damaged index only costs us a cold run
+                self.entries = {}
+
+    def _key(self, path):
+        path = Path(path)
+        try:
+            return str(path.resolve().relative_to(self.base_dir))
+        except ValueError:
+            return str(path.resolve())
+
+    def _blob_path(self, digest):
+        return self.cache_dir / f"{digest}.pickle"
+
+    def lookup(self, path):
+        """Cached entry if the file is unchanged on disk (no read needed)"""
+        entry = self.entries.get(self._key(path))
+        if entry is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if entry['mtime_ns'] != st.st_mtime_ns or entry['size'] != st.st_size:
+            return None
+        entry['last_used'] = time.time()
+        self._dirty = True
+        return entry
+
+    def record(self, path, valid, error=None, digest=None):
+        """Store a validation result computed elsewhere (e.g. a worker process)"""
+        st = os.stat(path)
+        if digest is None:
+            digest = file_digest(path)
+        key = self._key(path)
+        previous = self.entries.get(key, {})
+        self.entries[key] = {
+            'mtime_ns': st.st_mtime_ns,
+            'size': st.st_size,
+            'sha256': digest,
+            'valid': valid,
+            'error': error,
+            'blob': previous.get('blob') if previous.get('sha256') == digest else None,
+            'last_used': time.time(),
+        }
+        self._dirty = True
+        return self.entries[key]
+
+    def known(self, path):
+        """(sha256, valid, error) last recorded for a path, even if it was touched since"""
+        entry = self.entries.get(self._key(path))
+        if entry is None:
+            return None
+        return entry['sha256'], entry['valid'], entry['error']
+
+    def validate(self, path):
+        """Return (valid, error) for a JSON file, parsing only on a cache miss"""
+        entry = self.lookup(path)
+        if entry is not None:
+            self.hits += 1
+            return entry['valid'], entry['error']
+        self.misses += 1
+        valid, error, digest = check_json_file(path, self.known(path))
+        if digest is not None:
+            self.record(path, valid, error, digest)
+        return valid, error
+
+    def load(self, path):
+        """Parsed document for a JSON file, served from the pickle blob when unchanged"""
+        entry = self.lookup(path)
+        if entry is not None and entry.get('blob'):
+            try:
+                with open(self._blob_path(entry['blob']), 'rb') as f:
+                    doc = pickle.load(f)
+                self.hits += 1
+                return doc
+            except (OSError, pickle.UnpicklingError, EOFError):
+                entry['blob'] = None
+
+        self.misses += 1
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        doc = json.loads(data)
+        entry = self.record(path, True, None, digest)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._blob_path(digest), 'wb') as f:
+            pickle.dump(doc, f, protocol=pickle.HIGHEST_PROTOCOL)
+        entry['blob'] = digest
+        return doc
+
+    def evict(self):
+        """Drop entries for deleted files and LRU blobs above max_bytes"""
+        for key in [k for k in self.entries if not (self.base_dir / k).exists()]:
+            del self.entries[key]
+            self._dirty = True
+
+        live = {e['blob'] for e in self.entries.values() if e.get('blob')}
+        if self.cache_dir.is_dir():
+            for blob in self.cache_dir.glob("*.pickle"):
+                if blob.stem not in live:
+                    blob.unlink()
+
+        blobs = []
+        for entry in self.entries.values():
+            if entry.get('blob'):
+                blob_path = self._blob_path(entry['blob'])
+                size = blob_path.stat().st_size if blob_path.exists() else 0
+                blobs.append((entry['last_used'], size, entry))
+        total = sum(size for _, size, _ in blobs)
+        for _, size, entry in sorted(blobs, key=lambda b: b[0]):
+            if total <= self.max_bytes:
+                break
+            blob_path = self._blob_path(entry['blob'])
+            if blob_path.exists():
+                blob_path.unlink()
+            entry['blob'] = None
+            total -= size
+            self._dirty = True
+
+    def save(self):
+        """Persist the index (after eviction)"""
+        self.evict()
+        if not self._dirty:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'entries': self.entries}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def check_json_file(path, known=None):
+    """Return (valid, error, sha256) for a JSON file.
+
+    ``known`` is a previous (sha256, valid, error) result; when the content
+    hash still matches, that result is reused without parsing. Top-level so
+    it can run in a worker process.
+    """
+    try:
+        if ijson is not None and os.path.getsize(path) > STREAM_THRESHOLD:
+            return _check_json_stream(path, known)
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        return False, str(e), None
+    digest = hashlib.sha256(data).hexdigest()
+    if known is not None and known[0] == digest:
+        return known[1], known[2], digest
+    valid, error = check_json_bytes(data)
+    return valid, error, digest
+
+
+class _HashingReader:
+    """File wrapper that hashes everything read through it"""
+
+    def __init__(self, f):
+        self.f = f
+        self.hash = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.hash.update(data)
+        return data
+
+
+def _check_json_stream(path, known):
+    """Like check_json_file, but parses event by event so memory stays flat"""
+    with open(path, 'rb') as f:
+        if known is not None:
+            digest = file_digest(path)
+            if known[0] == digest:
+                return known[1], known[2], digest
+        reader = _HashingReader(f)
+        try:
+            for _ in ijson.parse(reader):
+                pass
+            valid, error = True, None
+        except (ijson.JSONError, ValueError, UnicodeDecodeError) as e:
+            valid, error = False, str(e)
+        # Hash whatever the parser did not get to
+        for chunk in iter(lambda: reader.read(1 << 20), b''):
+            pass
+    return valid, error, reader.hash.hexdigest()
+
+
+def check_json_bytes(data):
+    """Return (valid, error) for raw JSON bytes"""
+    try:
+        json.loads(data)
+        return True, None
+    except (ValueError, UnicodeDecodeError) as e:
+        return False, str(e)
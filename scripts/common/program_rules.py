@@ -0,0 +1,599 @@
+#!/usr/bin/env python3
+"""
+Offline program-rule engine.
+
+Evaluates the rules in Program Rule/*.json against an event without a
+DHIS2 server: conditions are parsed once (common/expression_parser.py),
+#{}/A{} names are bound through the program rule variables, V{} names to
+the event's environment (dates, stage, status), and the actions of every
+rule that fires come back as effects (HIDEFIELD, ASSIGN, SHOWERROR, ...).
+
+    engine = RuleEngine.from_store()
+    result = engine.evaluate({
+        'programStage': 'ymx76J82mIm', 'eventDate': '2024-03-01',
+        'enrollmentDate': '2024-02-20',
+        'dataValues': {'<dataElement>': 'Pap smear'},
+        'attributes': {'<attribute>': '1980-05-17'},
+        'previousEvents': [{'programStage': ..., 'eventDate': ..., 'dataValues': {...}}],
+    })
+    result.hidden, result.assigned, result.messages
+
+dataValues/attributes may also be DHIS2-style lists ({"dataElement": ...,
+"value": ...}). Values are taken as given, i.e. option names where a
+variable has useCodeForOptionSet false. As in the capture apps, rules run
+in priority order and an ASSIGN is visible to the rules after it; ASSIGN
+data that is not an expression (e.g. No cancer) is assigned as text.
+A d2: call with the wrong number of arguments is a parse error of its
+rule; one that fails on its values (bad pattern, modulus by zero) is an
+error of that rule only, like any other RuleError.
+"""
+import math
+import random
+import re
+from datetime import date, timedelta
+
+from common.expression_parser import (Binary, Call, ExpressionError, Literal, Ref, Unary,
+                                      compared_literals, parse, walk)
+from common.metadata_store import get_store, ref_id
+
+NUMERIC_TYPES = {'NUMBER', 'INTEGER', 'INTEGER_POSITIVE', 'INTEGER_NEGATIVE',
+                 'INTEGER_ZERO_OR_POSITIVE', 'PERCENTAGE', 'UNIT_INTERVAL'}
+BOOLEAN_TYPES = {'BOOLEAN', 'TRUE_ONLY'}
+# Actions whose content/data is shown to the user
+MESSAGE_ACTIONS = {'SHOWWARNING', 'SHOWERROR', 'WARNINGONCOMPLETE', 'ERRORONCOMPLETE',
+                   'DISPLAYTEXT', 'DISPLAYKEYVALUEPAIR'}
+ENVIRONMENT = {
+    'current_date': lambda event: event.get('currentDate') or date.today().isoformat(),
+    'event_date': lambda event: event.get('eventDate') or event.get('occurredAt'),
+    'due_date': lambda event: event.get('dueDate') or event.get('scheduledAt'),
+    'completed_date': lambda event: event.get('completedDate') or event.get('completedAt'),
+    'enrollment_date': lambda event: event.get('enrollmentDate') or event.get('enrolledAt'),
+    'incident_date': lambda event: event.get('incidentDate') or event.get('occurredAt'),
+    'event_status': lambda event: event.get('status'),
+    'enrollment_status': lambda event: event.get('enrollmentStatus'),
+    'program_stage_id': lambda event: event.get('programStage'),
+    'program_stage_name': lambda event: event.get('programStageName'),
+    'program_name': lambda event: event.get('programName'),
+    'org_unit': lambda event: event.get('orgUnit'),
+    'org_unit_code': lambda event: event.get('orgUnitCode'),
+    'event_id': lambda event: event.get('event'),
+    'enrollment_id': lambda event: event.get('enrollment'),
+    'event_count': lambda event: 1 + len(event.get('previousEvents') or []),
+    'enrollment_count': lambda event: 1,
+    'tei_count': lambda event: 1,
+    'environment': lambda event: 'WebClient',
+}
+
+
+class RuleError(ValueError):
+    """A condition or action that cannot be evaluated (unknown variable, bad date, ...)"""
+
+
+def _values(obj, key, id_key):
+    """{uid: value} from a dict or a DHIS2-style list of {id_key, value}"""
+    values = obj.get(key) or {}
+    if isinstance(values, dict):
+        return dict(values)
+    return {ref_id(v.get(id_key)): v.get('value') for v in values}
+
+
+def has_value(value):
+    return value is not None and value != ''
+
+
+def typed(value, value_type):
+    """A raw (string) value as the type the rule engine compares it as; empty -> default"""
+    if value_type in NUMERIC_TYPES:
+        if not has_value(value):
+            return 0
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return value
+        return int(number) if number.is_integer() else number
+    if value_type in BOOLEAN_TYPES:
+        if isinstance(value, bool):
+            return value
+        return str(value).lower() == 'true' if has_value(value) else False
+    return '' if value is None else value
+
+
+def display(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return '' if value is None else str(value)
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    if value is None or value == '':
+        return 0
+    try:
+        number = float(value)
+    except ValueError:
+        raise RuleError(f"Not a number: {value!r}") from None
+    return int(number) if number.is_integer() else number
+
+
+def _truthy(value):
+    if isinstance(value, str):
+        return value != '' and value.lower() != 'false'
+    return bool(value)
+
+
+def _date(value):
+    if isinstance(value, date):
+        return value
+    text = display(value)
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        raise RuleError(f"Not a date: {value!r}") from None
+
+
+def _months_between(start, end):
+    if end < start:
+        return -_months_between(end, start)
+    return (end.year - start.year) * 12 + end.month - start.month - (end.day < start.day)
+
+
+def _compare(op, left, right):
+    if isinstance(left, (int, float)) != isinstance(right, (int, float)):
+        # '12' >= 1 compares as numbers, like the JavaScript rule engine
+        try:
+            left, right = _number(left), _number(right)
+        except RuleError:
+            left, right = display(left), display(right)
+    if op == '==':
+        return left == right
+    if op == '!=':
+        return left != right
+    if left is None or right is None:
+        return False
+    try:
+        if op == '<':
+            return left < right
+        if op == '<=':
+            return left <= right
+        if op == '>':
+            return left > right
+        return left >= right
+    except TypeError:
+        raise RuleError(f"Cannot compare {left!r} {op} {right!r}") from None
+
+
+class Variable:
+    """A program rule variable and where its value comes from"""
+
+    def __init__(self, obj):
+        self.id = obj.get('id')
+        self.name = obj.get('name')
+        self.source = obj.get('programRuleVariableSourceType')
+        self.data_element = ref_id(obj.get('dataElement'))
+        self.attribute = ref_id(obj.get('trackedEntityAttribute'))
+        self.program_stage = ref_id(obj.get('programStage'))
+        self.value_type = obj.get('valueType') or 'TEXT'
+
+    @property
+    def field(self):
+        return self.attribute if self.source == 'TEI_ATTRIBUTE' else self.data_element
+
+
+class EventContext:
+    """Values visible to the rules for one event (updated by ASSIGN actions)"""
+
+    def __init__(self, engine, event):
+        self.engine = engine
+        self.event = event
+        self.data_values = _values(event, 'dataValues', 'dataElement')
+        self.attributes = _values(event, 'attributes', 'attribute')
+        self.calculated = {}
+        self.previous = sorted(
+            ({'programStage': e.get('programStage'),
+              'date': e.get('eventDate') or e.get('occurredAt') or '',
+              'dataValues': _values(e, 'dataValues', 'dataElement')}
+             for e in event.get('previousEvents') or []),
+            key=lambda e: e['date'])
+
+    def raw(self, variable):
+        source = variable.source
+        if source == 'TEI_ATTRIBUTE':
+            return self.attributes.get(variable.attribute)
+        if source == 'CALCULATED_VALUE':
+            return self.calculated.get(variable.name)
+        de = variable.data_element
+        if source == 'DATAELEMENT_PREVIOUS_EVENT':
+            events = self.previous
+        elif source == 'DATAELEMENT_NEWEST_EVENT_PROGRAM_STAGE':
+            if self.event.get('programStage') == variable.program_stage and has_value(self.data_values.get(de)):
+                return self.data_values[de]
+            events = [e for e in self.previous if e['programStage'] == variable.program_stage]
+        elif source == 'DATAELEMENT_NEWEST_EVENT_PROGRAM':
+            if has_value(self.data_values.get(de)):
+                return self.data_values[de]
+            events = self.previous
+        else:
+            return self.data_values.get(de)
+        for event in reversed(events):
+            if has_value(event['dataValues'].get(de)):
+                return event['dataValues'][de]
+        return None
+
+    def lookup(self, ref):
+        """(raw value, value type) for a reference"""
+        if ref.kind == 'V':
+            getter = ENVIRONMENT.get(ref.name)
+            if getter is None:
+                raise RuleError(f"Unknown environment variable V{{{ref.name}}}")
+            return getter(self.event), 'NUMBER' if ref.name.endswith('_count') else 'TEXT'
+        variable = self.engine.variables.get(ref.name)
+        if variable is not None:
+            return self.raw(variable), variable.value_type
+        if ref.kind == 'A' and ref.name in self.attributes:
+            return self.attributes[ref.name], 'TEXT'
+        if ref.kind == '#' and ref.name in self.data_values:
+            return self.data_values[ref.name], 'TEXT'
+        raise RuleError(f"Unknown variable {ref.kind}{{{ref.name}}}")
+
+    def assign(self, action, value):
+        if action['dataElement']:
+            self.data_values[action['dataElement']] = value
+        elif action['attribute']:
+            self.attributes[action['attribute']] = value
+        match = re.fullmatch(r'\s*[#A]\{([^}]*)\}\s*', action['content'] or '')
+        if match:
+            self.calculated[match.group(1)] = value
+
+
+def evaluate(node, context):
+    """Value of an expression tree in an EventContext"""
+    if isinstance(node, Literal):
+        return node.value
+    if isinstance(node, Ref):
+        raw, value_type = context.lookup(node)
+        return typed(raw, value_type)
+    if isinstance(node, Binary):
+        op = node.op
+        if op == '&&':
+            return _truthy(evaluate(node.left, context)) and _truthy(evaluate(node.right, context))
+        if op == '||':
+            return _truthy(evaluate(node.left, context)) or _truthy(evaluate(node.right, context))
+        left, right = evaluate(node.left, context), evaluate(node.right, context)
+        if op in ('==', '!=', '<', '<=', '>', '>='):
+            return _compare(op, left, right)
+        if op == '+' and (isinstance(left, str) or isinstance(right, str)):
+            return display(left) + display(right)
+        left, right = _number(left), _number(right)
+        if op == '+':
+            return left + right
+        if op == '-':
+            return left - right
+        if op == '*':
+            return left * right
+        if right == 0:
+            raise RuleError("Division by zero")
+        return left / right if op == '/' else math.fmod(left, right)
+    if isinstance(node, Unary):
+        value = evaluate(node.operand, context)
+        if node.op == '!':
+            return not _truthy(value)
+        return -_number(value) if node.op == '-' else _number(value)
+    if isinstance(node, Call):
+        function = FUNCTIONS.get(node.name)
+        if function is None:
+            raise RuleError(f"Unsupported function {node.name}")
+        try:
+            return function(node.args, context)
+        except RuleError:
+            raise
+        except (ValueError, IndexError, TypeError, ArithmeticError, re.error) as e:
+            raise RuleError(f"{node.name}: {e}") from None
+    raise RuleError(f"Cannot evaluate {node!r}")
+
+
+def _raw_arg(node, context):
+    """Raw value of a variable argument (d2:hasValue(#{x}) or the older d2:hasValue('x'))"""
+    if isinstance(node, Literal) and isinstance(node.value, str):
+        node = Ref('#', node.value)
+    if isinstance(node, Ref):
+        return context.lookup(node)[0]
+    return evaluate(node, context)
+
+
+def _args(args, context):
+    return [evaluate(arg, context) for arg in args]
+
+
+def _between(unit):
+    def function(args, context):
+        start, end = (_date(v) for v in _args(args, context))
+        if unit == 'years':
+            months = _months_between(start, end)
+            return int(months / 12)
+        if unit == 'months':
+            return _months_between(start, end)
+        days = (end - start).days
+        return int(days / 7) if unit == 'weeks' else days
+    return function
+
+
+def _substring(args, context):
+    text, start, end = _args(args, context)
+    return display(text)[int(_number(start)):int(_number(end))]
+
+
+def _split(args, context):
+    text, delimiter, index = _args(args, context)
+    parts = display(text).split(display(delimiter))
+    index = int(_number(index))
+    return parts[index] if 0 <= index < len(parts) else ''
+
+
+def _condition(args, context):
+    test, when_true, when_false = args
+    if isinstance(test, Literal) and isinstance(test.value, str):
+        test = parse(test.value)
+    return evaluate(when_true if _truthy(evaluate(test, context)) else when_false, context)
+
+
+def _round(args, context):
+    values = _args(args, context)
+    decimals = int(_number(values[1])) if len(values) > 1 else 0
+    value = round(_number(values[0]) + 0.0, decimals)
+    return int(value) if decimals == 0 else value
+
+
+FUNCTIONS = {
+    'd2:hasValue': lambda args, c: has_value(_raw_arg(args[0], c)),
+    'd2:yearsBetween': _between('years'),
+    'd2:monthsBetween': _between('months'),
+    'd2:weeksBetween': _between('weeks'),
+    'd2:daysBetween': _between('days'),
+    'd2:addDays': lambda args, c: (_date(evaluate(args[0], c))
+                                   + timedelta(days=int(_number(evaluate(args[1], c))))).isoformat(),
+    'd2:substring': _substring,
+    'd2:left': lambda args, c: display(evaluate(args[0], c))[:int(_number(evaluate(args[1], c)))],
+    'd2:right': lambda args, c: (lambda text, n: text[len(text) - n:] if n > 0 else '')(
+        display(evaluate(args[0], c)), int(_number(evaluate(args[1], c)))),
+    'd2:length': lambda args, c: len(display(evaluate(args[0], c))),
+    'd2:split': _split,
+    'd2:concatenate': lambda args, c: ''.join(display(v) for v in _args(args, c)),
+    'd2:validatePattern': lambda args, c: re.fullmatch(display(evaluate(args[1], c)),
+                                                       display(evaluate(args[0], c))) is not None,
+    'd2:modulus': lambda args, c: math.fmod(_number(evaluate(args[0], c)), _number(evaluate(args[1], c))),
+    'd2:round': _round,
+    'd2:floor': lambda args, c: math.floor(_number(evaluate(args[0], c))),
+    'd2:ceil': lambda args, c: math.ceil(_number(evaluate(args[0], c))),
+    'd2:condition': _condition,
+    'd2:zing': lambda args, c: max(0, _number(evaluate(args[0], c))),
+    'd2:oizp': lambda args, c: 1 if _number(evaluate(args[0], c)) >= 0 else 0,
+    'd2:zpvc': lambda args, c: sum(1 for v in _args(args, c) if has_value(v) and _number(v) >= 0),
+    'd2:count': lambda args, c: 1 if has_value(_raw_arg(args[0], c)) else 0,
+    'd2:countIfValue': lambda args, c: 1 if display(_raw_arg(args[0], c)) == display(evaluate(args[1], c)) else 0,
+    'd2:countIfZeroPos': lambda args, c: 1 if has_value(_raw_arg(args[0], c))
+                                              and _number(_raw_arg(args[0], c)) >= 0 else 0,
+}
+
+# Argument counts: (min, max or None for any)
+ARITY = {
+    'd2:hasValue': (1, 1), 'd2:yearsBetween': (2, 2), 'd2:monthsBetween': (2, 2),
+    'd2:weeksBetween': (2, 2), 'd2:daysBetween': (2, 2), 'd2:addDays': (2, 2),
+    'd2:substring': (3, 3), 'd2:left': (2, 2), 'd2:right': (2, 2), 'd2:length': (1, 1),
+    'd2:split': (3, 3), 'd2:concatenate': (1, None), 'd2:validatePattern': (2, 2),
+    'd2:modulus': (2, 2), 'd2:round': (1, 2), 'd2:floor': (1, 1), 'd2:ceil': (1, 1),
+    'd2:condition': (3, 3), 'd2:zing': (1, 1), 'd2:oizp': (1, 1), 'd2:zpvc': (1, None),
+    'd2:count': (1, 1), 'd2:countIfValue': (2, 2), 'd2:countIfZeroPos': (1, 1),
+}
+
+
+def arity_error(call, arity=ARITY):
+    """Message when a call has the wrong number of arguments (per arity), else None"""
+    if call.name not in arity:
+        return None
+    low, high = arity[call.name]
+    count = len(call.args)
+    if low <= count and (high is None or count <= high):
+        return None
+    expected = str(low) if low == high else f"{low}+" if high is None else f"{low}-{high}"
+    return f"{call.name} takes {expected} argument{'' if expected == '1' else 's'}, got {count}"
+
+
+def check_calls(tree, expression):
+    """Raise ExpressionError for the first call with the wrong number of arguments"""
+    for node in walk(tree):
+        if isinstance(node, Call):
+            message = arity_error(node)
+            if message:
+                raise ExpressionError(message, expression, node.pos)
+
+
+class EvaluationResult:
+    """Effects of all rules for one event"""
+
+    def __init__(self):
+        self.effects = []
+        self.fired = []
+        self.errors = {}
+        self.hidden = set()
+        self.mandatory = set()
+        self.assigned = {}
+        self.messages = []
+
+    def add(self, effect):
+        self.effects.append(effect)
+        kind, target = effect['type'], effect['target']
+        if kind == 'HIDEFIELD':
+            self.hidden.add(target)
+        elif kind == 'SETMANDATORYFIELD':
+            self.mandatory.add(target)
+        elif kind == 'ASSIGN':
+            self.assigned[target] = effect['value']
+        elif kind in MESSAGE_ACTIONS:
+            self.messages.append((kind, target, effect['value']))
+
+
+class RuleEngine:
+    """Program rules, their actions and variables, with conditions parsed once"""
+
+    def __init__(self, rules, actions, variables):
+        self.variables = {}
+        for obj in variables:
+            variable = Variable(obj)
+            self.variables.setdefault(variable.name, variable)
+        actions_by_rule = {}
+        for action in actions:
+            actions_by_rule.setdefault(ref_id(action.get('programRule')), []).append({
+                'id': action.get('id'),
+                'type': action.get('programRuleActionType'),
+                'dataElement': ref_id(action.get('dataElement')),
+                'attribute': ref_id(action.get('trackedEntityAttribute')),
+                'section': ref_id(action.get('programStageSection')),
+                'stage': ref_id(action.get('programStage')),
+                'content': action.get('content'),
+                'data': self._compile_data(action.get('data')),
+            })
+        self.rules = []
+        self.parse_errors = {}
+        for rule in sorted(rules, key=lambda r: (r.get('priority') is None, r.get('priority') or 0)):
+            try:
+                text = rule.get('condition') or 'true'
+                condition = parse(text)
+                check_calls(condition, text)
+            except ExpressionError as e:
+                self.parse_errors[rule.get('id')] = str(e)
+                continue
+            self.rules.append({
+                'id': rule.get('id'),
+                'name': rule.get('name'),
+                'program': ref_id(rule.get('program')),
+                'stage': ref_id(rule.get('programStage')),
+                'condition': condition,
+                'actions': actions_by_rule.get(rule.get('id'), []),
+            })
+
+    @classmethod
+    def from_store(cls, store=None):
+        store = store or get_store()
+        return cls(store['programRules'].objects, store['programRuleActions'].objects,
+                   store['programRuleVariables'].objects)
+
+    @staticmethod
+    def _compile_data(data):
+        if not data or not data.strip():
+            return None
+        try:
+            return parse(data)
+        except ExpressionError:
+            return Literal(data.strip())
+
+    def rules_for(self, event):
+        program, stage = event.get('program'), event.get('programStage')
+        return [r for r in self.rules
+                if (program is None or r['program'] == program)
+                and (r['stage'] is None or r['stage'] == stage)]
+
+    def evaluate(self, event):
+        context = EventContext(self, event)
+        result = EvaluationResult()
+        for rule in self.rules_for(event):
+            try:
+                fired = _truthy(evaluate(rule['condition'], context))
+            except RuleError as e:
+                result.errors[rule['id']] = str(e)
+                continue
+            if not fired:
+                continue
+            result.fired.append(rule['id'])
+            for action in rule['actions']:
+                value = None
+                if action['data'] is not None:
+                    try:
+                        value = display(evaluate(action['data'], context))
+                    except RuleError as e:
+                        result.errors[action['id']] = str(e)
+                        continue
+                if action['type'] == 'ASSIGN':
+                    context.assign(action, value)
+                elif action['type'] in MESSAGE_ACTIONS:
+                    value = " ".join(part for part in (action['content'], value) if part)
+                result.add({
+                    'rule': rule['id'],
+                    'action': action['id'],
+                    'type': action['type'],
+                    'target': (action['dataElement'] or action['attribute'] or action['section']
+                               or action['stage'] or action['content']),
+                    'value': value,
+                })
+        return result
+
+    def stages(self):
+        """Program stages the rules or variables are tied to"""
+        stages = {r['stage'] for r in self.rules if r['stage']}
+        stages.update(v.program_stage for v in self.variables.values() if v.program_stage)
+        return sorted(stages)
+
+
+def _sample(value_type, rng):
+    if value_type in NUMERIC_TYPES:
+        return str(rng.randint(0, 100))
+    if value_type in BOOLEAN_TYPES:
+        return 'true' if value_type == 'TRUE_ONLY' or rng.random() < 0.5 else 'false'
+    if value_type in ('DATE', 'AGE'):
+        return (date(1940, 1, 1) + timedelta(days=rng.randint(0, 30000))).isoformat()
+    return rng.choice(['x', 'Other', 'Unknown'])
+
+
+def synthetic_events(engine, count, seed=0, stage=None, empty_rate=0.3):
+    """Random events that exercise the rules.
+
+    Each field bound to a rule variable gets, at random, nothing, one of
+    the literals the conditions compare it with, or a value of its type.
+    """
+    rng = random.Random(seed)
+    literals = {}
+    for rule in engine.rules:
+        for ref, value in compared_literals(rule['condition']):
+            variable = engine.variables.get(ref.name)
+            if variable is not None and variable.field and value is not None:
+                literals.setdefault(variable.field, set()).add(display(value))
+    fields = {}
+    for variable in engine.variables.values():
+        if variable.field:
+            fields.setdefault((variable.source == 'TEI_ATTRIBUTE', variable.field), variable.value_type)
+    choices = sorted(fields.items())
+    literal_choices = {field: sorted(values) for field, values in literals.items()}
+    stages = [stage] if stage else engine.stages() or [None]
+
+    for index in range(count):
+        enrollment = date(2015, 1, 1) + timedelta(days=rng.randint(0, 3650))
+        event_date = enrollment + timedelta(days=rng.randint(0, 365))
+        event = {'event': f"synthetic{index}", 'programStage': rng.choice(stages),
+                 'enrollmentDate': enrollment.isoformat(), 'eventDate': event_date.isoformat(),
+                 'dataValues': {}, 'attributes': {}, 'previousEvents': []}
+        previous = {'programStage': rng.choice(stages), 'dataValues': {},
+                    'eventDate': (enrollment + timedelta(days=rng.randint(0, 30))).isoformat()}
+        for (is_attribute, field), value_type in choices:
+            if rng.random() < empty_rate:
+                continue
+            options = literal_choices.get(field)
+            if options and rng.random() < 0.8:
+                value = rng.choice(options)
+            else:
+                value = _sample(value_type, rng)
+            if is_attribute:
+                event['attributes'][field] = value
+            elif rng.random() < 0.2:
+                previous['dataValues'][field] = value
+            else:
+                event['dataValues'][field] = value
+        if previous['dataValues']:
+            event['previousEvents'].append(previous)
+        yield event
+
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Structured parsing of /api/metadata import reports.
+
+parse_report() reduces a response to one compact record: status, stats,
+stats per type and one entry per object error report (type, uid, index,
+error code, property, message). A response file or stream is read
+incrementally with ijson when installed, so a large report is never held
+in memory; decoded dicts (DHIS2Client responses) go through the same code.
+
+RunLog appends the records of a run to a JSONL file and keeps totals, so
+failure triage is a query over the log rather than a verbose re-run:
+
+    python3 scripts/common/report_parser.py record LOG RESPONSE --file F --http-status 200
+    python3 scripts/common/report_parser.py summary LOG
+    python3 scripts/common/report_parser.py errors LOG --code E5003 --type DataElement
+"""
+import argparse
+import json
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+LOG_DIR = BASE_DIR / "artifacts" / "logs"
+STAT_KEYS = ('created', 'updated', 'deleted', 'ignored', 'total')
+OK_STATUSES = ('OK', 'WARNING')
+# Characters of a non-JSON response (an HTML error page, a curl error) kept as its message
+MESSAGE_LIMIT = 300
+
+OBJECT_REPORT = 'typeReports.item.objectReports.item'
+ERROR_REPORT = OBJECT_REPORT + '.errorReports.item'
+# Error reports outside typeReports (single-object ObjectReports, bulk endpoints)
+LOOSE_ERROR_REPORT = 'errorReports.item'
+
+
+def short_klass(klass):
+    """'org.hisp.dhis.dataelement.DataElement' -> 'DataElement'"""
+    return klass.rsplit('.', 1)[-1] if klass else None
+
+
+def _dict_events(value, prefix=''):
+    """ijson.parse()-style events for an already decoded value"""
+    if isinstance(value, dict):
+        yield prefix, 'start_map', None
+        for key, item in value.items():
+            yield prefix, 'map_key', key
+            yield from _dict_events(item, f"{prefix}.{key}" if prefix else key)
+        yield prefix, 'end_map', None
+    elif isinstance(value, list):
+        yield prefix, 'start_array', None
+        for item in value:
+            yield from _dict_events(item, f"{prefix}.item" if prefix else 'item')
+        yield prefix, 'end_array', None
+    elif isinstance(value, bool):
+        yield prefix, 'boolean', value
+    elif isinstance(value, (int, float)):
+        yield prefix, 'number', value
+    elif value is None:
+        yield prefix, 'null', None
+    else:
+        yield prefix, 'string', value
+
+
+def _parse_events(events):
+    """Fold parser events into (status, message, httpStatusCode, stats, types, errors)"""
+    top = {'status': None, 'message': None, 'httpStatusCode': None}
+    report_status = None
+    stats = {}
+    types = {}
+    errors = []
+    loose_errors = []
+    type_klass, type_stats = None, {}
+    object_report, object_errors = {}, []
+    error = None
+    for prefix, event, value in events:
+        if event in ('map_key', 'start_array', 'end_array'):
+            continue
+        # Newer DHIS2 versions wrap the import report in "response"
+        nested = prefix.startswith('response.') or prefix == 'response'
+        path = prefix[len('response.'):] if nested else prefix
+        if event == 'start_map':
+            if path == 'typeReports.item':
+                type_klass, type_stats = None, {}
+            elif path == OBJECT_REPORT:
+                object_report, object_errors = {}, []
+            elif path in (ERROR_REPORT, LOOSE_ERROR_REPORT):
+                error = {}
+            continue
+        if event == 'end_map':
+            if path == ERROR_REPORT and error is not None:
+                object_errors.append(error)
+                error = None
+            elif path == LOOSE_ERROR_REPORT and error is not None:
+                loose_errors.append(_error_entry(error, {}, None))
+                error = None
+            elif path == OBJECT_REPORT:
+                errors.extend(_error_entry(entry, object_report, type_klass) for entry in object_errors)
+            elif path == 'typeReports.item':
+                name = short_klass(type_klass) or 'unknown'
+                merged = types.setdefault(name, {})
+                for key, count in type_stats.items():
+                    merged[key] = merged.get(key, 0) + count
+            continue
+        if path.startswith(ERROR_REPORT + '.') and error is not None:
+            error[path[len(ERROR_REPORT) + 1:]] = value
+        elif path.startswith(LOOSE_ERROR_REPORT + '.') and error is not None:
+            error[path[len(LOOSE_ERROR_REPORT) + 1:]] = value
+        elif path.startswith(OBJECT_REPORT + '.'):
+            field = path[len(OBJECT_REPORT) + 1:]
+            if field in ('klass', 'uid', 'index'):
+                object_report[field] = value
+        elif path == 'typeReports.item.klass':
+            type_klass = value
+        elif path.startswith('typeReports.item.stats.') and event == 'number':
+            type_stats[path.rsplit('.', 1)[1]] = value
+        elif path.startswith('stats.') and event == 'number':
+            stats[path[len('stats.'):]] = value
+        elif path == 'status':
+            if nested:
+                report_status = value
+            else:
+                top['status'] = value
+        elif not nested and path in ('message', 'httpStatusCode'):
+            top[path] = value
+    return (report_status or top['status'], top['message'], top['httpStatusCode'], stats, types,
+            errors or loose_errors)
+
+
+def _error_entry(error, object_report, type_klass):
+    return {
+        'type': short_klass(object_report.get('klass') or error.get('mainKlass') or type_klass),
+        'uid': object_report.get('uid') or error.get('mainId'),
+        'index': object_report.get('index'),
+        'code': error.get('errorCode'),
+        'property': error.get('errorProperty'),
+        'message': error.get('message'),
+    }
+
+
+def parse_report(response, http_status=None):
+    """A compact record of an import response.
+
+    ``response`` is a decoded dict, a path to a saved response or a binary
+    stream. The record's status falls back to the HTTP status when the body
+    carries none (2xx -> OK). A body that is not JSON (e.g. truncated) is
+    never OK: it becomes a WARNING record after a 2xx, an ERROR otherwise,
+    with its start as the message.
+    """
+    message = None
+    try:
+        if isinstance(response, (str, Path)):
+            with open(response, 'rb') as f:
+                parsed = _parse_stream(f)
+        elif hasattr(response, 'read'):
+            parsed = _parse_stream(response)
+        else:
+            parsed = _parse_events(_dict_events(response))
+    except ValueError as e:
+        parsed = None
+        message = _raw_message(response) or f"Unparseable response: {' '.join(str(e).split())}"
+    if parsed is None:
+        status, body_code, stats, types, errors = None, None, {}, {}, []
+    else:
+        status, message, body_code, stats, types, errors = parsed
+    http_status = http_status or body_code
+    if status is None:
+        success = http_status and 200 <= http_status < 300
+        # Whether an unreadable body's import went through is unknown
+        status = 'ERROR' if not success else 'OK' if parsed is not None else 'WARNING'
+    record = {
+        'status': status,
+        'httpStatus': http_status,
+        'stats': {key: stats.get(key, 0) for key in STAT_KEYS},
+        'types': types,
+        'errors': errors,
+    }
+    if message and (status not in OK_STATUSES or not stats):
+        record['message'] = message
+    return record
+
+
+def _parse_stream(stream):
+    if ijson is not None:
+        try:
+            return _parse_events(ijson.parse(stream))
+        except ijson.JSONError as e:
+            raise ValueError(str(e)) from e
+    data = stream.read()
+    if not data.strip():
+        raise ValueError("empty response")
+    return _parse_events(_dict_events(json.loads(data)))
+
+
+def _raw_message(response):
+    if not isinstance(response, (str, Path)):
+        return None
+    try:
+        with open(response, 'rb') as f:
+            text = f.read(MESSAGE_LIMIT).decode('utf-8', 'replace')
+    except OSError:
+        return None
+    return " ".join(text.split()) or "Empty response"
+
+
+def record_ok(record):
+    return record['status'] in OK_STATUSES
+
+
+def record_summary(record):
+    """One line for console output"""
+    stats = record['stats']
+    if not record_ok(record) and not any(stats.values()):
+        line = f"{record['status']} (HTTP {record['httpStatus'] or 'no response'})"
+    else:
+        line = (f"created {stats['created']}, updated {stats['updated']}, "
+                f"ignored {stats['ignored']}")
+    if record['errors']:
+        codes = Counter(e['code'] for e in record['errors'])
+        line += f", {len(record['errors'])} errors (" + ", ".join(
+            f"{code} x{count}" for code, count in codes.most_common(3)) + ")"
+    if record.get('message'):
+        line += f": {record['message'][:150]}"
+    return line
+
+
+class RunTotals:
+    """Records aggregated over an import run"""
+
+    def __init__(self):
+        self.files = 0
+        self.failed = []
+        self.stats = Counter()
+        self.types = {}
+        self.error_codes = Counter()
+        self.errors = 0
+
+    def add(self, record):
+        self.files += 1
+        if not record_ok(record):
+            self.failed.append(record.get('file') or record.get('description'))
+        self.stats.update(record['stats'])
+        for name, stats in record['types'].items():
+            self.types.setdefault(name, Counter()).update(stats)
+        self.errors += len(record['errors'])
+        self.error_codes.update(e['code'] for e in record['errors'])
+
+    def as_dict(self):
+        return {
+            'files': self.files,
+            'failed': self.failed,
+            'stats': {key: self.stats.get(key, 0) for key in STAT_KEYS},
+            'types': {name: dict(stats) for name, stats in sorted(self.types.items())},
+            'errors': self.errors,
+            'errorCodes': dict(self.error_codes.most_common()),
+        }
+
+
+class RunLog:
+    """Import records appended to a JSONL file as they arrive, with run totals"""
+
+    def __init__(self, path=None, prefix="import_results"):
+        self.path = Path(path or LOG_DIR / f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.totals = RunTotals()
+
+    def add(self, record, file=None, description=None):
+        entry = {'time': datetime.now().isoformat(timespec='seconds')}
+        if file is not None:
+            entry['file'] = log_key(file)
+        if description is not None:
+            entry['description'] = description
+        entry.update(record)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, separators=(',', ':'), ensure_ascii=True) + '\n')
+        self.totals.add(entry)
+        return entry
+
+    def record(self, response, file=None, description=None, http_status=None):
+        """parse_report() and add() in one step"""
+        return self.add(parse_report(response, http_status), file, description)
+
+
+def log_key(path):
+    path = Path(path)
+    try:
+        return path.resolve().relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def read_log(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def print_summary(totals, path=None):
+    summary = totals.as_dict()
+    stats = summary['stats']
+    print(f"📊 {summary['files']} files{f' in {path}' if path else ''}: "
+          f"created {stats['created']}, updated {stats['updated']}, deleted {stats['deleted']}, "
+          f"ignored {stats['ignored']}")
+    for name, type_stats in summary['types'].items():
+        print(f"   {name:<28} created {type_stats.get('created', 0):>6}  "
+              f"updated {type_stats.get('updated', 0):>6}  ignored {type_stats.get('ignored', 0):>6}")
+    if summary['errorCodes']:
+        print(f"⚠️  {summary['errors']} object errors: " + ", ".join(
+            f"{code} x{count}" for code, count in summary['errorCodes'].items()))
+    for name in summary['failed']:
+        print(f"❌ {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse and query metadata import reports")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help="parse a response and append it to a run log")
+    record.add_argument('log', type=Path)
+    record.add_argument('response', nargs='?', type=Path, help="saved response (default: stdin)")
+    record.add_argument('--file', help="the imported file")
+    record.add_argument('--description')
+    record.add_argument('--http-status', type=int)
+
+    summary = commands.add_parser('summary', help="totals per run log")
+    summary.add_argument('logs', nargs='+', type=Path)
+    summary.add_argument('--json', action='store_true', help="print the totals as JSON")
+
+    errors = commands.add_parser('errors', help="object errors in run logs")
+    errors.add_argument('logs', nargs='+', type=Path)
+    errors.add_argument('--code', action='append', help="error code, e.g. E5003 (repeatable)")
+    errors.add_argument('--type', action='append', help="object type, e.g. DataElement (repeatable)")
+    errors.add_argument('--file', help="substring of the imported file's path")
+    errors.add_argument('--failed', action='store_true', help="only files whose import failed")
+    errors.add_argument('--json', action='store_true', help="print matching errors as JSONL")
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        source = args.response if args.response else sys.stdin.buffer
+        entry = RunLog(args.log).record(source, args.file, args.description, args.http_status)
+        print(record_summary(entry))
+        sys.exit(0 if record_ok(entry) else 1)
+
+    if args.command == 'summary':
+        for path in args.logs:
+            totals = RunTotals()
+            for entry in read_log(path):
+                totals.add(entry)
+            if args.json:
+                print(json.dumps(dict(totals.as_dict(), log=str(path)), ensure_ascii=True))
+            else:
+                print_summary(totals, path)
+        return
+
+    matches = 0
+    for path in args.logs:
+        for entry in read_log(path):
+            if args.file and args.file not in (entry.get('file') or ''):
+                continue
+            if args.failed and record_ok(entry):
+                continue
+            if not entry['errors'] and not record_ok(entry):
+                # A failure without object errors (HTTP error, rejected payload)
+                entry['errors'] = [{'type': None, 'uid': None, 'index': None, 'code': None,
+                                    'property': None, 'message': entry.get('message')}]
+            for error in entry['errors']:
+                if args.code and error['code'] not in args.code:
+                    continue
+                if args.type and error['type'] not in args.type:
+                    continue
+                matches += 1
+                if args.json:
+                    print(json.dumps(dict(error, file=entry.get('file')), ensure_ascii=True))
+                else:
+                    print(f"{entry.get('file') or entry.get('description') or '-'}  {error['type'] or '-'}  "
+                          f"{error['uid'] or '-'}  {error['code'] or entry['status']}  {error['message']}")
+    if not args.json:
+        print(f"{matches} errors", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
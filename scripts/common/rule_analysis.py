@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Static checks of program rules over the rule graph (common/rule_graph.py).
+
+analyse() makes one pass over the indexed graph and returns findings
+({severity, code, rule, action, message}); nothing is evaluated against
+events. It checks that:
+
+- conditions parse and every #{}/A{}/V{} reference and d2: function exists,
+  with the right number of arguments;
+- variables, data elements, attributes and sections used by a rule belong
+  to the rule's program (and to its stage, for current-event values and
+  action targets), as far as the bundle includes that program/stage;
+- no field is hidden by one rule while another can make it mandatory or
+  assign it (HIDEFIELD vs SETMANDATORYFIELD/ASSIGN) under conditions that
+  can hold together;
+- no condition is unreachable: constant false, contradictory comparisons
+  (#{x} == 'A' && #{x} == 'B', #{n} > 5 && #{n} < 2), or requiring a value
+  that cannot exist in the rule's stage.
+
+Contradictions are found from the comparisons joined by && (|| branches
+are followed within a small budget); anything the checks cannot decide is
+treated as reachable, so a finding is a real problem rather than a guess.
+"""
+from collections import Counter, defaultdict
+
+from common.expression_parser import Binary, Call, Literal, Ref, Unary, walk
+from common.metadata_store import ref_id
+from common.program_rules import ENVIRONMENT, FUNCTIONS, RuleError, _truthy, arity_error, display, evaluate
+
+ERROR = 'error'
+WARNING = 'warning'
+# Action types that need a field to act on
+FIELD_ACTIONS = {'HIDEFIELD', 'SETMANDATORYFIELD', 'ASSIGN'}
+# Branch combinations tried per condition before giving up (and assuming reachable)
+BRANCH_BUDGET = 256
+FLIPPED = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '==': '==', '!=': '!='}
+
+
+def finding(severity, code, message, rule=None, action=None):
+    return {'severity': severity, 'code': code, 'rule': rule, 'action': action, 'message': message}
+
+
+# Reachability
+
+def _flatten(node, op):
+    if isinstance(node, Binary) and node.op == op:
+        return _flatten(node.left, op) + _flatten(node.right, op)
+    return [node]
+
+
+def _fold(node):
+    """A Literal for subtrees without references or calls (e.g. 1 > 2), else node"""
+    if isinstance(node, Literal):
+        return node
+    if any(isinstance(n, (Ref, Call)) for n in walk(node)):
+        return node
+    try:
+        return Literal(evaluate(node, None))
+    except RuleError:
+        return node
+
+
+def _variable_key(node):
+    if isinstance(node, Literal) and isinstance(node.value, str):
+        return ('#', node.value)
+    if isinstance(node, Ref) and node.kind in '#A':
+        return (node.kind, node.name)
+    return None
+
+
+def _term_key(node):
+    """Key of a compared term: a variable, or any other expression by its structure"""
+    if isinstance(node, Ref):
+        return (node.kind, node.name)
+    return ('expr', repr(node))
+
+
+def _atom(node):
+    """(key, op, value) constraint for a simple comparison/test, else None"""
+    if isinstance(node, Binary) and node.op in FLIPPED:
+        left, right, op = node.left, node.right, node.op
+        if isinstance(left, Literal) and not isinstance(right, Literal):
+            left, right, op = right, left, FLIPPED[op]
+        if not isinstance(left, Literal) and isinstance(right, Literal) and right.value is not None:
+            if op in ('==', '!=') or (isinstance(right.value, (int, float))
+                                      and not isinstance(right.value, bool)):
+                return _term_key(left), op, right.value
+        return None
+    if isinstance(node, Call) and node.name == 'd2:hasValue' and len(node.args) == 1:
+        key = _variable_key(node.args[0])
+        return (key, 'present', True) if key else None
+    if isinstance(node, Unary) and node.op == '!':
+        inner = _atom(node.operand)
+        if inner and inner[1] == 'present':
+            return inner[0], 'present', False
+        if isinstance(node.operand, Ref) and node.operand.kind in '#A':
+            return (node.operand.kind, node.operand.name), 'truthy', False
+        return None
+    if isinstance(node, Ref) and node.kind in '#A':
+        return (node.kind, node.name), 'truthy', True
+    return None
+
+
+def _implies_value(value):
+    """Whether 'x == value' means x has a value (0 / '' / false also match an empty field)"""
+    return _truthy(value) if not isinstance(value, str) else value != ''
+
+
+class _Facts:
+    """Constraints on one variable; add() returns False on a contradiction"""
+
+    def __init__(self):
+        self.equal = None
+        self.not_equal = set()
+        self.present = None
+        self.truthy = None
+        self.low = None       # (bound, inclusive)
+        self.high = None
+
+    def add(self, op, value):
+        if op == 'present':
+            return self._set('present', value)
+        if op == 'truthy':
+            if value and self.present is False:
+                return False
+            return self._set('truthy', value)
+        if op == '==':
+            shown = display(value)
+            if self.equal is not None and display(self.equal) != shown:
+                return False
+            if shown in self.not_equal:
+                return False
+            if _implies_value(value):
+                if self.present is False or self.truthy is False and _truthy(value):
+                    return False
+            self.equal = value
+            return self._in_bounds()
+        if op == '!=':
+            if self.equal is not None and display(self.equal) == display(value):
+                return False
+            self.not_equal.add(display(value))
+            return True
+        if op in ('>', '>='):
+            bound = (value, op == '>=')
+            if self.low is None or value > self.low[0] or (value == self.low[0] and not bound[1]):
+                self.low = bound
+        else:
+            bound = (value, op == '<=')
+            if self.high is None or value < self.high[0] or (value == self.high[0] and not bound[1]):
+                self.high = bound
+        return self._in_bounds()
+
+    def _set(self, name, value):
+        current = getattr(self, name)
+        if current is not None and current != value:
+            return False
+        setattr(self, name, value)
+        if self.present is False and (self.truthy or (self.equal is not None and _implies_value(self.equal))):
+            return False
+        return True
+
+    def _in_bounds(self):
+        if self.low and self.high:
+            (low, low_inclusive), (high, high_inclusive) = self.low, self.high
+            if low > high or (low == high and not (low_inclusive and high_inclusive)):
+                return False
+        if isinstance(self.equal, (int, float)) and not isinstance(self.equal, bool):
+            if self.low and (self.equal < self.low[0] or (self.equal == self.low[0] and not self.low[1])):
+                return False
+            if self.high and (self.equal > self.high[0] or (self.equal == self.high[0] and not self.high[1])):
+                return False
+        return True
+
+
+def unsatisfiable(node, empty=(), budget=None):
+    """True when the condition can never hold (empty: variable keys that never have a value)"""
+    budget = [BRANCH_BUDGET] if budget is None else budget
+    return _unsatisfiable(_flatten(node, '&&'), empty, budget)
+
+
+def _unsatisfiable(conjuncts, empty, budget):
+    facts = defaultdict(_Facts)
+    for key in empty:
+        facts[key].present = False
+    branches = None
+    for index, conjunct in enumerate(conjuncts):
+        conjunct = _fold(conjunct)
+        if isinstance(conjunct, Literal):
+            if not _truthy(conjunct.value):
+                return True
+            continue
+        if isinstance(conjunct, Binary) and conjunct.op == '&&':
+            return _unsatisfiable(conjuncts[:index] + _flatten(conjunct, '&&') + conjuncts[index + 1:],
+                                  empty, budget)
+        if isinstance(conjunct, Binary) and conjunct.op == '||' and branches is None:
+            branches = index
+            continue
+        atom = _atom(conjunct)
+        if atom is not None and not facts[atom[0]].add(atom[1], atom[2]):
+            return True
+    if branches is None:
+        return False
+    rest = conjuncts[:branches] + conjuncts[branches + 1:]
+    for branch in _flatten(conjuncts[branches], '||'):
+        budget[0] -= 1
+        if budget[0] < 0 or not _unsatisfiable(rest + [branch], empty, budget):
+            return False
+    return True
+
+
+def exclusive(first, second, empty=()):
+    """True when two conditions can never hold for the same event"""
+    return unsatisfiable(Binary('&&', first, second), empty)
+
+
+# Analysis
+
+class _Scope:
+    """What the bundle tells about a rule's program and stage"""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.stages = graph.collections['programStages']
+        self.programs = graph.collections['programs']
+        self.program_elements = {}
+        for stage in self.stages:
+            program = ref_id(stage.get('program'))
+            self.program_elements.setdefault(program, set()).update(
+                graph.targets(('stage', stage.get('id')), 'has'))
+
+    def stage_elements(self, stage):
+        """Data element nodes of a stage, or None when the bundle lacks the stage"""
+        if stage is None or stage not in self.stages:
+            return None
+        return self.graph.targets(('stage', stage), 'has')
+
+    def attributes(self, program):
+        if program not in self.programs:
+            return None
+        return self.graph.targets(('program', program), 'has')
+
+
+def analyse(graph):
+    """Findings for every rule in the graph, errors first"""
+    findings = []
+    scope = _Scope(graph)
+    rules = graph.collections['programRules']
+    variables = graph.collections['programRuleVariables']
+    missing = Counter()
+
+    for variable in variables:
+        _check_variable(graph, scope, variable, findings, missing)
+
+    empty_by_rule = {}
+    for rule in rules:
+        empty_by_rule[rule.get('id')] = _check_rule(graph, scope, rule, findings, missing)
+
+    for action in graph.collections['programRuleActions']:
+        _check_action(graph, scope, action, rules, findings)
+
+    _check_conflicts(graph, rules, empty_by_rule, findings)
+
+    for (kind, uid), count in sorted(missing.items()):
+        findings.append(finding(WARNING, 'NOT_IN_BUNDLE',
+                                f"{kind} {uid} is not in the bundle; membership checks skipped "
+                                f"for {count} rules/variables"))
+    findings.sort(key=lambda f: (f['severity'] != ERROR, f['code'], f['rule'] or '', f['action'] or ''))
+    return findings
+
+
+def _check_variable(graph, scope, variable, findings, missing):
+    name = variable.get('name')
+    program = ref_id(variable.get('program'))
+    source = variable.get('programRuleVariableSourceType')
+    field = graph.field_of(variable.get('id'))
+    if source in ('DATAELEMENT_CURRENT_EVENT', 'DATAELEMENT_NEWEST_EVENT_PROGRAM',
+                  'DATAELEMENT_NEWEST_EVENT_PROGRAM_STAGE', 'DATAELEMENT_PREVIOUS_EVENT',
+                  'TEI_ATTRIBUTE') and field is None:
+        findings.append(finding(ERROR, 'VARIABLE_WITHOUT_FIELD',
+                                f"Variable {name} ({source}) has no data element/attribute"))
+        return
+    if source == 'DATAELEMENT_NEWEST_EVENT_PROGRAM_STAGE':
+        stage = ref_id(variable.get('programStage'))
+        if stage is None:
+            findings.append(finding(ERROR, 'VARIABLE_WITHOUT_STAGE', f"Variable {name} has no program stage"))
+        elif stage in scope.stages and ref_id(scope.stages.get(stage).get('program')) != program:
+            findings.append(finding(ERROR, 'VARIABLE_STAGE_PROGRAM',
+                                    f"Variable {name} uses stage {stage} of another program"))
+    if field is None:
+        return
+    if field[0] == 'dataElement':
+        elements = scope.program_elements.get(program)
+        if elements is None:
+            missing[('program', program)] += 1
+        elif field not in elements:
+            findings.append(finding(ERROR, 'VARIABLE_FIELD_NOT_IN_PROGRAM',
+                                    f"Variable {name} reads data element {field[1]}, "
+                                    f"which no stage of program {program} has"))
+    else:
+        attributes = scope.attributes(program)
+        if attributes is not None and field not in attributes:
+            findings.append(finding(ERROR, 'VARIABLE_FIELD_NOT_IN_PROGRAM',
+                                    f"Variable {name} reads attribute {field[1]}, "
+                                    f"which program {program} does not have"))
+
+
+def _check_rule(graph, scope, rule, findings, missing):
+    """Checks of a rule's condition; returns the variable keys that are always empty in its stage"""
+    rule_id = rule.get('id')
+    node = ('rule', rule_id)
+    program = ref_id(rule.get('program'))
+    stage = ref_id(rule.get('programStage'))
+    if node in graph.parse_errors:
+        findings.append(finding(ERROR, 'SYNTAX', f"Condition does not parse: {graph.parse_errors[node]}",
+                                rule_id))
+        return ()
+    for ref in graph.unresolved.get(node, []):
+        findings.append(finding(ERROR, 'UNKNOWN_VARIABLE', f"Condition uses {ref}, which is no variable",
+                                rule_id))
+    _check_expression(graph.expressions.get(node), rule_id, None, findings)
+    if stage is not None and stage in scope.stages:
+        if ref_id(scope.stages.get(stage).get('program')) != program:
+            findings.append(finding(ERROR, 'STAGE_PROGRAM',
+                                    f"Rule stage {stage} belongs to another program", rule_id))
+    elif stage is not None:
+        missing[('stage', stage)] += 1
+    if not graph.targets(node, 'action'):
+        findings.append(finding(WARNING, 'NO_ACTIONS', "Rule has no actions", rule_id))
+
+    empty = set()
+    stage_elements = scope.stage_elements(stage)
+    for variable_node in graph.targets(node, 'reads'):
+        if variable_node[0] != 'variable':
+            continue
+        variable = graph.get(variable_node)
+        if ref_id(variable.get('program')) != program:
+            findings.append(finding(ERROR, 'VARIABLE_PROGRAM',
+                                    f"Condition reads variable {variable.get('name')} of program "
+                                    f"{ref_id(variable.get('program'))}", rule_id))
+        field = graph.field_of(variable_node[1])
+        if (stage_elements is not None and field is not None and field[0] == 'dataElement'
+                and variable.get('programRuleVariableSourceType') == 'DATAELEMENT_CURRENT_EVENT'
+                and field not in stage_elements):
+            empty.add(('#', variable.get('name')))
+            empty.add(('A', variable.get('name')))
+            findings.append(finding(WARNING, 'VARIABLE_NOT_IN_STAGE',
+                                    f"Condition reads {variable.get('name')} from the current event, "
+                                    f"but stage {stage} has no data element {field[1]}", rule_id))
+    condition = graph.expressions.get(node)
+    if condition is not None and unsatisfiable(condition, empty):
+        findings.append(finding(ERROR, 'UNREACHABLE', "Condition can never be true", rule_id))
+    return empty
+
+
+def _check_expression(tree, rule_id, action_id, findings):
+    if tree is None:
+        return
+    for current in walk(tree):
+        if isinstance(current, Ref) and current.kind == 'V' and current.name not in ENVIRONMENT:
+            findings.append(finding(ERROR, 'UNKNOWN_ENVIRONMENT',
+                                    f"Unknown environment variable V{{{current.name}}}", rule_id, action_id))
+        elif isinstance(current, Call) and current.name not in FUNCTIONS:
+            findings.append(finding(WARNING, 'UNKNOWN_FUNCTION',
+                                    f"{current.name} is not checked offline", rule_id, action_id))
+        elif isinstance(current, Call) and arity_error(current):
+            findings.append(finding(ERROR, 'ARGUMENT_COUNT', arity_error(current), rule_id, action_id))
+
+
+def _check_action(graph, scope, action, rules, findings):
+    action_id = action.get('id')
+    node = ('action', action_id)
+    kind = action.get('programRuleActionType')
+    rule_id = ref_id(action.get('programRule'))
+    rule = rules.get(rule_id)
+    if rule is None:
+        findings.append(finding(ERROR, 'ORPHAN_ACTION', f"{kind} action belongs to missing rule {rule_id}",
+                                rule_id, action_id))
+        return
+    targets = graph.targets(node, 'targets')
+    if kind in FIELD_ACTIONS and not any(t[0] in ('dataElement', 'attribute', 'variable') for t in targets):
+        findings.append(finding(ERROR, 'MISSING_TARGET', f"{kind} action has no field to act on",
+                                rule_id, action_id))
+    for ref in graph.unresolved.get(node, []):
+        findings.append(finding(ERROR, 'UNKNOWN_VARIABLE', f"{kind} data uses {ref}, which is no variable",
+                                rule_id, action_id))
+    _check_expression(graph.expressions.get(node), rule_id, action_id, findings)
+
+    program = ref_id(rule.get('program'))
+    stage = ref_id(rule.get('programStage'))
+    stage_elements = scope.stage_elements(stage)
+    for target in sorted(targets):
+        if target[0] == 'dataElement':
+            if stage_elements is not None:
+                if target not in stage_elements:
+                    findings.append(finding(ERROR, 'FIELD_NOT_IN_STAGE',
+                                            f"{kind} targets data element {target[1]}, "
+                                            f"which stage {stage} does not have", rule_id, action_id))
+            elif stage is None and program in scope.program_elements \
+                    and target not in scope.program_elements[program]:
+                findings.append(finding(ERROR, 'FIELD_NOT_IN_PROGRAM',
+                                        f"{kind} targets data element {target[1]}, "
+                                        f"which no stage of program {program} has", rule_id, action_id))
+        elif target[0] == 'attribute':
+            attributes = scope.attributes(program)
+            if attributes is not None and target not in attributes:
+                findings.append(finding(ERROR, 'FIELD_NOT_IN_PROGRAM',
+                                        f"{kind} targets attribute {target[1]}, "
+                                        f"which program {program} does not have", rule_id, action_id))
+        elif target[0] == 'section' and stage is not None:
+            section_stages = graph.targets(target, 'inStage')
+            if section_stages and ('stage', stage) not in section_stages:
+                findings.append(finding(ERROR, 'FIELD_NOT_IN_STAGE',
+                                        f"{kind} targets section {target[1]} of another stage",
+                                        rule_id, action_id))
+
+
+def _check_conflicts(graph, rules, empty_by_rule, findings):
+    """HIDEFIELD vs SETMANDATORYFIELD/ASSIGN on one field, when both conditions can hold"""
+    for field, hiding in sorted(graph.hidden_fields().items()):
+        others = [action for action in sorted(graph.sources(field, 'targets'))
+                  if graph.get(action).get('programRuleActionType') in ('SETMANDATORYFIELD', 'ASSIGN')]
+        for hide_id in sorted(hiding):
+            hide_rule = rules.get(graph.rule_of(hide_id))
+            for other in others:
+                other_rule = rules.get(graph.rule_of(other[1]))
+                if hide_rule is None or other_rule is None:
+                    continue
+                if not _overlap(hide_rule, other_rule):
+                    continue
+                first = graph.expressions.get(('rule', hide_rule.get('id')))
+                second = graph.expressions.get(('rule', other_rule.get('id')))
+                if first is None or second is None:
+                    continue
+                stage = ref_id(hide_rule.get('programStage')) or ref_id(other_rule.get('programStage'))
+                empty = empty_by_rule.get(hide_rule.get('id'), set()) | empty_by_rule.get(other_rule.get('id'), set())
+                if exclusive(first, second, empty):
+                    continue
+                kind = graph.get(other).get('programRuleActionType')
+                findings.append(finding(
+                    WARNING, 'HIDE_CONFLICT',
+                    f"{field[0]} {field[1]} is hidden by '{hide_rule.get('name')}' and "
+                    f"{'made mandatory' if kind == 'SETMANDATORYFIELD' else 'assigned'} by "
+                    f"'{other_rule.get('name')}'" + (f" in stage {stage}" if stage else "")
+                    + "; both conditions can hold", hide_rule.get('id'), other[1]))
+
+
+def _overlap(first, second):
+    """Whether two rules can run for the same event"""
+    if ref_id(first.get('program')) != ref_id(second.get('program')):
+        return False
+    first_stage, second_stage = ref_id(first.get('programStage')), ref_id(second.get('programStage'))
+    return first_stage is None or second_stage is None or first_stage == second_stage
@@ -0,0 +1,697 @@
+#!/usr/bin/env python3
+"""
+Columnar program-rule evaluation over large event sets.
+
+Instead of interpreting every condition per event (common/program_rules.py),
+the events are turned into one dictionary-encoded NumPy column per rule
+variable (integer codes into the field's distinct values) and each
+condition is compiled once into operations over whole columns. Logic,
+comparisons, arithmetic, d2:hasValue and the d2:*Between date functions
+run as array operations; other d2: functions and mixed-type cases run the
+scalar engine once per distinct argument tuple, so results match the
+per-event engine exactly. ASSIGN actions update the columns in priority
+order, as they would per event.
+
+    events = load_events(path)            # exported events or synthetic ones
+    result = evaluate_batch(engine, events)
+    result.rule_rates(), result.stage_rates()
+
+Exported events are grouped by enrollment (or tracked entity) and ordered
+by date, so "newest in stage" and "previous event" variables see the
+earlier events of the same enrollment; an event's own previousEvents are
+used when given. Without NumPy the per-event engine is used instead.
+"""
+import json
+import re
+from collections import Counter
+
+from common.expression_parser import Binary, Call, ExpressionError, Literal, Ref, Unary, parse
+from common.metadata_stream import iter_objects
+from common.program_rules import (BOOLEAN_TYPES, ENVIRONMENT, NUMERIC_TYPES, RuleError, _date,
+                                  _truthy, _values, arity_error, display, evaluate, has_value, typed)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def load_events(path):
+    """Events from a DHIS2 export ({"events": [...]} or tracker "instances") or JSONL"""
+    with open(path, 'rb') as f:
+        head = f.read(1024).lstrip()
+    if head.startswith(b'['):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    if head.startswith(b'{'):
+        try:
+            events = list(iter_objects(path, 'events'))
+            return events or list(iter_objects(path, 'instances'))
+        except (ValueError, RuntimeError):
+            pass
+    with open(path, encoding='utf-8') as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    if len(events) == 1 and 'programStage' not in events[0]:
+        return events[0].get('events') or events[0].get('instances') or []
+    return events
+
+
+class Vec:
+    """A column (or scalar) of values with its kind and rows that failed to evaluate.
+
+    Columns read from the events also carry their dictionary encoding
+    (values == uniques[codes]), which _elementwise() reuses.
+    """
+    __slots__ = ('kind', 'values', 'invalid', 'codes', 'uniques')
+
+    def __init__(self, kind, values, invalid=None, codes=None, uniques=None):
+        self.kind = kind          # 'num', 'bool', 'str' or 'any'
+        self.values = values
+        self.invalid = invalid    # bool array, or None when no row failed
+        self.codes = codes
+        self.uniques = uniques
+
+
+def _or(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a | b
+
+
+def _kind_of(value):
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, (int, float)):
+        return 'num'
+    return 'str' if isinstance(value, str) else 'any'
+
+
+def _key(value):
+    # 1, 1.0 and True are equal dict keys but not the same rule value
+    return value if type(value) is str else (type(value), value)
+
+
+def _dictionary(values):
+    """(codes, uniques) of a list of raw values; uniques[0] is None and code 0 'no value'"""
+    if set(map(type, values)) <= {str, type(None)}:
+        index = dict.fromkeys(values)
+        index.pop(None, None)
+        index.pop('', None)
+        found = list(index)
+        index = dict(zip(found, range(1, len(found) + 1)))
+        index[None] = index[''] = 0
+        codes = np.fromiter(map(index.__getitem__, values), dtype=np.int64, count=len(values))
+    else:
+        index = {}
+        found = []
+        codes = np.zeros(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            if value is None or value == '':
+                continue
+            key = _key(value)
+            if key not in index:
+                found.append(value)
+                index[key] = len(found)
+            codes[i] = index[key]
+    uniques = np.empty(len(found) + 1, dtype=object)
+    uniques[1:] = found
+    return codes, uniques
+
+
+class EventTable:
+    """Rule variable columns for the events to evaluate"""
+
+    def __init__(self, engine, events):
+        self.engine = engine
+        groups = {}        # group -> [(date, stage, dataValues, evaluated event or None)]
+        attributes = {}
+        for index, event in enumerate(events):
+            previous = event.get('previousEvents')
+            if previous is None:
+                group = event.get('enrollment') or event.get('trackedEntity') or ('event', index)
+            else:
+                group = ('event', index)
+                groups[group] = sorted(
+                    ((other.get('eventDate') or other.get('occurredAt') or '', other.get('programStage'),
+                      _values(other, 'dataValues', 'dataElement'), None) for other in previous),
+                    key=lambda row: row[0])
+            attributes.setdefault(group, {}).update(_values(event, 'attributes', 'attribute'))
+            groups.setdefault(group, []).append(
+                (event.get('eventDate') or event.get('occurredAt') or '', event.get('programStage'),
+                 _values(event, 'dataValues', 'dataElement'), event))
+        rows = []
+        row_groups = []
+        group_attributes = []
+        for group, group_rows in groups.items():
+            if not isinstance(group, tuple):
+                # Events of one enrollment in date order (previousEvents already come first)
+                group_rows = sorted(group_rows, key=lambda row: row[0])
+            rows.extend(group_rows)
+            row_groups.extend([len(group_attributes)] * len(group_rows))
+            group_attributes.append(attributes[group])
+        n = len(rows)
+        row_groups = np.array(row_groups, dtype=np.int64)
+        starts = np.ones(n, dtype=bool)
+        starts[1:] = row_groups[1:] != row_groups[:-1]
+        self.group_start = np.maximum.accumulate(np.where(starts, np.arange(n), 0)) if n else row_groups
+        self.all_stages = np.array([row[1] for row in rows], dtype=object)
+        self.rows = np.array([i for i, row in enumerate(rows) if row[3] is not None], dtype=np.int64)
+        self.events = [rows[i][3] for i in self.rows]
+        self.size = len(self.rows)
+        self.stage = self.all_stages[self.rows]
+        self.program = np.array([e.get('program') for e in self.events], dtype=object)
+
+        # One code column per data element over all rows (previous events included)
+        found = {v.data_element: ([], []) for v in engine.variables.values() if v.data_element}
+        for i, row in enumerate(rows):
+            for field, value in row[2].items():
+                entry = found.get(field)
+                if entry is not None:
+                    entry[0].append(i)
+                    entry[1].append(value)
+        self.fields = {}
+        self.field_uniques = {}
+        for field, (row_indexes, values) in found.items():
+            codes, self.field_uniques[field] = _dictionary(values)
+            self.fields[field] = np.zeros(n, dtype=np.int64)
+            self.fields[field][row_indexes] = codes
+
+        self.raw = {}      # variable -> (codes, uniques) for the evaluated events
+        attribute_columns = {}
+        evaluated_groups = row_groups[self.rows]
+        for variable in engine.variables.values():
+            source = variable.source
+            if source == 'TEI_ATTRIBUTE':
+                if variable.attribute not in attribute_columns:
+                    attribute_columns[variable.attribute] = _dictionary(
+                        [group_attributes[g].get(variable.attribute) for g in evaluated_groups.tolist()])
+                self.raw[variable.name] = attribute_columns[variable.attribute]
+            elif source == 'CALCULATED_VALUE' or variable.data_element not in self.fields:
+                self.raw[variable.name] = (np.zeros(self.size, dtype=np.int64), _NONE)
+            else:
+                self.raw[variable.name] = (self._fill(variable, include_current=True),
+                                           self.field_uniques[variable.data_element])
+        self._typed = {}
+        self._environment = {}
+
+    def _fill(self, variable, include_current):
+        """Codes of a data element variable, from the event itself and/or its predecessors"""
+        codes = self.fields[variable.data_element]
+        source = variable.source
+        if source == 'DATAELEMENT_NEWEST_EVENT_PROGRAM_STAGE':
+            codes = _forward_fill(codes, (codes != 0) & (self.all_stages == variable.program_stage),
+                                  self.group_start, include_current)
+        elif source == 'DATAELEMENT_NEWEST_EVENT_PROGRAM':
+            codes = _forward_fill(codes, codes != 0, self.group_start, include_current)
+        elif source == 'DATAELEMENT_PREVIOUS_EVENT':
+            codes = _forward_fill(codes, codes != 0, self.group_start, include_current=False)
+        return codes[self.rows]
+
+    def column(self, name):
+        """(Vec of typed values, present mask) for a variable"""
+        if name not in self._typed:
+            variable = self.engine.variables[name]
+            codes, uniques = self.raw[name]
+            self._typed[name] = (_typed_column(codes, uniques, variable.value_type), codes != 0)
+        return self._typed[name]
+
+    def raw_column(self, name):
+        codes, uniques = self.raw[name]
+        return Vec('any', uniques[codes], codes=codes, uniques=uniques)
+
+    def environment(self, name):
+        if name not in self._environment:
+            getter = ENVIRONMENT[name]
+            value_type = 'NUMBER' if name.endswith('_count') else 'TEXT'
+            codes, uniques = _dictionary([getter(event) for event in self.events])
+            self._environment[name] = (_typed_column(codes, uniques, value_type), codes != 0)
+        return self._environment[name]
+
+    def assign(self, action, mask, data):
+        """Apply an ASSIGN of a Vec to the rows in mask, like EventContext.assign()"""
+        match = re.fullmatch(r'\s*[#A]\{([^}]*)\}\s*', action['content'] or '')
+        if data is None:
+            data_codes, shown = np.zeros(self.size, dtype=np.int64), ['']
+        else:
+            data_codes, data_uniques = _encode(data, self.size)
+            shown = [display(value) for value in data_uniques]
+        present = np.array([value != '' for value in shown], dtype=bool)[data_codes]
+        for variable in self.engine.variables.values():
+            keep_previous = False
+            if match and variable.source == 'CALCULATED_VALUE' and variable.name == match.group(1):
+                rows = mask
+            elif action['attribute'] and variable.source == 'TEI_ATTRIBUTE':
+                rows = mask if variable.attribute == action['attribute'] else None
+            elif action['dataElement'] and variable.data_element == action['dataElement']:
+                if variable.source == 'DATAELEMENT_CURRENT_EVENT':
+                    rows = mask
+                elif variable.source == 'DATAELEMENT_NEWEST_EVENT_PROGRAM':
+                    rows, keep_previous = mask, True
+                elif variable.source == 'DATAELEMENT_NEWEST_EVENT_PROGRAM_STAGE':
+                    rows, keep_previous = mask & (self.stage == variable.program_stage), True
+                else:
+                    rows = None
+            else:
+                rows = None
+            if rows is None or not rows.any():
+                continue
+            codes, uniques = self.raw[variable.name]
+            # New values are appended to the variable's uniques; '' becomes 'no value'
+            mapping = np.array([len(uniques) + i if value != '' else 0 for i, value in enumerate(shown)],
+                               dtype=np.int64)
+            new_codes = np.where(rows, mapping[data_codes], codes)
+            if keep_previous:
+                # An empty value uncovers the newest value of the earlier events
+                empty = rows & ~present
+                if empty.any():
+                    new_codes[empty] = self._fill(variable, include_current=False)[empty]
+            added = np.empty(len(shown), dtype=object)
+            added[:] = shown
+            self.raw[variable.name] = (new_codes, np.concatenate((uniques, added)))
+            self._typed.pop(variable.name, None)
+
+
+_NONE = np.array([None], dtype=object) if np is not None else None
+
+
+def _forward_fill(codes, present, group_start, include_current=True):
+    """Per row, the code of the newest value at (or before) it within its group (0: none)"""
+    n = len(codes)
+    index = np.where(present, np.arange(n), -1)
+    last = np.maximum.accumulate(index) if n else index
+    if not include_current:
+        last = np.concatenate(([-1], last[:-1]))
+    valid = last >= group_start
+    filled = np.zeros(n, dtype=np.int64)
+    filled[valid] = codes[last[valid]]
+    return filled
+
+
+def _typed_column(codes, uniques, value_type):
+    """Typed Vec of a dictionary-encoded raw column (typing runs once per distinct value)"""
+    values = [typed(value, value_type) for value in uniques]
+    if value_type in BOOLEAN_TYPES:
+        return Vec('bool', np.array(values, dtype=bool)[codes])
+    typed_uniques = np.empty(len(values), dtype=object)
+    typed_uniques[:] = values
+    if value_type in NUMERIC_TYPES:
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            return Vec('num', np.array(values, dtype=float)[codes])
+        # Non-numeric text in a numeric field: keep values as the engine types them
+        return Vec('any', typed_uniques[codes], codes=codes, uniques=typed_uniques)
+    return Vec('str', typed_uniques[codes], codes=codes, uniques=typed_uniques)
+
+
+def _encode(vec, size):
+    """(codes, uniques) of a Vec, so that values == uniques[codes]"""
+    if vec.codes is not None:
+        return vec.codes, vec.uniques
+    values = vec.values
+    if not isinstance(values, np.ndarray):
+        uniques = np.empty(1, dtype=object)
+        uniques[0] = values
+        return np.zeros(size, dtype=np.int64), uniques
+    values = np.broadcast_to(values, (size,))
+    if values.dtype != object:
+        uniques, codes = np.unique(values, return_inverse=True)
+        as_object = np.empty(len(uniques), dtype=object)
+        as_object[:] = uniques.tolist()
+        return codes.reshape(-1), as_object
+    index = {}
+    found = []
+    codes = np.empty(size, dtype=np.int64)
+    for i, value in enumerate(values.tolist()):
+        key = _key(value)
+        code = index.get(key)
+        if code is None:
+            code = index[key] = len(found)
+            found.append(value)
+        codes[i] = code
+    uniques = np.empty(len(found), dtype=object)
+    uniques[:] = found
+    return codes, uniques
+
+
+def _elementwise(function, *vecs, size):
+    """Apply a scalar function once per distinct argument tuple; RuleError -> invalid row"""
+    if any(v.values is None and v.invalid is not None for v in vecs):
+        return Vec('any', None, np.ones(size, dtype=bool))
+    encoded = [_encode(v, size) for v in vecs]
+    key = np.zeros(size, dtype=np.int64)
+    combinations = 1
+    for codes, uniques in encoded:
+        combinations *= max(len(uniques), 1)
+        if combinations >= 2 ** 62:
+            break
+        key = key * len(uniques) + codes
+    if combinations >= 2 ** 62:
+        combos, inverse = np.unique(np.stack([codes for codes, _ in encoded], axis=1),
+                                    axis=0, return_inverse=True)
+        arg_codes = [combos[:, i] for i in range(len(encoded))]
+    else:
+        combos, inverse = np.unique(key, return_inverse=True)
+        arg_codes = []
+        for codes, uniques in reversed(encoded):
+            arg_codes.append(combos % len(uniques))
+            combos = combos // len(uniques)
+        arg_codes.reverse()
+    inverse = inverse.reshape(-1)
+    columns = [uniques[codes].tolist() for codes, (_, uniques) in zip(arg_codes, encoded)]
+    results = []
+    failed = []
+    for args in zip(*columns):
+        try:
+            results.append(function(*args))
+            failed.append(False)
+        except RuleError:
+            results.append(None)
+            failed.append(True)
+    failed = np.array(failed, dtype=bool)
+    invalid_mask = _or(failed[inverse] if failed.any() else None, _merge_invalid(vecs))
+    kinds = {_kind_of(value) for value, bad in zip(results, failed) if not bad}
+    if kinds == {'bool'}:
+        return Vec('bool', np.array([bool(v) for v in results], dtype=bool)[inverse], invalid_mask)
+    if kinds == {'num'}:
+        return Vec('num', np.array([v or 0 for v in results], dtype=float)[inverse], invalid_mask)
+    uniques = np.empty(len(results), dtype=object)
+    uniques[:] = results
+    return Vec('str' if kinds == {'str'} else 'any', uniques[inverse], invalid_mask, inverse, uniques)
+
+
+def _merge_invalid(vecs):
+    invalid = None
+    for vec in vecs:
+        invalid = _or(invalid, vec.invalid)
+    return invalid
+
+
+def _python(value):
+    """NumPy scalars as the plain Python values the scalar engine expects"""
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _scalar_binary(op):
+    return lambda a, b: evaluate(Binary(op, Literal(_python(a)), Literal(_python(b))), None)
+
+
+def _scalar_call(name):
+    return lambda *args: evaluate(Call(name, [Literal(_python(a)) for a in args]), None)
+
+
+_BETWEEN = {'d2:daysBetween': 'days', 'd2:weeksBetween': 'weeks',
+            'd2:monthsBetween': 'months', 'd2:yearsBetween': 'years'}
+
+
+class Compiler:
+    """Turns an expression tree into a function of an EventTable"""
+
+    def __init__(self, table):
+        self.table = table
+        self.size = table.size
+
+    def truthy(self, vec):
+        if vec.kind == 'bool':
+            values = vec.values
+        elif vec.kind == 'num':
+            values = vec.values != 0
+        elif vec.values is None:
+            values = False
+        else:
+            codes, uniques = _encode(vec, self.size)
+            values = np.array([_truthy(value) for value in uniques], dtype=bool)[codes]
+        return np.broadcast_to(np.asarray(values, dtype=bool), (self.size,))
+
+    def run(self, node):
+        if isinstance(node, Literal):
+            return Vec(_kind_of(node.value), node.value)
+        if isinstance(node, Ref):
+            return self.ref(node)
+        if isinstance(node, Unary):
+            operand = self.run(node.operand)
+            if node.op == '!':
+                return Vec('bool', ~self.truthy(operand), operand.invalid)
+            if operand.kind == 'num':
+                return Vec('num', -operand.values if node.op == '-' else operand.values, operand.invalid)
+            return _elementwise(lambda v: evaluate(Unary(node.op, Literal(_python(v))), None),
+                                operand, size=self.size)
+        if isinstance(node, Binary):
+            return self.binary(node)
+        if isinstance(node, Call):
+            return self.call(node)
+        raise RuleError(f"Cannot evaluate {node!r}")
+
+    def ref(self, node):
+        if node.kind == 'V':
+            if node.name not in ENVIRONMENT:
+                return self.failed()
+            return self.table.environment(node.name)[0]
+        if node.name in self.table.engine.variables:
+            return self.table.column(node.name)[0]
+        return self.failed()
+
+    def failed(self):
+        return Vec('any', None, np.ones(self.size, dtype=bool))
+
+    def present(self, node):
+        """d2:hasValue() of a variable argument"""
+        if isinstance(node, Literal) and isinstance(node.value, str):
+            node = Ref('#', node.value)
+        if not isinstance(node, Ref):
+            vec = self.run(node)
+            return Vec('bool', np.broadcast_to(
+                _elementwise(has_value, vec, size=self.size).values.astype(bool), (self.size,)), vec.invalid)
+        if node.kind == 'V':
+            if node.name not in ENVIRONMENT:
+                return self.failed()
+            return Vec('bool', self.table.environment(node.name)[1])
+        if node.name not in self.table.engine.variables:
+            return self.failed()
+        return Vec('bool', self.table.column(node.name)[1])
+
+    def binary(self, node):
+        op = node.op
+        left = self.run(node.left)
+        if op in ('&&', '||'):
+            right = self.run(node.right)
+            a, b = self.truthy(left), self.truthy(right)
+            if op == '&&':
+                # The right side is only evaluated (and can only fail) where the left is true
+                invalid = _or(left.invalid, None if right.invalid is None else right.invalid & a)
+                return Vec('bool', a & b, invalid)
+            invalid = _or(left.invalid, None if right.invalid is None else right.invalid & ~a)
+            return Vec('bool', a | b, invalid)
+        right = self.run(node.right)
+        invalid = _or(left.invalid, right.invalid)
+        numeric = left.kind in ('num', 'bool') and right.kind in ('num', 'bool')
+        if op in ('==', '!=', '<', '<=', '>', '>='):
+            if numeric or (left.kind == right.kind == 'str'):
+                a, b = left.values, right.values
+                if numeric:
+                    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+                result = {'==': np.equal, '!=': np.not_equal, '<': np.less, '<=': np.less_equal,
+                          '>': np.greater, '>=': np.greater_equal}[op](a, b)
+                return Vec('bool', np.broadcast_to(np.asarray(result, dtype=bool), (self.size,)), invalid)
+        elif numeric and op in ('+', '-', '*'):
+            a, b = np.asarray(left.values, dtype=float), np.asarray(right.values, dtype=float)
+            result = a + b if op == '+' else a - b if op == '-' else a * b
+            return Vec('num', np.broadcast_to(result, (self.size,)), invalid)
+        return _elementwise(_scalar_binary(op), left, right, size=self.size)
+
+    def call(self, node):
+        name = node.name
+        if arity_error(node):
+            # Fails for every event, as in the scalar engine
+            return self.failed()
+        if name == 'd2:hasValue':
+            return self.present(node.args[0])
+        if name == 'd2:condition' and len(node.args) == 3:
+            test = node.args[0]
+            if isinstance(test, Literal) and isinstance(test.value, str):
+                try:
+                    test = parse(test.value)
+                except ExpressionError:
+                    return self.failed()
+            test = self.run(test)
+            when_true, when_false = self.run(node.args[1]), self.run(node.args[2])
+            mask = self.truthy(test)
+            kind = when_true.kind if when_true.kind == when_false.kind else 'any'
+            values = np.where(mask, np.broadcast_to(np.asarray(when_true.values, dtype=object), (self.size,)),
+                              np.broadcast_to(np.asarray(when_false.values, dtype=object), (self.size,)))
+            if kind == 'num':
+                values = values.astype(float)
+            elif kind == 'bool':
+                values = values.astype(bool)
+            invalid = _or(test.invalid, _or(None if when_true.invalid is None else when_true.invalid & mask,
+                                            None if when_false.invalid is None else when_false.invalid & ~mask))
+            return Vec(kind, values, invalid)
+        if name in ('d2:count', 'd2:countIfZeroPos', 'd2:countIfValue') and node.args \
+                and isinstance(node.args[0], (Ref, Literal)):
+            # These read the variable's raw value; run per distinct value
+            raw = self.raw_vec(node.args[0])
+            others = [self.run(arg) for arg in node.args[1:]]
+            return _elementwise(lambda value, *rest: evaluate(
+                Call(name, [_RawRef(value)] + [Literal(_python(r)) for r in rest]), _RAW_CONTEXT),
+                raw, *others, size=self.size)
+        args = [self.run(arg) for arg in node.args]
+        if name in _BETWEEN and len(args) == 2:
+            return self.between(_BETWEEN[name], *args)
+        return _elementwise(_scalar_call(name), *args, size=self.size)
+
+    def between(self, unit, start, end):
+        """d2:daysBetween() and friends; dates are parsed once per distinct value"""
+        if start.values is None or end.values is None:
+            return self.failed()
+        inherited = _merge_invalid((start, end))
+        (start, start_bad), (end, end_bad) = self.dates(start), self.dates(end)
+        days = end[:, 0] - start[:, 0]
+        if unit == 'days':
+            result = days
+        elif unit == 'weeks':
+            result = np.trunc(days / 7)
+        else:
+            later = np.where((days < 0)[:, None], start, end)
+            earlier = np.where((days < 0)[:, None], end, start)
+            months = ((later[:, 1] - earlier[:, 1]) * 12 + later[:, 2] - earlier[:, 2]
+                      - (later[:, 3] < earlier[:, 3]))
+            months = np.where(days < 0, -months, months)
+            result = months if unit == 'months' else np.trunc(months / 12)
+        return Vec('num', result.astype(float), _or(inherited, _or(start_bad, end_bad)))
+
+    def dates(self, vec):
+        """(rows of [ordinal, year, month, day], unparseable rows or None) for a Vec"""
+        codes, uniques = _encode(vec, self.size)
+        parts = np.zeros((len(uniques), 4), dtype=np.int64)
+        bad = np.zeros(len(uniques), dtype=bool)
+        for i, value in enumerate(uniques.tolist()):
+            try:
+                day = _date(value)
+            except RuleError:
+                bad[i] = True
+                continue
+            parts[i] = (day.toordinal(), day.year, day.month, day.day)
+        return parts[codes], bad[codes] if bad.any() else None
+
+    def raw_vec(self, node):
+        if isinstance(node, Literal):
+            node = Ref('#', node.value)
+        if node.kind == 'V' or node.name not in self.table.engine.variables:
+            return self.failed()
+        return self.table.raw_column(node.name)
+
+
+class _RawRef(Ref):
+    """A reference whose raw value is already known (for d2:count and friends)"""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        super().__init__('#', '')
+        self.value = value
+
+
+class _RawContext:
+    def lookup(self, ref):
+        return _python(ref.value), 'TEXT'
+
+
+_RAW_CONTEXT = _RawContext()
+
+
+class BatchResult:
+    """Fire counts of every rule over an event set"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.events = 0
+        self.stage_events = Counter()
+        self.fired = Counter()
+        self.applicable = Counter()
+        self.errors = Counter()
+        self.stage_fired = Counter()
+        self.masks = {}
+
+    def rule_rates(self):
+        """[(rule, fired, applicable events)] in rule order"""
+        return [(rule, self.fired[rule['id']], self.applicable[rule['id']]) for rule in self.engine.rules]
+
+    def stage_rates(self):
+        """{stage: [(rule, fired, events of the stage)]} for rules that apply to the stage"""
+        rates = {}
+        for stage, count in sorted(self.stage_events.items(), key=lambda item: str(item[0])):
+            rates[stage] = [(rule, self.stage_fired[(rule['id'], stage)], count)
+                            for rule in self.engine.rules if rule['stage'] in (None, stage)]
+        return rates
+
+    def as_dict(self):
+        return {
+            'events': self.events,
+            'stages': {str(stage): count for stage, count in self.stage_events.items()},
+            'rules': [{'id': rule['id'], 'name': rule['name'], 'stage': rule['stage'],
+                       'fired': fired, 'applicable': applicable,
+                       'rate': round(fired / applicable, 4) if applicable else None,
+                       'errors': self.errors[rule['id']],
+                       'byStage': {str(stage): self.stage_fired[(rule['id'], stage)]
+                                   for stage in self.stage_events if rule['stage'] in (None, stage)}}
+                      for rule, fired, applicable in self.rule_rates()],
+        }
+
+
+def evaluate_batch(engine, events, keep_masks=False):
+    """Fire counts for all rules over events (columnar with NumPy, per event without)"""
+    if np is None:
+        return _evaluate_each(engine, events)
+    table = EventTable(engine, events)
+    compiler = Compiler(table)
+    result = BatchResult(engine)
+    result.events = table.size
+    result.stage_events.update(table.stage.tolist())
+    for rule in engine.rules:
+        applicable = np.ones(table.size, dtype=bool)
+        if rule['stage'] is not None:
+            applicable &= table.stage == rule['stage']
+        applicable &= (table.program == None) | (table.program == rule['program'])  # noqa: E711
+        try:
+            condition = compiler.run(rule['condition'])
+        except RuleError:
+            condition = compiler.failed()
+        fired = compiler.truthy(condition) & applicable
+        if condition.invalid is not None:
+            errors = condition.invalid & applicable
+            fired &= ~errors
+            result.errors[rule['id']] = int(errors.sum())
+        result.applicable[rule['id']] = int(applicable.sum())
+        result.fired[rule['id']] = int(fired.sum())
+        if result.fired[rule['id']]:
+            result.stage_fired.update({(rule['id'], stage): count for stage, count
+                                       in Counter(table.stage[fired].tolist()).items()})
+        if keep_masks:
+            result.masks[rule['id']] = fired
+        for action in rule['actions']:
+            if action['type'] != 'ASSIGN' or not fired.any():
+                continue
+            try:
+                data = None if action['data'] is None else compiler.run(action['data'])
+            except RuleError:
+                continue
+            mask = fired if data is None or data.invalid is None else fired & ~data.invalid
+            if data is not None and data.values is None:
+                continue
+            table.assign(action, mask, data)
+    return result
+
+
+def _evaluate_each(engine, events):
+    result = BatchResult(engine)
+    for event in events:
+        stage = event.get('programStage')
+        result.events += 1
+        result.stage_events[stage] += 1
+        for rule in engine.rules_for(event):
+            result.applicable[rule['id']] += 1
+        evaluation = engine.evaluate(event)
+        for rule_id in evaluation.fired:
+            result.fired[rule_id] += 1
+            result.stage_fired[(rule_id, stage)] += 1
+        result.errors.update(rule_id for rule_id in evaluation.errors if rule_id in result.applicable)
+    return result
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Indexed graph of program rules and the metadata they touch.
+
+Rules, actions, rule variables, data elements, attributes, stages, sections
+and programs become nodes ((kind, uid) tuples); every link is indexed in
+both directions, so "which rules touch this data element" is a couple of
+dict lookups instead of a scan over every list of the bundle:
+
+    graph = RuleGraph.from_bundle()
+    graph.targets(('rule', uid), 'action')            # the rule's actions
+    graph.sources(('dataElement', uid), 'targets')    # actions aimed at a DE
+    graph.rules_touching(uid)                          # {rule: {'reads', 'HIDEFIELD', ...}}
+
+Links (source -relation-> target):
+
+    rule      -action->    action        rule/action -reads-> variable
+    action    -targets->   dataElement / attribute / section / stage / variable
+    variable  -binds->     dataElement / attribute
+    rule / variable / section -inStage-> stage
+    rule / variable / stage   -inProgram-> program
+    stage / section -has-> dataElement   program -has-> attribute
+
+Variables are referenced by name in conditions (#{name}, A{name}) and are
+resolved within the rule's program; references that match no variable are
+kept in graph.unresolved. Queries from the command line:
+
+    python3 scripts/common/rule_graph.py de AswNlG485pW
+    python3 scripts/common/rule_graph.py rule "HIDE: Biopsy performed"
+    python3 scripts/common/rule_graph.py hidden
+"""
+import argparse
+import json
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+if __name__ == '__main__':
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.expression_parser import ExpressionError, parse, refs
+from common.metadata_store import MetadataCollection, get_store, ref_id
+from common.metadata_stream import iter_objects
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_BUNDLE = BASE_DIR / "artifacts" / "bundles" / "programs_bundle_cancer.json"
+TYPES = ('programs', 'programStages', 'programStageSections', 'programRules',
+         'programRuleActions', 'programRuleVariables')
+# Node kind of each metadata type
+KINDS = {
+    'programs': 'program',
+    'programStages': 'stage',
+    'programStageSections': 'section',
+    'programRules': 'rule',
+    'programRuleActions': 'action',
+    'programRuleVariables': 'variable',
+}
+# Action field -> kind of the node the action is aimed at
+ACTION_TARGETS = (
+    ('dataElement', 'dataElement'),
+    ('trackedEntityAttribute', 'attribute'),
+    ('programStageSection', 'section'),
+    ('programStage', 'stage'),
+)
+VARIABLE_CONTENT = re.compile(r'\s*[#A]\{([^}]*)\}\s*')
+
+
+class RuleGraph:
+    """Program rule metadata as a graph with forward and reverse indexes"""
+
+    def __init__(self, objects):
+        """objects: {metadata type: [objects]} for (a subset of) TYPES"""
+        self.collections = {type_key: MetadataCollection(type_key, list(objects.get(type_key) or []))
+                            for type_key in TYPES}
+        self._out = defaultdict(lambda: defaultdict(set))
+        self._in = defaultdict(lambda: defaultdict(set))
+        self.unresolved = defaultdict(list)     # node -> ['#{name}', ...]
+        self.parse_errors = {}                  # node -> message
+        self.expressions = {}                   # node -> parsed condition / action data
+        self._variables = {}                    # (program, name) -> variable uid
+        self._positions = {action.get('id'): index for index, action
+                           in enumerate(self.collections['programRuleActions'])}
+
+        for program in self.collections['programs']:
+            node = ('program', program.get('id'))
+            for item in program.get('programTrackedEntityAttributes') or []:
+                self.link(node, 'has', ('attribute', ref_id(item.get('trackedEntityAttribute'))))
+        for stage in self.collections['programStages']:
+            node = ('stage', stage.get('id'))
+            self._link_ref(node, 'inProgram', 'program', stage.get('program'))
+            for item in stage.get('programStageDataElements') or []:
+                self.link(node, 'has', ('dataElement', ref_id(item.get('dataElement'))))
+        for section in self.collections['programStageSections']:
+            node = ('section', section.get('id'))
+            self._link_ref(node, 'inStage', 'stage', section.get('programStage'))
+            for element in section.get('dataElements') or []:
+                self.link(node, 'has', ('dataElement', ref_id(element)))
+
+        for variable in self.collections['programRuleVariables']:
+            node = ('variable', variable.get('id'))
+            program = ref_id(variable.get('program'))
+            self._variables.setdefault((program, variable.get('name')), variable.get('id'))
+            self._variables.setdefault((None, variable.get('name')), variable.get('id'))
+            self._link_ref(node, 'inProgram', 'program', program)
+            self._link_ref(node, 'inStage', 'stage', variable.get('programStage'))
+            self._link_ref(node, 'binds', 'dataElement', variable.get('dataElement'))
+            self._link_ref(node, 'binds', 'attribute', variable.get('trackedEntityAttribute'))
+
+        programs = {}
+        for rule in self.collections['programRules']:
+            node = ('rule', rule.get('id'))
+            programs[rule.get('id')] = ref_id(rule.get('program'))
+            self._link_ref(node, 'inProgram', 'program', rule.get('program'))
+            self._link_ref(node, 'inStage', 'stage', rule.get('programStage'))
+            self._link_expression(node, rule.get('condition') or 'true', programs[rule.get('id')])
+        for action in self.collections['programRuleActions']:
+            node = ('action', action.get('id'))
+            rule_id = ref_id(action.get('programRule'))
+            if rule_id is not None:
+                self.link(('rule', rule_id), 'action', node)
+            for field, kind in ACTION_TARGETS:
+                self._link_ref(node, 'targets', kind, action.get(field))
+            program = programs.get(rule_id)
+            match = VARIABLE_CONTENT.fullmatch(action.get('content') or '')
+            if match and action.get('programRuleActionType') == 'ASSIGN':
+                variable = self.variable(match.group(1), program)
+                if variable is not None:
+                    self.link(node, 'targets', ('variable', variable))
+            if (action.get('data') or '').strip():
+                self._link_expression(node, action['data'], program, literal_ok=True)
+
+    @classmethod
+    def from_bundle(cls, path=DEFAULT_BUNDLE):
+        """Graph of a metadata bundle (streamed type by type)"""
+        return cls({type_key: iter_objects(path, type_key) for type_key in TYPES})
+
+    @classmethod
+    def from_store(cls, store=None):
+        """Graph of the rule files (and the program files the store knows about)"""
+        store = store or get_store()
+        objects = {}
+        for type_key in TYPES:
+            try:
+                objects[type_key] = store[type_key].objects
+            except (KeyError, OSError):
+                objects[type_key] = []
+        return cls(objects)
+
+    def link(self, source, relation, target):
+        if target[1] is None:
+            return
+        self._out[source][relation].add(target)
+        self._in[target][relation].add(source)
+
+    def _link_ref(self, node, relation, kind, ref):
+        self.link(node, relation, (kind, ref_id(ref)))
+
+    def _link_expression(self, node, text, program, literal_ok=False):
+        try:
+            tree = parse(text)
+        except ExpressionError as e:
+            if not literal_ok:
+                self.parse_errors[node] = str(e)
+            return
+        self.expressions[node] = tree
+        for ref in refs(tree):
+            if ref.kind not in '#A':
+                continue
+            variable = self.variable(ref.name, program)
+            if variable is not None:
+                self.link(node, 'reads', ('variable', variable))
+            elif ref.kind == 'A' and ('attribute', ref.name) in self._in:
+                self.link(node, 'reads', ('attribute', ref.name))
+            else:
+                self.unresolved[node].append(f"{ref.kind}{{{ref.name}}}")
+
+    def variable(self, name, program=None):
+        """uid of the variable called name (in program, else in any program)"""
+        return self._variables.get((program, name)) or self._variables.get((None, name))
+
+    # Navigation
+
+    def targets(self, node, relation=None):
+        """Nodes node links to (through relation, or any)"""
+        links = self._out.get(node, {})
+        if relation is not None:
+            return set(links.get(relation, ()))
+        return set().union(*links.values()) if links else set()
+
+    def sources(self, node, relation=None):
+        """Nodes linking to node (through relation, or any)"""
+        links = self._in.get(node, {})
+        if relation is not None:
+            return set(links.get(relation, ()))
+        return set().union(*links.values()) if links else set()
+
+    def get(self, node):
+        """The metadata object of a node (None for data elements, attributes, unknown uids)"""
+        kind, uid = node
+        for type_key, type_kind in KINDS.items():
+            if type_kind == kind:
+                return self.collections[type_key].get(uid)
+        return None
+
+    def name(self, node):
+        kind, uid = node
+        obj = self.get(node)
+        return obj.get('name') or uid if obj else uid
+
+    def find_rule(self, key):
+        """Rule by uid or exact name"""
+        rules = self.collections['programRules']
+        return rules.get(key) or rules.by_name.get(key)
+
+    def rule_of(self, action_id):
+        rules = self.sources(('action', action_id), 'action')
+        return next(iter(rules))[1] if rules else None
+
+    def actions_of(self, rule_id):
+        """A rule's actions, in bundle order"""
+        actions = self.collections['programRuleActions']
+        found = [actions.get(uid) for _, uid in self.targets(('rule', rule_id), 'action') if uid in actions]
+        return sorted(found, key=lambda action: self._positions[action.get('id')])
+
+    def field_of(self, variable_id):
+        """(kind, uid) of the data element / attribute a variable reads, or None"""
+        bound = self.targets(('variable', variable_id), 'binds')
+        return next(iter(bound)) if bound else None
+
+    # Queries
+
+    def rules_touching(self, uid, kind='dataElement'):
+        """{rule uid: set of 'reads' and/or the types of its actions aimed at the field}"""
+        field = (kind, uid)
+        touching = defaultdict(set)
+        for action in self.sources(field, 'targets'):
+            rule = self.rule_of(action[1])
+            if rule is not None:
+                touching[rule].add(self.get(action).get('programRuleActionType'))
+        readers = self.sources(field, 'reads')
+        for variable in self.sources(field, 'binds'):
+            readers |= self.sources(variable, 'reads')
+        for reader in readers:
+            rule = reader[1] if reader[0] == 'rule' else self.rule_of(reader[1])
+            if rule is not None:
+                touching[rule].add('reads')
+        return dict(touching)
+
+    def hidden_fields(self):
+        """{(kind, uid): HIDEFIELD action uids} for every field some rule hides"""
+        hidden = defaultdict(set)
+        for action in self.collections['programRuleActions']:
+            if action.get('programRuleActionType') == 'HIDEFIELD':
+                for field in self.targets(('action', action.get('id')), 'targets'):
+                    if field[0] in ('dataElement', 'attribute'):
+                        hidden[field].add(action.get('id'))
+        return dict(hidden)
+
+    def hidden_field_references(self):
+        """Non-HIDEFIELD actions that write or read a field some rule hides.
+
+        [(action uid, field, 'targets' or 'reads', hiding action uids)]
+        """
+        found = []
+        for field, hiding in sorted(self.hidden_fields().items()):
+            for action in sorted(self.sources(field, 'targets')):
+                if self.get(action).get('programRuleActionType') != 'HIDEFIELD':
+                    found.append((action[1], field, 'targets', sorted(hiding)))
+            for variable in sorted(self.sources(field, 'binds')):
+                for reader in sorted(self.sources(variable, 'reads')):
+                    if reader[0] == 'action':
+                        found.append((reader[1], field, 'reads', sorted(hiding)))
+        return found
+
+
+def describe_rule(graph, rule):
+    """Printable lines for a rule with its actions and variables"""
+    node = ('rule', rule.get('id'))
+    stage = ref_id(rule.get('programStage'))
+    lines = [f"Rule: {rule.get('name')} (id: {rule.get('id')})",
+             f"  Program: {ref_id(rule.get('program'))}",
+             f"  Stage: {stage}",
+             f"  Condition: {rule.get('condition')}"]
+    actions = graph.actions_of(rule.get('id'))
+    lines.append(f"  Actions: {len(actions)}")
+    for action in actions:
+        target = ', '.join(f"{kind} {uid}" for kind, uid
+                           in sorted(graph.targets(('action', action.get('id')), 'targets'))) or '-'
+        lines.append(f"    - {action.get('programRuleActionType')}: {target}")
+    variables = sorted(graph.targets(node, 'reads'), key=graph.name)
+    lines.append(f"  Variables: {len(variables)}")
+    for variable in variables:
+        field = graph.field_of(variable[1])
+        lines.append(f"    - {graph.name(variable)}: {' '.join(field) if field else '-'}")
+    for ref in graph.unresolved.get(node, []):
+        lines.append(f"    ⚠️  unresolved {ref}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the program rule graph of a bundle")
+    parser.add_argument('--bundle', type=Path, default=DEFAULT_BUNDLE,
+                        help=f"metadata bundle (default: {DEFAULT_BUNDLE.relative_to(BASE_DIR)})")
+    parser.add_argument('--json', action='store_true', help="print the answer as JSON")
+    queries = parser.add_subparsers(dest='query', required=True)
+    de = queries.add_parser('de', help="rules that read or act on a data element")
+    de.add_argument('uid')
+    attribute = queries.add_parser('attribute', help="rules that read or act on an attribute")
+    attribute.add_argument('uid')
+    rule = queries.add_parser('rule', help="a rule's actions, variables and fields")
+    rule.add_argument('key', help="uid or exact name")
+    variable = queries.add_parser('variable', help="a variable's field and the rules reading it")
+    variable.add_argument('name')
+    stage = queries.add_parser('stage', help="rules and variables tied to a program stage")
+    stage.add_argument('uid')
+    queries.add_parser('hidden', help="actions that write or read fields other rules hide")
+    args = parser.parse_args()
+
+    graph = RuleGraph.from_bundle(args.bundle)
+    rules = graph.collections['programRules']
+
+    if args.query in ('de', 'attribute'):
+        kind = 'dataElement' if args.query == 'de' else 'attribute'
+        touching = graph.rules_touching(args.uid, kind)
+        if args.json:
+            print(json.dumps({uid: sorted(uses) for uid, uses in sorted(touching.items())}, indent=2))
+            return
+        print(f"📊 {len(touching)} rules touch {kind} {args.uid}")
+        for uid, uses in sorted(touching.items(), key=lambda item: graph.name(('rule', item[0]))):
+            stage_id = ref_id(rules.get(uid, {}).get('programStage'))
+            print(f"   {', '.join(sorted(uses)):<24} {graph.name(('rule', uid))} (stage: {stage_id})")
+    elif args.query == 'rule':
+        found = graph.find_rule(args.key)
+        if found is None:
+            print(f"❌ No rule {args.key!r}")
+            sys.exit(1)
+        if args.json:
+            node = ('rule', found.get('id'))
+            print(json.dumps({'id': found.get('id'), 'name': found.get('name'),
+                              'actions': [a.get('id') for a in graph.actions_of(found.get('id'))],
+                              'variables': sorted(uid for _, uid in graph.targets(node, 'reads')),
+                              'unresolved': graph.unresolved.get(node, [])}, indent=2))
+            return
+        print('\n'.join(describe_rule(graph, found)))
+    elif args.query == 'variable':
+        uid = graph.variable(args.name)
+        if uid is None:
+            print(f"❌ No variable {args.name!r}")
+            sys.exit(1)
+        node = ('variable', uid)
+        readers = sorted({reader[1] if reader[0] == 'rule' else graph.rule_of(reader[1])
+                          for reader in graph.sources(node, 'reads')} - {None})
+        field = graph.field_of(uid)
+        if args.json:
+            print(json.dumps({'id': uid, 'field': list(field) if field else None, 'rules': readers}, indent=2))
+            return
+        print(f"Variable: {args.name} (id: {uid}) -> {' '.join(field) if field else '-'}")
+        print(f"  Read by {len(readers)} rules:")
+        for rule_id in readers:
+            print(f"    - {graph.name(('rule', rule_id))}")
+    elif args.query == 'stage':
+        node = ('stage', args.uid)
+        stage_rules = sorted(uid for _, uid in graph.sources(node, 'inStage') if uid in rules)
+        stage_variables = sorted(uid for kind, uid in graph.sources(node, 'inStage') if kind == 'variable')
+        if args.json:
+            print(json.dumps({'rules': stage_rules, 'variables': stage_variables,
+                              'dataElements': sorted(uid for _, uid in graph.targets(node, 'has'))}, indent=2))
+            return
+        print(f"📋 Stage {graph.name(node)}: {len(stage_rules)} rules, {len(stage_variables)} variables, "
+              f"{len(graph.targets(node, 'has'))} data elements")
+        for uid in stage_rules:
+            print(f"   - {graph.name(('rule', uid))}")
+    else:
+        found = graph.hidden_field_references()
+        if args.json:
+            print(json.dumps([{'action': action, 'rule': graph.rule_of(action), 'field': list(field),
+                               'use': use, 'hiddenBy': hiding} for action, field, use, hiding in found],
+                             indent=2))
+            return
+        print(f"📊 {len(graph.hidden_fields())} fields are hidden by rules; "
+              f"{len(found)} other actions write or read them")
+        for action, field, use, hiding in found:
+            kind = graph.get(('action', action)).get('programRuleActionType')
+            hidden_by = ', '.join(sorted({graph.name(('rule', graph.rule_of(uid))) for uid in hiding}))
+            print(f"   {kind:<18} {use:<7} {field[0]} {field[1]}  [{graph.name(('rule', graph.rule_of(action)))}]")
+            print(f"   {'':<18} hidden by: {hidden_by}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Error-recovering streaming loader for DHIS2 metadata files.
+
+Metadata exports are a top-level object whose values are mostly arrays of
+objects ({"dataElements": [...], "system": {...}}). This loader reads the
+file in chunks and yields array items one by one. Each item is decoded on
+its own, so a malformed object is reported (with exact byte offsets) and
+skipped instead of aborting the whole file. Stray/missing commas between
+items and data appended after the closing brace are tolerated too.
+
+Only the current item is held in memory, never the whole raw text.
+
+Usage:
+    python3 scripts/common/tolerant_json.py "Data Element/Data Element.json"
+    python3 scripts/common/tolerant_json.py FILE --salvage OUT.json --quarantine DIR
+"""
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+CHUNK_SIZE = 1 << 16
+WHITESPACE = b' \t\r\n'
+
+_STRUCTURAL = re.compile(rb'[{}\[\]"]')
+_STRING_END = re.compile(rb'["\\]')
+_SCALAR_END = re.compile(rb'[,\]}:\s]')
+_ITEM_START = re.compile(rb'\n[ \t]*[{\]]')
+_CLOSERS = {ord('}'): ord('{'), ord(']'): ord('[')}
+
+
+class Malformed:
+    """One skipped region of a file"""
+
+    def __init__(self, type_key, index, start, end, error, raw=None):
+        self.type_key = type_key
+        self.index = index
+        self.start = start
+        self.end = end
+        self.error = error
+        self.raw = raw
+
+    def as_dict(self, with_raw=False):
+        record = {
+            'type': self.type_key,
+            'index': self.index,
+            'start': self.start,
+            'end': self.end,
+            'error': self.error,
+        }
+        if with_raw and self.raw is not None:
+            record['raw'] = self.raw.decode('utf-8', errors='replace')
+        return record
+
+    def __str__(self):
+        where = f"{self.type_key}[{self.index}]" if self.index is not None else (self.type_key or "<top>")
+        return f"bytes {self.start}-{self.end} ({where}): {self.error}"
+
+
+class LoadReport:
+    """What a tolerant load salvaged and what it skipped"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.items = {}
+        self.errors = []
+        self.warnings = []
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def count(self, type_key):
+        self.items[type_key] = self.items.get(type_key, 0) + 1
+
+    def summary(self):
+        lines = [f"{self.path}:"]
+        for type_key, count in sorted(self.items.items()):
+            lines.append(f"  {type_key}: {count} items salvaged")
+        for warning in self.warnings:
+            lines.append(f"  ⚠️  {warning}")
+        for error in self.errors:
+            lines.append(f"  ❌ {error}")
+        return "\n".join(lines)
+
+    def write_quarantine(self, quarantine_dir):
+        """Write skipped regions (with raw bytes) to <dir>/<file>.quarantine.jsonl"""
+        if not self.errors:
+            return None
+        quarantine_dir = Path(quarantine_dir)
+        quarantine_dir.mkdir(parents=True, exist_ok=True)
+        out_path = quarantine_dir / f"{Path(self.path).name}.quarantine.jsonl"
+        with open(out_path, 'w', encoding='utf-8') as f:
+            for error in self.errors:
+                f.write(json.dumps(error.as_dict(with_raw=True), ensure_ascii=True) + "\n")
+        return out_path
+
+
+class _Reader:
+    """Chunked byte buffer that tracks absolute file offsets"""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = b''
+        self.base = 0
+        self.pos = 0
+        self.eof = False
+        # Indentation of the byte returned by the last peek(), if it began a line
+        self.indent = None
+
+    @property
+    def offset(self):
+        return self.base + self.pos
+
+    def fill(self):
+        if self.eof:
+            return False
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf += data
+        return True
+
+    def release(self):
+        """Forget everything before the current position"""
+        if self.pos:
+            self.base += self.pos
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+
+    def peek(self):
+        """Next non-whitespace byte (as int), or None at EOF"""
+        self.indent = None
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                if self.buf[self.pos] == 10:
+                    self.indent = 0
+                elif self.indent is not None:
+                    self.indent += 1
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            self.release()
+            if not self.fill():
+                return None
+
+    def search(self, pattern, start):
+        """Find pattern at or after buffer index start, reading more as needed.
+
+        A match can straddle a fill, so the search resumes where one could
+        still begin: the last newline for _ITEM_START (its indentation has
+        no fixed length), the end of the buffer for the single-byte patterns.
+        """
+        while True:
+            match = pattern.search(self.buf, start)
+            if match:
+                return match
+            if pattern is _ITEM_START:
+                newline = self.buf.rfind(b'\n', start)
+                start = newline if newline >= 0 else max(len(self.buf), start)
+            else:
+                start = max(len(self.buf), start)
+            if not self.fill():
+                return None
+
+    def scan_value(self):
+        """Advance over one JSON value; return (raw_bytes, error_or_None)"""
+        start = self.pos
+        first = self.buf[start]
+        if first == ord('"'):
+            end, error = self._scan_string(start + 1)
+        elif first in (ord('{'), ord('[')):
+            end, error = self._scan_container(start)
+        else:
+            match = self.search(_SCALAR_END, start)
+            end = match.start() if match else len(self.buf)
+            error = None
+        self.pos = end
+        return self.buf[start:end], error
+
+    def _scan_string(self, i):
+        while True:
+            match = self.search(_STRING_END, i)
+            if match is None:
+                return len(self.buf), "unterminated string"
+            if match.group() == b'"':
+                return match.end(), None
+            # Skip the escaped character
+            i = match.end() + 1
+            while i > len(self.buf) and self.fill():
+                pass
+
+    def _scan_container(self, start):
+        stack = [self.buf[start]]
+        i = start + 1
+        while stack:
+            match = self.search(_STRUCTURAL, i)
+            if match is None:
+                return len(self.buf), "unexpected end of file inside value"
+            ch = match.group()[0]
+            if ch == ord('"'):
+                i, error = self._scan_string(match.end())
+                if error:
+                    return i, error
+                continue
+            i = match.end()
+            if ch in _CLOSERS:
+                if stack[-1] != _CLOSERS[ch]:
+                    # Mismatched bracket: end the value here, before the closer
+                    return match.start(), f"mismatched '{chr(ch)}'"
+                stack.pop()
+            else:
+                stack.append(ch)
+        return i, None
+
+    def skip_to_item_start(self):
+        """Resync after garbage: move to the next line that starts with '{' or ']'"""
+        match = self.search(_ITEM_START, self.pos)
+        if match is None:
+            self.pos = len(self.buf)
+            while self.fill():
+                self.pos = len(self.buf)
+            return
+        self.pos = match.end() - 1
+
+
+def _iter_array(reader, type_key, report, keep_raw, decode=True, positions=None):
+    """Yield (index, item) for an array whose '[' has just been consumed.
+
+    Indexes start at positions[type_key] and the next one is kept there, so
+    items salvaged after the array's end carry on counting.
+    """
+    positions = {} if positions is None else positions
+    index = positions.get(type_key, 0)
+    expect_item = True
+    while True:
+        reader.release()
+        ch = reader.peek()
+        indent = reader.indent
+        if ch is None:
+            report.errors.append(Malformed(type_key, None, reader.offset, reader.offset,
+                                           "unexpected end of file inside array"))
+            return
+        if ch == ord(']'):
+            reader.pos += 1
+            return
+        if ch == ord(','):
+            if expect_item:
+                report.warnings.append(f"byte {reader.offset}: stray ',' in {type_key}")
+            reader.pos += 1
+            expect_item = True
+            continue
+        if not expect_item:
+            report.warnings.append(f"byte {reader.offset}: missing ',' in {type_key}")
+
+        start = reader.offset
+        raw, error = reader.scan_value()
+        is_container = raw[:1] in (b'{', b'[')
+        if error is None and not is_container and reader.peek() == ord(':'):
+            error = "object fragment outside of an object"
+        if error is None and decode:
+            try:
+                obj = json.loads(raw)
+            except ValueError as e:
+                error = str(e)
+        elif error is None:
+            obj = None
+        expect_item = False
+
+        if error is None:
+            report.count(type_key)
+            yield index, obj
+        elif not is_container:
+            reader.skip_to_item_start()
+            expect_item = True
+            report.errors.append(Malformed(type_key, index, start, reader.offset, error))
+        else:
+            # A broken item can swallow its neighbours when a brace is missing.
+            # In pretty-printed files the next sibling starts on a new line at
+            # the same indentation, so cut the damaged item there.
+            if indent is not None:
+                sibling = re.search(rb'\n' + b' ' * indent + rb'[{\[]', raw)
+                if sibling:
+                    cut = sibling.start() + 1 + indent
+                    reader.pos -= len(raw) - cut
+                    raw = raw[:cut]
+                    expect_item = True
+            report.errors.append(Malformed(type_key, index, start, start + len(raw), error,
+                                           raw if keep_raw else None))
+        index += 1
+        positions[type_key] = index
+
+
+def _events(path, report, types, keep_raw, chunk_size):
+    """Low-level walk: yields ('value', key, obj), ('array', key, None), ('item', key, (index, obj))"""
+    with open(path, 'rb') as f:
+        reader = _Reader(f, chunk_size)
+        ch = reader.peek()
+        if ch != ord('{'):
+            report.errors.append(Malformed(None, None, reader.offset, reader.offset,
+                                           "document is not a JSON object"))
+            return
+        reader.pos += 1
+        last_array = None
+        top_indent = None
+        # Next item index of each array, for items that continue it after its end
+        positions = {}
+        while True:
+            reader.release()
+            ch = reader.peek()
+            if ch is None:
+                report.errors.append(Malformed(None, None, reader.offset, reader.offset,
+                                               "unexpected end of file (missing '}')"))
+                return
+            if ch == ord(','):
+                reader.pos += 1
+                continue
+
+            if ch == ord('}'):
+                reader.pos += 1
+                if reader.peek() is None:
+                    return
+                # Data appended after the document: treat it as more items
+                # of the last array (the usual cause is a botched merge).
+                report.warnings.append(f"byte {reader.offset}: data after end of document")
+                if last_array is None:
+                    report.errors.append(Malformed(None, None, reader.offset, reader.offset,
+                                                   "trailing data after document"))
+                    return
+                type_key = last_array
+                is_array = True
+            elif (last_array is not None and reader.indent is not None
+                  and top_indent is not None and reader.indent > top_indent):
+                # A key indented like an item field: the body of an array item
+                # whose opening brace got lost. Skip it and keep reading items.
+                start = reader.offset
+                reader.skip_to_item_start()
+                report.errors.append(Malformed(last_array, None, start, reader.offset,
+                                               "object fragment outside of an array item"))
+                type_key = last_array
+                is_array = True
+            else:
+                if top_indent is None:
+                    top_indent = reader.indent
+                start = reader.offset
+                key_raw, error = reader.scan_value()
+                if error or not key_raw.startswith(b'"') or reader.peek() != ord(':'):
+                    report.errors.append(Malformed(None, None, start, reader.offset,
+                                                   error or "expected a key"))
+                    reader.skip_to_item_start()
+                    continue
+                type_key = json.loads(key_raw)
+                positions.pop(type_key, None)
+                reader.pos += 1
+                ch = reader.peek()
+                if ch is None:
+                    continue
+                is_array = ch == ord('[')
+                if is_array:
+                    reader.pos += 1
+
+            wanted = types is None or type_key in types
+            if is_array:
+                last_array = type_key
+                report.items.setdefault(type_key, 0)
+                yield 'array', type_key, None
+                for item in _iter_array(reader, type_key, report, keep_raw, wanted, positions):
+                    if wanted:
+                        yield 'item', type_key, item
+                continue
+
+            start = reader.offset
+            raw, error = reader.scan_value()
+            if error is None:
+                try:
+                    value = json.loads(raw)
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                report.errors.append(Malformed(type_key, None, start, reader.offset, error,
+                                               raw if keep_raw else None))
+            else:
+                yield 'value', type_key, value
+
+
+def iter_document(path, report=None, types=None, keep_raw=True, chunk_size=CHUNK_SIZE):
+    """Yield (type_key, index, obj) for a metadata file.
+
+    Array items come with their position as index; other top-level values
+    (e.g. "system") are always yielded once with index None. ``types`` limits
+    which arrays are decoded (others are still scanned, but not parsed).
+    """
+    if report is None:
+        report = LoadReport(path)
+    for kind, type_key, payload in _events(path, report, types, keep_raw, chunk_size):
+        if kind == 'item':
+            yield type_key, payload[0], payload[1]
+        elif kind == 'value':
+            yield type_key, None, payload
+
+
+def iter_events(path, report=None, keep_raw=False):
+    """Yield ('value', key, obj), ('array', key, None) and ('item', key, (index, obj)) in file order"""
+    if report is None:
+        report = LoadReport(path)
+    yield from _events(path, report, None, keep_raw, CHUNK_SIZE)
+
+
+def iter_items(path, type_key, report=None):
+    """Yield the well-formed items of one top-level array"""
+    if report is None:
+        report = LoadReport(path)
+    for kind, key, payload in _events(path, report, {type_key}, False, CHUNK_SIZE):
+        if kind == 'item':
+            yield payload[1]
+
+
+def iter_layout(path, report=None):
+    """Yield (key, is_array, value) for each top-level key without decoding arrays"""
+    if report is None:
+        report = LoadReport(path)
+    for kind, type_key, payload in _events(path, report, set(), False, CHUNK_SIZE):
+        if kind == 'array':
+            yield type_key, True, None
+        elif kind == 'value':
+            yield type_key, False, payload
+
+
+def load_tolerant(path, quarantine_dir=None):
+    """Load a metadata file, skipping malformed items. Returns (doc, report)."""
+    report = LoadReport(path)
+    doc = {}
+    for kind, type_key, payload in _events(path, report, None, True, CHUNK_SIZE):
+        if kind == 'value':
+            doc[type_key] = payload
+        elif kind == 'array':
+            doc.setdefault(type_key, [])
+        else:
+            doc[type_key].append(payload[1])
+    if quarantine_dir is not None:
+        report.write_quarantine(quarantine_dir)
+    return doc, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Salvage well-formed items from a damaged metadata file")
+    parser.add_argument("path")
+    parser.add_argument("--salvage", help="write the salvaged document here")
+    parser.add_argument("--quarantine", help="directory for skipped raw items")
+    args = parser.parse_args()
+
+    doc, report = load_tolerant(args.path, args.quarantine)
+    print(report.summary())
+    if args.salvage:
+        with open(args.salvage, 'w', encoding='utf-8') as f:
+            json.dump(doc, f, indent=2, ensure_ascii=True)
+            f.write('\n')
+        print(f"Wrote salvaged document to {args.salvage}")
+    sys.exit(0 if report.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
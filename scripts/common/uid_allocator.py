@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Collision-free DHIS2 UID allocation.
+
+A UID is 11 characters, [A-Za-z][A-Za-z0-9]{10}. The allocator preloads
+every UID-shaped token in the tree's JSON files (ids, references and
+expression operands alike), draws candidates in bulk from os.urandom, and
+never hands out a UID that exists on disk, was reserved in an earlier run,
+or was already issued by this process.
+
+    from common.uid_allocator import generate_uid, get_allocator, save_reservations
+
+    new_id = generate_uid()
+    ids = get_allocator().allocate(20000)
+    ...                                   # write the files that use them
+    save_reservations("create_x.py")
+"""
+import argparse
+import json
+import os
+import re
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+RESERVATIONS_PATH = BASE_DIR / "artifacts" / "uid_reservations.json"
+SKIP_DIRS = {'.git', 'cache', 'node_modules', '__pycache__'}
+
+LETTERS = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+ALPHANUMERIC = LETTERS + b"0123456789"
+UID_RE = re.compile(r'^[A-Za-z][A-Za-z0-9]{10}$')
+UID_TOKEN_RE = re.compile(rb'(?<![A-Za-z0-9])[A-Za-z][A-Za-z0-9]{10}(?![A-Za-z0-9])')
+
+
+def _byte_table(alphabet):
+    """(translate table, bytes to delete) mapping random bytes onto alphabet without bias"""
+    usable = 256 - 256 % len(alphabet)
+    table = bytes(alphabet[b % len(alphabet)] for b in range(256))
+    return table, bytes(range(usable, 256))
+
+
+_FIRST_TABLE, _FIRST_REJECT = _byte_table(LETTERS)
+_REST_TABLE, _REST_REJECT = _byte_table(ALPHANUMERIC)
+
+
+def _random_chars(count, table, reject):
+    """count characters from the alphabet, mapped in bulk from os.urandom"""
+    out = b""
+    while len(out) < count:
+        need = count - len(out)
+        # ~3% (rest) / ~19% (first char) of bytes are rejected; over-draw a little
+        out += os.urandom(need + need // 4 + 16).translate(table, reject)
+    return out[:count]
+
+
+def is_valid_uid(uid):
+    """True for an 11-character DHIS2 UID that starts with a letter"""
+    return isinstance(uid, str) and UID_RE.match(uid) is not None
+
+
+def scan_uids(base_dir=BASE_DIR):
+    """Every UID-shaped token in the JSON files under base_dir"""
+    found = set()
+    for root, dirs, files in os.walk(base_dir):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in files:
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(root, name), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                continue
+            found.update(token.decode('ascii') for token in UID_TOKEN_RE.findall(data))
+    return found
+
+
+class UidAllocator:
+    """Issues UIDs that are unique against the tree and earlier reservations"""
+
+    def __init__(self, base_dir=BASE_DIR, existing=None, reservations_path=RESERVATIONS_PATH):
+        self.base_dir = Path(base_dir)
+        self.reservations_path = Path(reservations_path) if reservations_path else None
+        self.taken = set(existing) if existing is not None else scan_uids(self.base_dir)
+        self.reserved = {}
+        self.issued = []
+        if self.reservations_path and self.reservations_path.exists():
+            with open(self.reservations_path, encoding='utf-8') as f:
+                self.reserved = json.load(f).get('reservations', {})
+            self.taken.update(self.reserved)
+
+    def __contains__(self, uid):
+        return uid in self.taken
+
+    def add_existing(self, uids):
+        """Mark UIDs as in use (e.g. ones created in memory but not yet written)"""
+        self.taken.update(uids)
+
+    def allocate(self, count=None, reason=None):
+        """One new UID, or a list of ``count`` distinct new UIDs"""
+        want = 1 if count is None else count
+        fresh = []
+        while len(fresh) < want:
+            need = want - len(fresh)
+            firsts = _random_chars(need, _FIRST_TABLE, _FIRST_REJECT)
+            rests = _random_chars(need * 10, _REST_TABLE, _REST_REJECT)
+            for i in range(need):
+                uid = (firsts[i:i + 1] + rests[i * 10:i * 10 + 10]).decode('ascii')
+                if uid not in self.taken:
+                    self.taken.add(uid)
+                    fresh.append(uid)
+        self.issued.extend(fresh)
+        if reason is not None:
+            for uid in fresh:
+                self.reserved[uid] = reason
+        return fresh[0] if count is None else fresh
+
+    def reserve(self, uids, reason=""):
+        """Record UIDs so later runs never issue them again"""
+        for uid in uids:
+            self.taken.add(uid)
+            self.reserved[uid] = reason
+
+    def save(self, reason=""):
+        """Persist reservations (and everything issued this run, under reason)"""
+        if self.reservations_path is None:
+            return
+        for uid in self.issued:
+            self.reserved.setdefault(uid, reason)
+        self.reservations_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.reservations_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'reservations': self.reserved}, f, indent=2, ensure_ascii=True, sort_keys=True)
+            f.write('\n')
+        os.replace(tmp_path, self.reservations_path)
+
+
+_allocators = {}
+
+
+def get_allocator(base_dir=BASE_DIR):
+    """Process-wide allocator, so the tree is scanned once per run"""
+    key = Path(base_dir).resolve()
+    if key not in _allocators:
+        _allocators[key] = UidAllocator(key)
+    return _allocators[key]
+
+
+def generate_uid():
+    """Generate a DHIS2-compatible UID that is not used anywhere in the tree"""
+    return get_allocator().allocate()
+
+
+def save_reservations(reason=""):
+    """Reserve the UIDs this process issued; call once the files using them are written.
+
+    Keeps them from being issued again even after those files are
+    regenerated or removed (e.g. when the objects live on only in DHIS2).
+    """
+    for allocator in _allocators.values():
+        if allocator.issued:
+            allocator.save(reason)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Allocate DHIS2 UIDs unique against this repository")
+    parser.add_argument('-n', '--count', type=int, default=1)
+    parser.add_argument('--reserve', metavar='REASON',
+                        help=f"record the UIDs in {RESERVATIONS_PATH.relative_to(BASE_DIR)}")
+    args = parser.parse_args()
+
+    allocator = get_allocator()
+    for uid in allocator.allocate(args.count, reason=args.reserve):
+        print(uid)
+    if args.reserve is not None:
+        allocator.save()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Single-pass UID remapping.
+
+The whole old -> new mapping is compiled into one token regex plus a dict
+lookup, so each file is rewritten in one linear scan no matter how many
+UIDs are mapped. Replacements never see each other's output, so chained
+mappings (A -> B, B -> C) cannot cascade the way sequential
+str.replace() calls did.
+
+Tokens are maximal runs of UID characters, so an old UID is only replaced
+where it stands alone (an id, a #{stage.element} operand, ...) and never
+inside a longer identifier.
+
+Structural mode goes further and only touches "id" fields (objects' own ids
+and {"id": ...} references) and the operands of expression tokens
+(#{..}, A{..}, I{..}, D{..}, C{..}, R{..}, OUG{..}) inside expression,
+condition, numerator and denominator. Names, descriptions and other text
+are left alone. It streams the file item by item, so large files such as
+Organisation Unit.json are never held twice in memory.
+"""
+import json
+import re
+from pathlib import Path
+
+from common.metadata_stream import write_document
+from common.tolerant_json import LoadReport, iter_events
+
+EXPRESSION_FIELDS = {'expression', 'condition', 'numerator', 'denominator'}
+# Operand tokens whose dotted parts are UIDs (V{...} holds variable names, not UIDs)
+EXPRESSION_TOKEN_RE = re.compile(r'(?<!\w)(#|A|I|D|C|R|OUG|PS_EVENTDATE:)\{([^{}]*)\}')
+
+
+def _char_class(chars):
+    """Regex character class for the given characters (ranges collapsed for alphanumerics)"""
+    cls = "A-Za-z0-9"
+    extra = sorted({c for c in chars if not c.isascii() or not c.isalnum()})
+    return "[" + cls + "".join(re.escape(c) for c in extra) + "]"
+
+
+def json_path(parts):
+    """Render ['dashboards', 3, 'id'] as $.dashboards[3].id"""
+    out = "$"
+    for part in parts:
+        out += f"[{part}]" if isinstance(part, int) else f".{part}"
+    return out
+
+
+class UidRemapper:
+    """Compiled old -> new UID mapping"""
+
+    def __init__(self, uid_map):
+        self.uid_map = dict(uid_map)
+        self.replacements = 0
+        if not self.uid_map:
+            self.pattern = None
+            return
+        lengths = {len(uid) for uid in self.uid_map}
+        cls = _char_class("".join(self.uid_map))
+        self.pattern = re.compile(
+            f"(?<!{cls}){cls}{{{min(lengths)},{max(lengths)}}}(?!{cls})")
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _replace(self, match):
+        token = match.group(0)
+        new = self.uid_map.get(token)
+        if new is None:
+            return token
+        self.replacements += 1
+        return new
+
+    def remap_text(self, text):
+        """Return (new_text, replacements) after one pass over text"""
+        if self.pattern is None:
+            return text, 0
+        before = self.replacements
+        text = self.pattern.sub(self._replace, text)
+        return text, self.replacements - before
+
+    def remap_string(self, value):
+        """Remap the UID tokens in one string value"""
+        if self.pattern is None:
+            return value
+        return self.pattern.sub(self._replace, value)
+
+    def changed_paths(self, doc):
+        """JSON paths (with old/new values) whose keys or string values contain mapped UIDs"""
+        changes = []
+        if self.pattern is None:
+            return changes
+        stack = [((), doc)]
+        while stack:
+            path, value = stack.pop()
+            if isinstance(value, dict):
+                items = list(value.items())
+                for key, child in reversed(items):
+                    if self._hits(key):
+                        changes.append((json_path(path + (key,)) + " (key)", key,
+                                        self.pattern.sub(self._lookup, key)))
+                    stack.append((path + (key,), child))
+            elif isinstance(value, list):
+                for i in range(len(value) - 1, -1, -1):
+                    stack.append((path + (i,), value[i]))
+            elif isinstance(value, str) and self._hits(value):
+                changes.append((json_path(path), value, self.pattern.sub(self._lookup, value)))
+        return changes
+
+    def _lookup(self, match):
+        return self.uid_map.get(match.group(0), match.group(0))
+
+    def _hits(self, value):
+        return any(m.group(0) in self.uid_map for m in self.pattern.finditer(value))
+
+    def remap_expression(self, expression):
+        """Remap UIDs inside expression operand tokens only"""
+        def operand(match):
+            parts = match.group(2).split('.')
+            for i, part in enumerate(parts):
+                new = self.uid_map.get(part)
+                if new is not None:
+                    parts[i] = new
+                    self.replacements += 1
+            return f"{match.group(1)}{{{'.'.join(parts)}}}"
+        return EXPRESSION_TOKEN_RE.sub(operand, expression)
+
+    def remap_object(self, obj, path=(), changes=None):
+        """Structurally remap obj in place; returns [(json path, old, new), ...]"""
+        if changes is None:
+            changes = []
+        if isinstance(obj, list):
+            for i, child in enumerate(obj):
+                if isinstance(child, (dict, list)):
+                    self.remap_object(child, path + (i,), changes)
+            return changes
+        if not isinstance(obj, dict):
+            return changes
+        for key, child in obj.items():
+            if key == 'id' and isinstance(child, str):
+                new = self.uid_map.get(child)
+                if new is not None:
+                    obj[key] = new
+                    self.replacements += 1
+                    changes.append((json_path(path + (key,)), child, new))
+            elif key in EXPRESSION_FIELDS and isinstance(child, str):
+                new = self.remap_expression(child)
+                if new != child:
+                    obj[key] = new
+                    changes.append((json_path(path + (key,)), child, new))
+            elif isinstance(child, (dict, list)):
+                self.remap_object(child, path + (key,), changes)
+        return changes
+
+    def remap_file_structural(self, path, dry_run=False):
+        """Stream a metadata file through remap_object; returns (replacements, changed paths).
+
+        Damaged files are left untouched (a salvaging rewrite would drop data).
+        """
+        path = Path(path)
+        before = self.replacements
+        changes = []
+        report = LoadReport(path)
+        events = iter_events(path, report)
+        pushed = []
+
+        def next_event():
+            return pushed.pop() if pushed else next(events, None)
+
+        def items(type_key):
+            while True:
+                event = next_event()
+                if event is None:
+                    return
+                if event[0] != 'item' or event[1] != type_key:
+                    pushed.append(event)
+                    return
+                index, obj = event[2]
+                self.remap_object(obj, (type_key, index), changes)
+                yield obj
+
+        def sections():
+            while True:
+                event = next_event()
+                if event is None:
+                    return
+                kind, type_key, payload = event
+                if kind == 'value':
+                    self.remap_object(payload, (type_key,), changes)
+                    yield type_key, payload
+                elif kind == 'array':
+                    yield type_key, items(type_key)
+
+        out_path = path.with_name(path.name + ".remap")
+        write_document(out_path, sections(), indent=_detect_indent(path))
+        if report.errors or report.warnings:
+            out_path.unlink()
+            self.replacements = before
+            raise ValueError(f"{path} is damaged; not remapped:\n{report.summary()}")
+        if changes and not dry_run:
+            out_path.replace(path)
+        else:
+            out_path.unlink()
+        return self.replacements - before, changes
+
+    def remap_file(self, path, dry_run=False, report=True, structural=False):
+        """Rewrite a file in one pass; returns (replacements, changed JSON paths)"""
+        if structural:
+            return self.remap_file_structural(path, dry_run=dry_run)
+        path = Path(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        new_content, count = self.remap_text(content)
+        if not count:
+            return 0, []
+        paths = []
+        if report:
+            try:
+                paths = self.changed_paths(json.loads(content))
+            except ValueError:
+                # Damaged file: still remapped textually, just not itemised
+                paths = []
+        if not dry_run:
+            tmp_path = path.with_name(path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(new_content)
+            tmp_path.replace(path)
+        return count, paths
+
+
+def _detect_indent(path):
+    """Indent of a JSON file written with json.dump(indent=N), or None if compact"""
+    with open(path, 'rb') as f:
+        head = f.read(256)
+    match = re.match(rb'\{\r?\n( +)', head)
+    return len(match.group(1)) if match else None
@@ -1,25 +1,29 @@
 #!/usr/bin/env python3
 import json
-import subprocess
 import sys
+from pathlib import Path
 
-def run_curl(method, url, data=None):
-    """Run curl command and return parsed JSON response."""
-    cmd = ['curl', '-s', '-X', method, '-H', 'Content-Type: application/json',
-           '-u', 'Meduletu_Kamati:Covid19!#@$', url]
-    
-    if data:
-        cmd.extend(['-d', json.dumps(data)])
-    
-    result = subprocess.run(cmd, capture_output=True, text=True)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.dhis2_client import DHIS2Client, DHIS2Error
+
+client = DHIS2Client()
+
+def run_request(method, path, data=None):
+    """Send a request over the shared connection and return the parsed JSON response."""
     try:
-        return json.loads(result.stdout)
-    except:
-        return {"error": result.stdout[:200]}
+        response = client.request(method, path, body=data)[1]
+    except DHIS2Error as e:
+        response = e.body
+    except OSError as e:
+        return {"error": str(e)[:200]}
+    if not isinstance(response, dict):
+        return {"error": str(response)[:200]}
+    return response
 
 # Get current stage
 print("Fetching stage ymx76J82mIm...")
-stage_data = run_curl('GET', 'http://localhost:8085/api/programStages/ymx76J82mIm')
+stage_data = run_request('GET', '/api/programStages/ymx76J82mIm')
 
 if 'error' in stage_data:
     print(f"Error fetching stage: {stage_data['error']}")
@@ -45,12 +49,12 @@ else:
     stage_data['programStageDataElements'].append(new_element)
     
     # PUT back to DHIS2
-    put_response = run_curl('PUT', 'http://localhost:8085/api/programStages/ymx76J82mIm', stage_data)
+    put_response = run_request('PUT', '/api/programStages/ymx76J82mIm', stage_data)
     print(f"Update response: {json.dumps(put_response)[:150]}")
     
     # Verify
     print("Verifying...")
-    verify_data = run_curl('GET', 'http://localhost:8085/api/programStages/ymx76J82mIm?fields=programStageDataElements')
+    verify_data = run_request('GET', '/api/programStages/ymx76J82mIm?fields=programStageDataElements')
     verify_elements = [e.get('dataElement', {}).get('id') for e in 
                       verify_data.get('programStageDataElements', [])]
     
@@ -4,9 +4,13 @@ Fast Data Element Assignment - Optimized Version
 """
 
 import json
+import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+
+from common.tolerant_json import load_tolerant
 
 # Load all data once
 stage_path = BASE_DIR / "Program" / "Program Stage.json"
@@ -14,8 +18,10 @@ de_path = BASE_DIR / "Data Element" / "Data Element.json"
 
 with open(stage_path) as f:
     stage_data = json.load(f)
-with open(de_path) as f:
-    de_data = json.load(f)
+# Data Element.json has been hand-edited before; salvage what parses
+de_data, de_report = load_tolerant(de_path)
+if not de_report.ok:
+    print(de_report.summary())
 
 # Get all data elements
 all_elements = [de.get('id') for de in de_data.get('dataElements', [])]
@@ -4,12 +4,15 @@ Clone existing aggregate data elements (CECAP-style) for all other cancers,
 so they appear in Data Visualizer like the cervical program.
 """
 import json
-import random
-import string
+import sys
 from datetime import datetime
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+
+from common.uid_allocator import get_allocator, save_reservations
+
 DE_PATH = BASE_DIR / "Data Element" / "Data Element.json"
 DS_PATH = BASE_DIR / "Data Set" / "Data Set.json"
 
@@ -35,20 +38,12 @@ CANCERS = [
 ]
 
 
-def generate_uid():
-    chars = string.ascii_letters + string.digits
-    first = random.choice(string.ascii_letters)
-    rest = "".join(random.choice(chars) for _ in range(10))
-    return first + rest
-
-
 def main():
     with open(DE_PATH) as f:
         de_data = json.load(f)
 
     data_elements = de_data.get("dataElements", [])
     existing_names = {de.get("name") for de in data_elements}
-    existing_ids = {de.get("id") for de in data_elements}
 
     base_aggs = [de for de in data_elements if de.get("domainType") == "AGGREGATE"]
     if not base_aggs:
@@ -56,7 +51,7 @@ def main():
         return
 
     now = datetime.now().isoformat()
-    created = 0
+    clones = []
 
     for cancer in CANCERS:
         for base in base_aggs:
@@ -67,27 +62,27 @@ def main():
             if new_name in existing_names:
                 continue
 
-            new_id = generate_uid()
-            while new_id in existing_ids:
-                new_id = generate_uid()
-
             clone = json.loads(json.dumps(base))
-            clone["id"] = new_id
             clone["name"] = new_name
             clone["shortName"] = new_name
             clone["formName"] = new_name
             clone["created"] = now
             clone["lastUpdated"] = now
 
-            data_elements.append(clone)
+            clones.append(clone)
             existing_names.add(new_name)
-            existing_ids.add(new_id)
-            created += 1
+
+    # One bulk allocation for all clones, unique against the whole tree
+    for clone, new_id in zip(clones, get_allocator().allocate(len(clones))):
+        clone["id"] = new_id
+    data_elements.extend(clones)
+    created = len(clones)
 
     de_data["dataElements"] = data_elements
     with open(DE_PATH, "w") as f:
         json.dump(de_data, f, indent=2, ensure_ascii=True)
         f.write("\n")
+    save_reservations("clone_cecap_aggregate_elements.py")
 
     # Update dataset to include the new aggregate elements
     with open(DS_PATH) as f:
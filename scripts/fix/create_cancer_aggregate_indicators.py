@@ -4,12 +4,15 @@ Create cancer-specific aggregate indicators (CECAP-style) and
 write a quick mapping list of Cancer -> Aggregate Elements.
 """
 import json
-import random
-import string
+import sys
 from datetime import datetime
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+
+from common.tolerant_json import load_tolerant
+from common.uid_allocator import generate_uid, save_reservations
 DE_PATH = BASE_DIR / "Data Element" / "Data Element.json"
 IND_PATH = BASE_DIR / "Options" / "Indicator.json"
 REPORT_PATH = BASE_DIR / "artifacts" / "reports" / "CANCER_AGGREGATE_MAPPING.txt"
@@ -36,13 +39,6 @@ CANCERS = [
 ]
 
 
-def generate_uid():
-    chars = string.ascii_letters + string.digits
-    first = random.choice(string.ascii_letters)
-    rest = "".join(random.choice(chars) for _ in range(10))
-    return first + rest
-
-
 def truncate_short_name(value):
     if not value:
         return value
@@ -69,8 +65,9 @@ def extract_ids(expression):
 
 
 def main():
-    with open(DE_PATH) as f:
-        de_data = json.load(f)
+    de_data, de_report = load_tolerant(DE_PATH)
+    if not de_report.ok:
+        print(de_report.summary())
 
     data_elements = de_data.get("dataElements", [])
     agg_elements = [de for de in data_elements if de.get("domainType") == "AGGREGATE"]
@@ -88,7 +85,6 @@ def main():
 
     indicators = ind_data.get("indicators", [])
     existing_names = {i.get("name") for i in indicators}
-    existing_ids = {i.get("id") for i in indicators}
 
     # Use existing indicators as base (CECAP-style)
     base_indicators = indicators[:]
@@ -132,8 +128,6 @@ def main():
                     continue
 
                 new_id = generate_uid()
-                while new_id in existing_ids:
-                    new_id = generate_uid()
 
                 clone = json.loads(json.dumps(base))
                 clone["id"] = new_id
@@ -151,13 +145,13 @@ def main():
 
                 indicators.append(clone)
                 existing_names.add(new_name)
-                existing_ids.add(new_id)
                 created += 1
 
         ind_data["indicators"] = indicators
         with open(IND_PATH, "w") as f:
             json.dump(ind_data, f, indent=2, ensure_ascii=True)
             f.write("\n")
+        save_reservations("create_cancer_aggregate_indicators.py")
 
         print(f"Created {created} aggregate indicators.")
 
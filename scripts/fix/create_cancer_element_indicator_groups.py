@@ -15,13 +15,14 @@ Outputs:
 """
 
 import json
-import uuid
-import random
-import string
+import sys
 from pathlib import Path
 from datetime import datetime
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+from common.uid_allocator import generate_uid, save_reservations
 
 # Cancer types list (18 cancers, alphabetically ordered)
 CANCERS = [
@@ -53,13 +54,6 @@ DEFAULT_USERNAME = "admin"
 DEFAULT_USER_NAME = "admin admin"
 
 
-def generate_uid():
-    """Generate a DHIS2-compatible UID (11 char alphanumeric)."""
-    # Use mix of letters and numbers to ensure valid DHIS2 UID
-    chars = string.ascii_letters + string.digits
-    return ''.join(random.choices(chars, k=11))
-
-
 def load_data_elements():
     """Load all data elements to find cancer-specific ones."""
     de_file = REPO_ROOT / "Data Element" / "Data Element.json"
@@ -234,6 +228,7 @@ def main():
     }
     with open(igp_file, "w") as f:
         json.dump(igp_output, f, indent=2)
+    save_reservations("create_cancer_element_indicator_groups.py")
     print(f"✅ Created {len(indicator_groups)} Indicator Groups")
     print(f"   Saved to: Options/Indicator Group.json")
 
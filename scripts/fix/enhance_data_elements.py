@@ -5,16 +5,14 @@ Adds missing critical elements like Gender, Diagnosis, and Stage.
 """
 
 import json
+import sys
 from pathlib import Path
 from datetime import datetime
-import uuid
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "scripts"))
 
-def generate_uid():
-    """Generate a DHIS2-compatible UID"""
-    import uuid
-    return str(uuid.uuid4())[:11]
+from common.uid_allocator import generate_uid, save_reservations
 
 # Load existing data elements
 de_path = BASE_DIR / "Data Element" / "Data Element.json"
@@ -151,6 +149,8 @@ de_data['dataElements'].extend(new_elements)
 with open(de_path, 'w') as f:
     json.dump(de_data, f, indent=2, ensure_ascii=True)
 
+save_reservations("enhance_data_elements.py")
+
 print(f"\n✓ Enhanced Data Element file")
 print(f"  Total elements now: {len(de_data['dataElements'])}")
 print(f"  New elements added: {len(new_elements)}")
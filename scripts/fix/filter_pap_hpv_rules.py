@@ -1,57 +1,69 @@
-import json
+import sys
 from pathlib import Path
 
 base = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(base / "scripts"))
+
+from common.metadata_stream import file_layout, iter_objects, write_document
+
 bundle_path = base / "artifacts" / "bundles" / "programs_bundle_cancer.json"
 
-# Load bundle
-bundle = json.loads(bundle_path.read_text())
+
+def is_pap_hpv_rule(rule):
+    return any(keyword in rule.get('name', '').upper()
+               for keyword in ['HPV', 'PAP SMEAR', 'PAP'])
+
 
 # Filter out any rule containing HPV or Pap smear keywords
-original_rules = bundle.get('programRules', [])
-filtered_rules = [r for r in original_rules 
-                 if not any(keyword in r.get('name', '').upper() 
-                           for keyword in ['HPV', 'PAP SMEAR', 'PAP'])]
-
-print(f"Original rules: {len(original_rules)}")
-print(f"Filtered rules: {len(filtered_rules)}")
-print(f"Removed: {len(original_rules) - len(filtered_rules)}")
-
-removed_rules = [r for r in original_rules 
-                if any(keyword in r.get('name', '').upper() 
-                      for keyword in ['HPV', 'PAP SMEAR', 'PAP'])]
+# (streams only the rules; the bundle is rewritten below if anything matched)
+original_rules = 0
+removed_rules = []
+for rule in iter_objects(bundle_path, 'programRules'):
+    original_rules += 1
+    if is_pap_hpv_rule(rule):
+        removed_rules.append({'id': rule.get('id'), 'name': rule.get('name')})
+
+print(f"Original rules: {original_rules}")
+print(f"Filtered rules: {original_rules - len(removed_rules)}")
+print(f"Removed: {len(removed_rules)}")
+
 print("\nRemoved rules:")
 for rule in removed_rules:
     print(f"  - {rule.get('name')} (id: {rule.get('id')})")
 
-if len(filtered_rules) < len(original_rules):
-    bundle['programRules'] = filtered_rules
-    
-    # Remove associated actions for these rules
+if removed_rules:
     removed_rule_ids = {r.get('id') for r in removed_rules}
-    original_actions = bundle.get('programRuleActions', [])
-    filtered_actions = [a for a in original_actions 
-                       if a.get('programRule', {}).get('id') not in removed_rule_ids]
-    
-    # Remove associated variables for these rules
-    original_vars = bundle.get('programRuleVariables', [])
-    filtered_vars = [v for v in original_vars 
-                    if v.get('programRule', {}).get('id') not in removed_rule_ids]
-    
-    print(f"\nOriginal actions: {len(original_actions)}")
-    print(f"Filtered actions: {len(filtered_actions)}")
-    print(f"Removed actions: {len(original_actions) - len(filtered_actions)}")
-    
-    print(f"\nOriginal variables: {len(original_vars)}")
-    print(f"Filtered variables: {len(filtered_vars)}")
-    print(f"Removed variables: {len(original_vars) - len(filtered_vars)}")
-    
-    bundle['programRuleActions'] = filtered_actions
-    bundle['programRuleVariables'] = filtered_vars
-    
+    original = {'programRuleActions': 0, 'programRuleVariables': 0}
+
+    def keep(key):
+        for obj in iter_objects(bundle_path, key):
+            if key == 'programRules' and obj.get('id') in removed_rule_ids:
+                continue
+            if key in original:
+                # Remove associated actions and variables for these rules
+                original[key] += 1
+                if obj.get('programRule', {}).get('id') in removed_rule_ids:
+                    continue
+            yield obj
+
+    def sections():
+        for key, is_array, value in file_layout(bundle_path):
+            yield key, keep(key) if is_array else value
+
     # Save filtered bundle
     out_path = base / "artifacts" / "bundles" / "programs_bundle_cancer_no_pap_hpv.json"
-    out_path.write_text(json.dumps(bundle, separators=(",", ":")))
+    counts = write_document(out_path, sections())
+
+    filtered_actions = counts.get('programRuleActions', 0)
+    filtered_vars = counts.get('programRuleVariables', 0)
+    print(f"\nOriginal actions: {original['programRuleActions']}")
+    print(f"Filtered actions: {filtered_actions}")
+    print(f"Removed actions: {original['programRuleActions'] - filtered_actions}")
+
+    print(f"\nOriginal variables: {original['programRuleVariables']}")
+    print(f"Filtered variables: {filtered_vars}")
+    print(f"Removed variables: {original['programRuleVariables'] - filtered_vars}")
+
     print(f"\nWrote filtered bundle to {out_path.name}")
 else:
     print("\nNo rules were removed")
@@ -5,15 +5,14 @@ Each dashboard includes program indicators, visualizations, and event visualizat
 """
 
 import json
+import sys
 from pathlib import Path
 from datetime import datetime
-import uuid
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "scripts"))
 
-def generate_uid():
-    """Generate a DHIS2-compatible UID"""
-    return str(uuid.uuid4())[:11]
+from common.uid_allocator import generate_uid, save_reservations
 
 # Cancer types and their IDs
 CANCER_TYPES = {
@@ -129,5 +128,7 @@ output_path = BASE_DIR / "Dashboard" / "Dashboard_Cancer_by_Type.json"
 with open(output_path, 'w') as f:
     json.dump(dashboard_bundle, f, indent=2, ensure_ascii=True)
 
+save_reservations("create_cancer_dashboards.py")
+
 print(f"\n✓ Created {len(dashboards)} cancer-specific dashboards")
 print(f"✓ Saved to: {output_path}")
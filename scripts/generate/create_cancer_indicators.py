@@ -5,15 +5,14 @@ Includes case counts, treatment outcomes, and survival metrics.
 """
 
 import json
+import sys
 from pathlib import Path
 from datetime import datetime
-import uuid
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / "scripts"))
 
-def generate_uid():
-    """Generate a DHIS2-compatible UID"""
-    return str(uuid.uuid4())[:11]
+from common.uid_allocator import generate_uid, save_reservations
 
 # Load existing program indicators
 pi_path = BASE_DIR / "Program" / "Program Indicator.json"
@@ -109,6 +108,8 @@ pi_data['programIndicators'].extend(new_indicators)
 with open(pi_path, 'w') as f:
     json.dump(pi_data, f, indent=2, ensure_ascii=True)
 
+save_reservations("create_cancer_indicators.py")
+
 print(f"\n✓ Enhanced Program Indicators")
 print(f"  Total indicators now: {len(pi_data['programIndicators'])}")
 print(f"  New indicators added: {len(new_indicators)}")
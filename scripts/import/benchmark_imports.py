@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Benchmark metadata imports per type.
+
+Replays the standard import set (data elements, indicators, programs,
+stages, program indicators, rule variables, rules, actions, dashboards,
+organisation units) type by type against a target. Each type's objects are
+streamed from every file of the import plan (common/import_plan.py), in
+plan order, and chunked the same way the importers chunk. Records per
+type: wall time, JSON and on-the-wire bytes, requests, objects/sec,
+p50/p95/max request latency and the server's import stats.
+
+Without --target an in-process mock DHIS2 (common/mock_dhis2.py) is started,
+so runs are comparable offline; --mock-latency etc. shape it. Results are
+written as JSON to artifacts/benchmarks/ and, with --compare, checked
+against an earlier run.
+"""
+import argparse
+import json
+import math
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.chunked_import import DEFAULT_MAX_BYTES, DEFAULT_MAX_OBJECTS, import_chunked, ordered_types
+from common.dhis2_client import DHIS2Client, encode_json
+from common.import_plan import build_plan
+from common.metadata_store import BASE_DIR, get_store
+from common.metadata_stream import iter_objects
+from common.mock_dhis2 import MockDHIS2Server
+
+RESULTS_DIR = BASE_DIR / "artifacts" / "benchmarks"
+STANDARD_TYPES = ['dataElements', 'indicators', 'programs', 'programStages', 'programIndicators',
+                  'programRuleVariables', 'programRules', 'programRuleActions',
+                  'dashboards', 'organisationUnits']
+# A type is flagged when objects/sec drops (or p95 latency grows) by more than this
+REGRESSION_THRESHOLD = 0.2
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_objects(type_keys):
+    """{type: objects} from every file of the import plan, in plan order.
+
+    A UID held by several files is taken once, from the last of them: the
+    copy a planned import leaves on the server. Files the plan cannot read
+    (and so never imports) are salvaged through the tolerant metadata store
+    for UIDs no planned file holds. Returns (objects, {type: number of files}).
+    """
+    wanted = set(type_keys)
+    plan = build_plan()
+    objects = {key: {} for key in wanted}
+    files = {key: 0 for key in wanted}
+
+    def add(type_key, items, replace=True):
+        seen = objects[type_key]
+        for obj in items:
+            if isinstance(obj, dict):
+                # Objects without an id cannot be matched, keep them all
+                key = obj.get('id') or ('', len(seen))
+                if replace or key not in seen:
+                    seen[key] = obj
+
+    for path in (path for wave in plan.waves for unit in wave for path in unit):
+        for type_key in wanted.intersection(plan.scans[path].types):
+            add(type_key, iter_objects(path, type_key))
+            files[type_key] += 1
+    store = get_store(tolerant=True)
+    for path, reason in plan.skipped.items():
+        if not reason.startswith('unreadable'):
+            continue
+        for type_key in wanted:
+            try:
+                items = store.collection(type_key, plan.relative(path)).objects
+            except Exception:
+                break
+            if items:
+                add(type_key, items, replace=False)
+                files[type_key] += 1
+    return {key: list(seen.values()) for key, seen in objects.items()}, files
+
+
+def benchmark_type(client, type_key, objects, max_objects, max_bytes):
+    """Import one type; returns its result record"""
+    client.request_log = []
+    sent_before = client.bytes_sent
+    started = time.perf_counter()
+    totals = import_chunked(client, {type_key: objects}, max_objects, max_bytes)
+    wall = time.perf_counter() - started
+    latencies = [entry[3] for entry in client.request_log]
+    client.request_log = None
+    return {
+        'objects': len(objects),
+        'jsonBytes': sum(len(encode_json(obj)) + 1 for obj in objects),
+        'bytesSent': client.bytes_sent - sent_before,
+        'requests': len(latencies),
+        'chunks': totals.chunks,
+        'failedChunks': len(totals.failed_chunks),
+        'wallSeconds': round(wall, 4),
+        'objectsPerSecond': round(len(objects) / wall, 1) if wall else None,
+        'latency': {
+            'p50': round(percentile(latencies, 50), 4) if latencies else None,
+            'p95': round(percentile(latencies, 95), 4) if latencies else None,
+            'max': round(max(latencies), 4) if latencies else None,
+        },
+        'status': totals.status,
+        'serverStats': totals.stats,
+    }
+
+
+def merge_runs(runs):
+    """Median of each timing over repeated runs; counts from the last run"""
+    if len(runs) == 1:
+        return runs[0]
+    merged = dict(runs[-1])
+    for key in ('wallSeconds', 'objectsPerSecond'):
+        merged[key] = percentile([r[key] for r in runs if r[key] is not None], 50)
+    merged['latency'] = {k: percentile([r['latency'][k] for r in runs if r['latency'][k] is not None], 50)
+                         for k in ('p50', 'p95', 'max')}
+    merged['runs'] = len(runs)
+    return merged
+
+
+def compare(current, previous_path):
+    """Print per-type changes against an earlier result file; returns regressed types"""
+    with open(previous_path, encoding='utf-8') as f:
+        previous = json.load(f)
+    print(f"\n📊 Compared with {previous_path} ({previous.get('timestamp')}):")
+    regressed = []
+    for type_key, result in current['types'].items():
+        before = previous.get('types', {}).get(type_key)
+        if not before or not before.get('objectsPerSecond') or not result.get('objectsPerSecond'):
+            continue
+        speed = result['objectsPerSecond'] / before['objectsPerSecond'] - 1
+        p95_before, p95_now = before['latency']['p95'], result['latency']['p95']
+        slower = speed < -REGRESSION_THRESHOLD or (
+            p95_before and p95_now and p95_now / p95_before - 1 > REGRESSION_THRESHOLD)
+        marker = "⚠️ " if slower else "✅"
+        print(f"   {marker} {type_key:<22} {speed:+.0%} objects/sec, "
+              f"p95 {p95_before or 0:.3f}s -> {p95_now or 0:.3f}s")
+        if slower:
+            regressed.append(type_key)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metadata imports per type")
+    parser.add_argument('--target', help="DHIS2 base URL (default: an in-process mock server)")
+    parser.add_argument('--types', nargs='+', default=STANDARD_TYPES, metavar='TYPE')
+    parser.add_argument('--repeat', type=int, default=1, help="runs per type (median is reported)")
+    parser.add_argument('--jobs', '-j', type=int, default=1, help="chunks in flight at once")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_MAX_OBJECTS, metavar='N')
+    parser.add_argument('--max-chunk-mb', type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024, metavar='MB')
+    parser.add_argument('--no-gzip', action='store_true', help="send request bodies uncompressed")
+    parser.add_argument('--mock-latency', type=float, default=0.0, help="mock: seconds per request")
+    parser.add_argument('--mock-latency-per-kb', type=float, default=0.0, help="mock: seconds per KB")
+    parser.add_argument('--mock-error-rate', type=float, default=0.0, help="mock: injected 503 rate")
+    parser.add_argument('--output', type=Path, help="result file (default: artifacts/benchmarks/import_<time>.json)")
+    parser.add_argument('--compare', type=Path, metavar='RESULT', help="earlier result file to compare with")
+    args = parser.parse_args()
+
+    mock = None
+    target = args.target
+    if target is None:
+        mock = MockDHIS2Server(latency=args.mock_latency, latency_per_kb=args.mock_latency_per_kb,
+                               error_rate=args.mock_error_rate, seed=0).start()
+        target = mock.url
+
+    print("=" * 80)
+    print(f"IMPORT BENCHMARK -> {target}{' (mock)' if mock else ''}")
+    print("=" * 80)
+
+    client = DHIS2Client(target, timeout=120, concurrency=args.jobs, compress=not args.no_gzip)
+    max_bytes = int(args.max_chunk_mb * 1024 * 1024)
+    results = {}
+    all_objects, files = load_objects(args.types)
+    started = time.perf_counter()
+    for type_key in ordered_types(args.types):
+        objects = all_objects[type_key]
+        if not objects:
+            print(f"⚠️  {type_key}: no objects in the import plan, skipped")
+            continue
+        runs = [benchmark_type(client, type_key, objects, args.chunk_size, max_bytes)
+                for _ in range(args.repeat)]
+        result = results[type_key] = merge_runs(runs)
+        marker = "✅" if result['status'] != 'ERROR' else "❌"
+        result['files'] = files[type_key]
+        print(f"{marker} {type_key:<22} {result['objects']:>6} objects  {result['wallSeconds']:>7.2f}s  "
+              f"{result['objectsPerSecond'] or 0:>9.1f} obj/s  p50 {result['latency']['p50'] or 0:.3f}s  "
+              f"p95 {result['latency']['p95'] or 0:.3f}s  {result['bytesSent'] / 1024:>7.0f} KB sent")
+    total_wall = time.perf_counter() - started
+    client.close()
+
+    output = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'target': 'mock' if mock else target,
+        'settings': {'jobs': args.jobs, 'chunkSize': args.chunk_size, 'maxChunkBytes': max_bytes,
+                     'gzip': not args.no_gzip, 'repeat': args.repeat,
+                     'mock': {'latency': args.mock_latency, 'latencyPerKb': args.mock_latency_per_kb,
+                              'errorRate': args.mock_error_rate} if mock else None},
+        'types': results,
+        'total': {
+            'objects': sum(r['objects'] for r in results.values()),
+            'bytesSent': sum(r['bytesSent'] for r in results.values()),
+            'requests': sum(r['requests'] for r in results.values()),
+            'wallSeconds': round(total_wall, 4),
+        },
+    }
+    if mock:
+        mock.stop()
+
+    out_path = args.output or RESULTS_DIR / f"import_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=True)
+        f.write('\n')
+    print(f"\n📊 {output['total']['objects']} objects, {output['total']['requests']} requests "
+          f"in {total_wall:.2f}s")
+    print(f"✅ Results written to {out_path}")
+
+    if args.compare:
+        regressed = compare(output, args.compare)
+        if regressed:
+            print(f"\n⚠️  Slower than before: {', '.join(regressed)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
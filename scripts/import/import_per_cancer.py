@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Import the per-cancer metadata files (Indicator_*.json, Dashboard_*.json, ...)
+concurrently instead of one after another.
+
+Files are grouped into dependency waves (see common/import_plan.py); the
+files of a wave are independent and are imported by the asyncio runner in
+common/async_import.py, so a wave takes about as long as its slowest file.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.async_import import parse_rate_limits, rate_limit, run_imports
+from common.dhis2_client import DHIS2Client, rebuild_analytics
+from common.import_plan import BASE_DIR, build_plan
+from common.metadata_stream import merge_documents
+
+PER_CANCER_PATTERNS = [
+    "Data Element/Data_Element_*.json",
+    "Options/Option_*.json",
+    "Indicator/Indicator_*.json",
+    "Program Rule/Program_Rule_*.json",
+    "Dashboard/Dashboard_*.json",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('patterns', nargs='*', default=PER_CANCER_PATTERNS,
+                        help="glob patterns relative to the repository root")
+    parser.add_argument('--jobs', '-j', type=int, default=6, help="imports in flight at once")
+    parser.add_argument('--rate', action='append', type=rate_limit, metavar='[ENDPOINT=]PER_SEC',
+                        help="rate limit, e.g. --rate 3 or --rate /api/metadata=3 (repeatable)")
+    parser.add_argument('--no-gzip', action='store_true', help="send request bodies uncompressed")
+    parser.add_argument('--no-rebuild', action='store_true', help="skip the analytics rebuild")
+    args = parser.parse_args()
+
+    files = sorted({p for pattern in args.patterns for p in BASE_DIR.glob(pattern)})
+    plan = build_plan(files)
+
+    print("=" * 80)
+    print(f"PER-CANCER IMPORT ({len(plan.scans)} files, {len(plan.waves)} waves, {args.jobs} at a time)")
+    print("=" * 80)
+    for path, reason in sorted(plan.skipped.items()):
+        print(f"⚠️  Skipping {plan.relative(path)}: {reason}")
+    for uid, paths in sorted(plan.shared.items()):
+        print(f"⚠️  {uid} differs between {', '.join(plan.relative(p) for p in paths)}; "
+              f"imported in that order, the last copy wins")
+
+    client = DHIS2Client(timeout=60, concurrency=args.jobs, compress=not args.no_gzip)
+    rate_limits = parse_rate_limits(args.rate)
+    started = time.perf_counter()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="per_cancer_") as tmp_dir:
+        for number, wave in enumerate(plan.waves, 1):
+            print(f"\n📤 Wave {number}/{len(plan.waves)}")
+            entries = []
+            for unit in wave:
+                names = ", ".join(plan.relative(p) for p in unit)
+                if len(unit) == 1:
+                    entries.append((unit[0], names))
+                    continue
+                # Files that reference each other go out as one payload
+                merged = Path(tmp_dir) / f"wave{number}_{len(entries)}.json"
+                merge_documents(unit, merged)
+                entries.append((merged, f"{names} (merged)"))
+            wave_results = run_imports(client, entries, args.jobs, rate_limits)
+            results.extend(wave_results)
+            if not all(r.ok for r in wave_results):
+                print(f"\n❌ Stopping after wave {number}: later waves depend on it")
+                break
+
+    elapsed = time.perf_counter() - started
+    slowest = max(results, key=lambda r: r.seconds, default=None)
+    if not args.no_rebuild:
+        rebuild_analytics(client)
+    client.close()
+
+    failed = [r for r in results if not r.ok]
+    print("\n" + "=" * 80)
+    print(f"📊 {len(results)} files in {elapsed:.1f}s "
+          f"(sum of file times {sum(r.seconds for r in results):.1f}s"
+          + (f", slowest {slowest.description} {slowest.seconds:.1f}s)" if slowest else ")"))
+    print(f"   Created: {sum(r.created for r in results)}, Updated: {sum(r.updated for r in results)}")
+    if failed:
+        print(f"⚠️  {len(results) - len(failed)} successful, {len(failed)} failed")
+    else:
+        print(f"✅ ALL {len(results)} FILES IMPORTED")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Import every metadata file in one dependency-ordered pass.
+
+The order comes from the reference graph (see common/import_plan.py), not
+from a hand-written list: files go out wave by wave, files that reference
+each other are merged into a single payload, and the files of one wave are
+imported concurrently with --jobs.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.delta_import import Manifest, import_changed
+from common.dhis2_client import DHIS2Client, add_import_arguments, import_files, max_chunk_bytes, rebuild_analytics
+from common.import_checkpoint import Checkpoint
+from common.import_plan import BASE_DIR, PLAN_PATH, build_plan
+from common.metadata_stream import merge_documents
+from common.report_parser import RunLog
+
+# Merged payloads for cyclic units; stable names so --resume recognises them
+MERGED_DIR = BASE_DIR / "artifacts" / "cache" / "import_plan"
+
+
+def print_plan(plan):
+    for number, wave in enumerate(plan.waves, 1):
+        print(f"\nWave {number} ({len(wave)} units, may run in parallel):")
+        for unit in wave:
+            if len(unit) == 1:
+                print(f"  - {plan.relative(unit[0])}")
+            else:
+                print(f"  - merged: {', '.join(plan.relative(p) for p in unit)}")
+    print(f"\n📊 {len(plan.scans)} files, {sum(len(w) for w in plan.waves)} units, "
+          f"{len(plan.waves)} waves, {len(plan.groups)} independent groups")
+    for path, reason in sorted(plan.skipped.items()):
+        print(f"   ⚠️  Skipped {plan.relative(path)}: {reason}")
+    if plan.shared:
+        print(f"   ⚠️  {len(plan.shared)} UIDs are defined differently in several files; those files are imported "
+              f"one after another, the last copy wins")
+
+
+def import_waves(client, plan, manifest, max_objects=None, max_bytes=None, keep_going=False,
+                 checkpoint=None, run_log=None):
+    """Import the plan wave by wave; returns (success, fail) unit counts"""
+    success_count = fail_count = 0
+    for number, wave in enumerate(plan.waves, 1):
+        print(f"\n{'-' * 80}\nWave {number}/{len(plan.waves)}")
+        entries = []
+        for unit in wave:
+            names = ", ".join(plan.relative(p) for p in unit)
+            if len(unit) == 1:
+                entries.append((unit[0], names))
+                continue
+            MERGED_DIR.mkdir(parents=True, exist_ok=True)
+            merged = MERGED_DIR / f"wave{number}_{len(entries)}.json"
+            merge_documents(unit, merged)
+            entries.append((merged, f"{names} (merged)"))
+        ok, failed = import_files(client, entries, max_objects=max_objects, max_bytes=max_bytes,
+                                  checkpoint=checkpoint, run_log=run_log)
+        success_count += ok
+        fail_count += failed
+        if not failed:
+            for unit in wave:
+                for path in unit:
+                    manifest.record(path)
+            manifest.save()
+        elif not keep_going:
+            print(f"\n❌ Stopping after wave {number}: later waves depend on it "
+                  "(--keep-going to continue, --resume to pick up from here)")
+            break
+    return success_count, fail_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='*', type=Path,
+                        help="files to plan (default: every metadata file in the tree)")
+    parser.add_argument('--plan-only', action='store_true',
+                        help=f"print the plan and write it to {PLAN_PATH.name} without importing")
+    parser.add_argument('--keep-going', action='store_true',
+                        help="continue with later waves after a failed import")
+    add_import_arguments(parser)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("DEPENDENCY-ORDERED METADATA IMPORT")
+    print("=" * 80)
+
+    plan = build_plan(args.files or None)
+    print_plan(plan)
+    print(f"\n✅ Plan written to {plan.save()}")
+    if args.plan_only:
+        return
+
+    client = DHIS2Client(timeout=60, concurrency=args.jobs, compress=not args.no_gzip)
+    max_bytes = max_chunk_bytes(args)
+    manifest = Manifest(client.base_url)
+    checkpoint = Checkpoint(client.base_url, resume=args.resume)
+    if args.changed_only:
+        # A delta is small: one dependency-ordered payload instead of waves
+        files = [(path, plan.relative(path)) for wave in plan.waves for unit in wave for path in unit]
+        success_count, fail_count = import_changed(client, files, manifest,
+                                                   max_objects=args.chunk_size, max_bytes=max_bytes)
+    else:
+        success_count, fail_count = import_waves(client, plan, manifest, args.chunk_size,
+                                                 max_bytes, args.keep_going, checkpoint, RunLog())
+    if fail_count == 0:
+        checkpoint.clear()
+
+    rebuild_analytics(client)
+    client.close()
+
+    print("\n" + "=" * 80)
+    if fail_count == 0:
+        print(f"✅ ALL IMPORTS SUCCESSFUL ({success_count} units)")
+    else:
+        print(f"⚠️  {success_count} successful, {fail_count} failed")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
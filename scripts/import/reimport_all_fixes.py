@@ -2,17 +2,19 @@
 """
 Complete reimport of all fixed files to DHIS2
 """
-import json
-import urllib.request
-import base64
+import argparse
+import sys
+from pathlib import Path
 
-BASE_URL = "http://localhost:8085"
-USERNAME = "Meduletu_Kamati"
-PASSWORD = "Covid19!#@$"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-auth_string = f"{USERNAME}:{PASSWORD}".encode('utf-8')
-auth_b64 = base64.b64encode(auth_string).decode('ascii')
-auth_header = f"Basic {auth_b64}"
+from common.dhis2_client import DHIS2Client, add_import_arguments, rebuild_analytics, run_file_imports
+
+parser = argparse.ArgumentParser(description=__doc__.strip())
+add_import_arguments(parser)
+args = parser.parse_args()
+
+client = DHIS2Client(timeout=30, concurrency=args.jobs, compress=not args.no_gzip)
 
 print("=" * 80)
 print("COMPLETE REIMPORT - ALL FIXED FILES")
@@ -24,59 +26,11 @@ files_to_import = [
     ("Program/Program.json", "Programs (CECAP renamed)"),
 ]
 
-success_count = 0
-fail_count = 0
-
-for filepath, description in files_to_import:
-    print(f"\n📤 Importing {description}...")
-    
-    try:
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-        
-        json_bytes = json.dumps(data).encode('utf-8')
-        
-        req = urllib.request.Request(
-            f"{BASE_URL}/api/metadata?importStrategy=CREATE_AND_UPDATE&atomicMode=NONE",
-            data=json_bytes,
-            headers={
-                'Content-Type': 'application/json',
-                'Authorization': auth_header
-            },
-            method='POST'
-        )
-        
-        with urllib.request.urlopen(req, timeout=30) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            status = result.get('status', 'UNKNOWN')
-            stats = result.get('stats', {})
-            created = stats.get('created', 0)
-            updated = stats.get('updated', 0)
-            
-            print(f"   ✅ Status: {status}")
-            print(f"      Created: {created}, Updated: {updated}")
-            success_count += 1
-            
-    except Exception as e:
-        print(f"   ❌ ERROR: {str(e)[:150]}")
-        fail_count += 1
+success_count, fail_count = run_file_imports(client, args, files_to_import)
 
 # Trigger analytics rebuild
-print(f"\n📊 Triggering analytics rebuild...")
-try:
-    req = urllib.request.Request(
-        f"{BASE_URL}/api/resourceTables/rebuild",
-        headers={'Authorization': auth_header},
-        method='POST'
-    )
-    
-    with urllib.request.urlopen(req, timeout=60) as response:
-        result = json.loads(response.read().decode('utf-8'))
-        message = result.get('message', 'Analytics rebuild initiated')
-        print(f"   ✅ {message}")
-        
-except Exception as e:
-    print(f"   ⚠️  Analytics rebuild request sent")
+rebuild_analytics(client)
+client.close()
 
 print("\n" + "=" * 80)
 if fail_count == 0:
@@ -1,7 +1,13 @@
-import json
+import sys
 from pathlib import Path
 
-base = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.metadata_stream import merge_documents
+from common.rule_analysis import ERROR, analyse
+from common.rule_graph import RuleGraph
+
+base = Path(__file__).resolve().parents[2]
 program_dir = base / "Program"
 program_rule_dir = base / "Program Rule"
 
@@ -17,23 +23,31 @@ paths = [
 ]
 paths.extend(sorted(program_dir.glob("*Cancer Program.json")))
 
-combined = {}
-for path in paths:
-    data = json.loads(path.read_text())
-    if not combined and "system" in data:
-        combined["system"] = data["system"]
-    for key, value in data.items():
-        if key == "system":
-            continue
-        if isinstance(value, list):
-            combined.setdefault(key, []).extend(value)
-        else:
-            combined.setdefault(key, value)
-
-out_path = base / "programs_bundle_cancer.json"
-out_path.write_text(json.dumps(combined, separators=(",", ":")))
-
-counts = {k: len(v) for k, v in combined.items() if isinstance(v, list)}
-print(f"Wrote {out_path}")
+out_path = base / "artifacts" / "bundles" / "programs_bundle_cancer.json"
+missing = [path for path in paths if not path.exists()]
+if missing:
+    for path in missing:
+        print(f"❌ Missing source file: {path.relative_to(base)}")
+    sys.exit(1)
+
+# Stream objects straight from each source file into the bundle so memory
+# stays flat regardless of how large the inputs grow. The bundle is built
+# next to its final path and only moved into place once the rules pass.
+out_path.parent.mkdir(parents=True, exist_ok=True)
+tmp_path = out_path.with_name(out_path.stem + ".tmp.json")
+counts = merge_documents(paths, tmp_path)
+
 for key in sorted(counts):
     print(f"{key}: {counts[key]}")
+
+# Gate the bundle on the static program rule checks
+errors = [f for f in analyse(RuleGraph.from_bundle(tmp_path)) if f['severity'] == ERROR]
+for f in errors:
+    print(f"❌ {f['code']}: {f['message']} (rule {f['rule']})")
+if errors:
+    tmp_path.unlink()
+    print(f"❌ {len(errors)} program rule errors; {out_path} left unchanged")
+    sys.exit(1)
+tmp_path.replace(out_path)
+print("✅ Program rules passed static checks")
+print(f"Wrote {out_path}")
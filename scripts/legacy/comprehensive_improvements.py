@@ -8,19 +8,16 @@ Comprehensive Cancer Registry Improvements  - All 4 items in one file
 """
 
 import json
-import random
-import string
+import sys
 from pathlib import Path
 from collections import defaultdict
 from datetime import datetime
 
 BASE_DIR = Path("/Users/mk/Documents/GitHub/cancer-registry")
 
-def generate_uid():
-    """Generate valid DHIS2 UID"""
-    chars = string.ascii_letters + string.digits
-    first_char = random.choice(string.ascii_letters)
-    return first_char + ''.join(random.choices(chars, k=10))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.uid_allocator import generate_uid, save_reservations
 
 # ============================================================================
 # 1. IMPROVE PROGRAM STAGES
@@ -340,6 +337,7 @@ def main():
     ds_count = improve_datasets()
     ind_count = create_indicators()
     val_count = create_validation_rules()
+    save_reservations("comprehensive_improvements.py")
     
     print("\n" + "=" * 80)
     print("✅ ALL IMPROVEMENTS COMPLETED")
@@ -5,19 +5,16 @@ Handles individual cancer program files and centralized files
 """
 
 import json
-import random
-import string
+import sys
 from pathlib import Path
 from collections import defaultdict
 from datetime import datetime
 
 BASE_DIR = Path("/Users/mk/Documents/GitHub/cancer-registry")
 
-def generate_uid():
-    """Generate valid DHIS2 UID"""
-    chars = string.ascii_letters + string.digits
-    first_char = random.choice(string.ascii_letters)
-    return first_char + ''.join(random.choices(chars, k=10))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.uid_allocator import generate_uid, save_reservations
 
 # ============================================================================
 # 1. IMPROVE PROGRAM STAGES IN BOTH MAIN AND INDIVIDUAL FILES
@@ -219,6 +216,7 @@ def main():
     stages = improve_all_stages()
     datasets = check_datasets()
     indicators = create_cancer_indicators()
+    save_reservations("comprehensive_improvements_v2.py")
     rules = check_validation_rules()
     
     print("\n" + "=" * 80)
@@ -2,29 +2,15 @@
 """Fix invalid UIDs in Dashboard.json - ensure all start with letters and are 11 chars."""
 
 import json
-import random
-import string
+import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DASHBOARD_PATH = BASE_DIR / "Dashboard" / "Dashboard.json"
 
-def generate_valid_uid():
-    """Generate a valid DHIS2 UID (11 chars, starts with letter)"""
-    chars = string.ascii_letters + string.digits
-    first_char = random.choice(string.ascii_letters)
-    remaining = ''.join(random.choices(chars, k=10))
-    return first_char + remaining
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-def is_valid_uid(uid):
-    """Check if UID is valid (11 chars, starts with letter, alphanumeric)"""
-    if not uid or len(uid) != 11:
-        return False
-    if not uid[0].isalpha():
-        return False
-    if not all(c.isalnum() for c in uid):
-        return False
-    return True
+from common.uid_allocator import generate_uid, is_valid_uid, save_reservations
 
 # Load data
 with open(DASHBOARD_PATH) as f:
@@ -38,7 +24,7 @@ uid_map = {}
 for i, dashboard in enumerate(dashboards):
     uid = dashboard.get("id")
     if uid and not is_valid_uid(uid):
-        new_uid = generate_valid_uid()
+        new_uid = generate_uid()
         uid_map[uid] = new_uid
         dashboard["id"] = new_uid
         print(f"Dashboard {i+1}: {dashboard.get('name')}")
@@ -50,7 +36,7 @@ for i, dashboard in enumerate(dashboards):
     for j, item in enumerate(dashboard_items):
         item_uid = item.get("id")
         if item_uid and not is_valid_uid(item_uid):
-            new_uid = generate_valid_uid()
+            new_uid = generate_uid()
             uid_map[item_uid] = new_uid
             item["id"] = new_uid
             fixed_count += 1
@@ -65,5 +51,7 @@ mapping_file = BASE_DIR / "scripts" / "dashboard_uid_mapping.json"
 with open(mapping_file, "w") as f:
     json.dump(uid_map, f, indent=2)
 
+save_reservations("fix_dashboard_uids.py")
+
 print(f"\n✅ Fixed {fixed_count} invalid UIDs in Dashboard.json")
 print(f"Mapping saved to: {mapping_file}")
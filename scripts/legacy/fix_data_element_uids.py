@@ -5,18 +5,16 @@ DHIS2 UIDs must be 11-character alphanumeric strings without dashes.
 """
 
 import json
-import random
-import string
+import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_ELEMENT_PATH = BASE_DIR / "Data Element" / "Data Element.json"
 
 
-def generate_uid():
-    """Generate a valid DHIS2 UID (11 alphanumeric characters)"""
-    chars = string.ascii_letters + string.digits
-    return ''.join(random.choices(chars, k=11))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.uid_allocator import generate_uid, save_reservations
 
 
 def main():
@@ -59,6 +57,7 @@ def main():
     with open(DATA_ELEMENT_PATH, "w") as f:
         json.dump(data, f, indent=2, ensure_ascii=True)
         f.write("\n")
+    save_reservations("fix_data_element_uids.py")
 
     print(f"{'='*60}")
     print(f"✅ Fixed {fixed_count} data element UIDs")
@@ -2,29 +2,15 @@
 """Fix invalid UIDs in Program Indicator.json."""
 
 import json
-import random
-import string
+import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 INDICATOR_PATH = BASE_DIR / "Program" / "Program Indicator.json"
 
-def generate_valid_uid():
-    """Generate a valid DHIS2 UID"""
-    chars = string.ascii_letters + string.digits
-    first_char = random.choice(string.ascii_letters)
-    remaining = ''.join(random.choices(chars, k=10))
-    return first_char + remaining
-
-def is_valid_uid(uid):
-    """Check if UID is valid"""
-    if not uid or len(uid) != 11:
-        return False
-    if not uid[0].isalpha():
-        return False
-    if not all(c.isalnum() for c in uid):
-        return False
-    return True
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.uid_allocator import generate_uid, is_valid_uid, save_reservations
 
 # Load data
 with open(INDICATOR_PATH) as f:
@@ -37,7 +23,7 @@ fixed_count = 0
 for i, indicator in enumerate(indicators):
     uid = indicator.get("id")
     if uid and not is_valid_uid(uid):
-        new_uid = generate_valid_uid()
+        new_uid = generate_uid()
         indicator["id"] = new_uid
         fixed_count += 1
         if fixed_count <= 5:  # Show first 5
@@ -48,4 +34,6 @@ with open(INDICATOR_PATH, "w") as f:
     json.dump(data, f, indent=2, ensure_ascii=True)
     f.write("\n")
 
+save_reservations("fix_indicator_uids.py")
+
 print(f"\n✅ Fixed {fixed_count} invalid UIDs in Program Indicator.json")
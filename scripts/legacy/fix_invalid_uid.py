@@ -2,19 +2,15 @@
 """Fix the UID that starts with a number."""
 
 import json
-import random
-import string
+import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_ELEMENT_PATH = BASE_DIR / "Data Element" / "Data Element.json"
 
-def generate_valid_uid():
-    """Generate a valid DHIS2 UID that starts with a letter"""
-    chars = string.ascii_letters + string.digits
-    first_char = random.choice(string.ascii_letters)
-    remaining = ''.join(random.choices(chars, k=10))
-    return first_char + remaining
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.uid_allocator import generate_uid, save_reservations
 
 # Load data
 with open(DATA_ELEMENT_PATH) as f:
@@ -26,7 +22,7 @@ elements = data.get("dataElements", [])
 for elem in elements:
     if elem.get("id") == "5TAiG9FRUhG":
         old_uid = elem.get("id")
-        new_uid = generate_valid_uid()
+        new_uid = generate_uid()
         elem["id"] = new_uid
         print(f"Fixed: {elem.get('name')}")
         print(f"  Old UID: {old_uid} (starts with number)")
@@ -38,4 +34,6 @@ with open(DATA_ELEMENT_PATH, "w") as f:
     json.dump(data, f, indent=2, ensure_ascii=True)
     f.write("\n")
 
+save_reservations("fix_invalid_uid.py")
+
 print("\n✅ Fixed invalid UID format")
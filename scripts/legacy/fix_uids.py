@@ -1,39 +1,27 @@
 import json
-import random
-import string
+import sys
 from pathlib import Path
 
-random.seed()
-
-letters = string.ascii_letters
-alphanum = string.ascii_letters + string.digits
-
-
-def gen_uid(existing):
-    while True:
-        uid = random.choice(letters) + "".join(random.choice(alphanum) for _ in range(10))
-        if uid not in existing:
-            existing.add(uid)
-            return uid
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
+from common.uid_allocator import generate_uid, save_reservations
 
 base = Path(__file__).resolve().parents[1]
 program_dir = base / "Program"
 program_files = sorted(program_dir.glob("*Cancer Program.json"))
 
-existing_new_ids = set()
 new_stages = []
 
 for path in program_files:
     data = json.loads(path.read_text())
     program = data["programs"][0]
 
-    new_program_id = gen_uid(existing_new_ids)
+    new_program_id = generate_uid()
     program["id"] = new_program_id
 
     for pta in program.get("programTrackedEntityAttributes", []):
         if "id" in pta:
-            pta["id"] = gen_uid(existing_new_ids)
+            pta["id"] = generate_uid()
         if "program" in pta and isinstance(pta["program"], dict):
             pta["program"]["id"] = new_program_id
 
@@ -41,7 +29,7 @@ for path in program_files:
     stages = program.get("programStages", [])
     for idx, stage_ref in enumerate(stages, start=1):
         old_stage_id = stage_ref.get("id", "")
-        new_stage_id = gen_uid(existing_new_ids)
+        new_stage_id = generate_uid()
         stage_ref["id"] = new_stage_id
 
         stage_name = "Stage"
@@ -95,6 +83,7 @@ program_stage_path = program_dir / "Program Stage.json"
 program_stage_data = json.loads(program_stage_path.read_text())
 program_stage_data["programStages"].extend(new_stages)
 program_stage_path.write_text(json.dumps(program_stage_data, separators=(",", ":")))
+save_reservations("fix_uids.py")
 
 print(f"Updated {len(program_files)} program files.")
 print(f"Added {len(new_stages)} program stages.")
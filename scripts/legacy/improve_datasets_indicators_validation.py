@@ -4,20 +4,15 @@
 """
 
 import json
-import uuid
-import random
-import string
+import sys
 from pathlib import Path
 from datetime import datetime
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 
-def generate_uid():
-    """Generate a valid DHIS2 UID (11 chars, starts with letter)"""
-    chars = string.ascii_letters + string.digits
-    first_char = random.choice(string.ascii_letters)
-    remaining = ''.join(random.choices(chars, k=10))
-    return first_char + remaining
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.uid_allocator import generate_uid, save_reservations
 
 # ============================================================================
 # 2. DATASET IMPROVEMENTS
@@ -300,6 +295,7 @@ def main():
     print("\n4. CREATING VALIDATION RULES")
     print("-" * 80)
     val_count = create_validation_rules()
+    save_reservations("improve_datasets_indicators_validation.py")
     
     print("\n" + "=" * 80)
     print("IMPROVEMENTS COMPLETED")
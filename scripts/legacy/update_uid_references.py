@@ -1,9 +1,16 @@
 #!/usr/bin/env python
 """
 Update references to old UIDs in Dashboard and Program Indicator files.
+
+The mapping is applied in a single pass per file (see common/uid_remap.py),
+and every JSON path that changed is reported. --structural only rewrites id
+fields, {"id": ...} references and expression operands, leaving names and
+descriptions alone.
 """
 
-import json
+import argparse
+import os
+import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -11,54 +18,68 @@ UID_MAPPING_FILE = BASE_DIR / "scripts" / "uid_mapping.json"
 DASHBOARD_PATH = BASE_DIR / "Dashboard" / "Dashboard.json"
 INDICATOR_PATH = BASE_DIR / "Program" / "Program Indicator.json"
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.uid_remap import UidRemapper
+
 
-def update_file_with_uid_map(file_path, uid_map):
-    """Update a file by replacing old UIDs with new ones"""
-    with open(file_path, "r") as f:
-        content = f.read()
-    
-    original_content = content
-    
-    # Replace all old UIDs with new ones
-    for old_uid, new_uid in uid_map.items():
-        content = content.replace(old_uid, new_uid)
-    
-    # If content changed, save it
-    if content != original_content:
-        with open(file_path, "w") as f:
-            f.write(content)
-        return True
-    return False
+def update_file_with_uid_map(file_path, uid_map, dry_run=False, structural=False):
+    """Update a file by replacing old UIDs with new ones; returns the changed JSON paths"""
+    remapper = uid_map if isinstance(uid_map, UidRemapper) else UidRemapper(uid_map)
+    _, paths = remapper.remap_file(file_path, dry_run=dry_run, structural=structural)
+    return paths
+
+
+def tree_json_files(root):
+    """All JSON metadata files under root (skipping VCS and cache dirs)"""
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in {'.git', 'cache', '__pycache__'}]
+        for name in sorted(files):
+            if name.endswith('.json'):
+                yield Path(dirpath) / name
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Apply an old -> new UID mapping to metadata files")
+    parser.add_argument('files', nargs='*', type=Path,
+                        help="files to update (default: Dashboard.json and Program Indicator.json)")
+    parser.add_argument('--mapping', type=Path, default=UID_MAPPING_FILE)
+    parser.add_argument('--tree', type=Path, metavar='DIR',
+                        help="update every JSON file under DIR instead")
+    parser.add_argument('--structural', action='store_true',
+                        help="only remap ids, references and expression operands (streaming)")
+    parser.add_argument('--dry-run', action='store_true', help="report changes without writing")
+    args = parser.parse_args()
+
     # Load UID mapping
-    with open(UID_MAPPING_FILE, "r") as f:
-        uid_map = json.load(f)
-    
-    print("UID Mapping loaded:")
+    remapper = UidRemapper.from_file(args.mapping)
+    print(f"UID Mapping loaded: {len(remapper.uid_map)} entries")
     print("=" * 60)
-    for old_uid, new_uid in uid_map.items():
-        print(f"{old_uid} -> {new_uid}")
-    
-    print("\n" + "=" * 60)
-    
-    # Update Dashboard.json
-    print("\nUpdating Dashboard.json...")
-    if update_file_with_uid_map(DASHBOARD_PATH, uid_map):
-        print("✓ Updated Dashboard.json with new UIDs")
-    else:
-        print("✓ No old UIDs found in Dashboard.json")
-    
-    # Update Program Indicator.json
-    print("\nUpdating Program Indicator.json...")
-    if update_file_with_uid_map(INDICATOR_PATH, uid_map):
-        print("✓ Updated Program Indicator.json with new UIDs")
+
+    if args.tree:
+        files = [p for p in tree_json_files(args.tree) if p.resolve() != args.mapping.resolve()]
     else:
-        print("✓ No old UIDs found in Program Indicator.json")
-    
+        files = args.files or [DASHBOARD_PATH, INDICATOR_PATH]
+
+    updated = 0
+    for path in files:
+        try:
+            count, paths = remapper.remap_file(path, dry_run=args.dry_run, structural=args.structural)
+        except ValueError as e:
+            print(f"\n❌ {e}")
+            continue
+        if not count:
+            if not args.tree:
+                print(f"✓ No old UIDs found in {path.name}")
+            continue
+        updated += 1
+        print(f"\n✓ {'Would update' if args.dry_run else 'Updated'} {path.name}: {count} replacements")
+        for json_path, old, new in paths:
+            print(f"  {json_path}: {old} -> {new}")
+
     print("\n" + "=" * 60)
-    print("✅ All files updated successfully!")
+    print(f"✅ {updated} of {len(files)} files {'would change' if args.dry_run else 'updated'} "
+          f"({remapper.replacements} replacements)")
 
 
 if __name__ == "__main__":
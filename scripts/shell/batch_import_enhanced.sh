@@ -3,6 +3,9 @@
 # Cancer Registry Enhanced Batch Import Script
 # Imports all enhanced metadata including cancer-specific dashboards
 # Uses CREATE_AND_UPDATE strategy to safely handle re-imports
+#
+# Usage: batch_import_enhanced.sh [--resume]
+#   --resume  skip files an interrupted run already imported (same SHA-256)
 
 set -e
 
@@ -12,6 +15,8 @@ USERNAME="Meduletu_Kamati"
 PASSWORD='Covid19!#@$'
 IMPORT_STRATEGY="CREATE_AND_UPDATE"
 ATOMIC_MODE="NONE"
+# Send compact, gzip-compressed bodies (set GZIP_UPLOAD=0 to disable)
+GZIP_UPLOAD="${GZIP_UPLOAD:-1}"
 BASE_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
 
 # Colors
@@ -23,47 +28,115 @@ NC='\033[0m'
 TOTAL=0
 SUCCESS=0
 FAILED=0
+SKIPPED=0
+
+# Files acknowledged by the server are recorded as "<sha256>  <path>"
+CHECKPOINT_FILE="${BASE_DIR}/artifacts/import_checkpoint_enhanced.txt"
+RESUME=0
+[ "${1:-}" = "--resume" ] && RESUME=1
+mkdir -p "$(dirname "$CHECKPOINT_FILE")"
+[ "$RESUME" = "1" ] || rm -f "$CHECKPOINT_FILE"
 
 LOG_DIR="${BASE_DIR}/artifacts/logs"
 mkdir -p "$LOG_DIR"
 LOG_FILE="${LOG_DIR}/import_enhanced_$(date +%Y%m%d_%H%M%S).log"
+# One parsed import report per line (query with report_parser.py errors/summary)
+RESULT_LOG="${LOG_FILE%.log}.jsonl"
+REPORT_PARSER="${BASE_DIR}/scripts/common/report_parser.py"
+RESPONSE_FILE=$(mktemp)
+trap 'rm -f "$RESPONSE_FILE"' EXIT
 
 echo "Starting enhanced batch import at $(date)" | tee "$LOG_FILE"
 echo "Import Strategy: $IMPORT_STRATEGY" | tee -a "$LOG_FILE"
 echo "---" | tee -a "$LOG_FILE"
 
+# POST a metadata file; the response body (or curl's error) goes to
+# RESPONSE_FILE and the HTTP status to HTTP_CODE. With GZIP_UPLOAD=1 the file is re-serialised without
+# indentation and gzip-compressed; if the server refuses the encoding (411/415,
+# or a 400 that names it), the file is sent again uncompressed. A file that
+# cannot be re-serialised is not sent at all (HTTP_CODE 0).
+post_metadata() {
+    local file=$1
+    local url="${BASE_URL}/api/metadata?importStrategy=${IMPORT_STRATEGY}&atomicMode=${ATOMIC_MODE}"
+
+    if [ "$GZIP_UPLOAD" = "1" ]; then
+        local body
+        body=$(mktemp)
+        : > "$RESPONSE_FILE"
+        if ! (set -o pipefail
+              python3 -c '
+import json, sys
+try:
+    doc = json.load(open(sys.argv[1], encoding="utf-8"))
+except ValueError as e:
+    sys.exit(f"Not sent, invalid JSON: {e}")
+json.dump(doc, sys.stdout, separators=(",", ":"))' "$file" | gzip -c > "$body") 2>>"$RESPONSE_FILE"; then
+            rm -f "$body"
+            HTTP_CODE=0
+            return 0
+        fi
+        HTTP_CODE=$(curl -sS -X POST \
+            -H "Content-Type: application/json" \
+            -H "Content-Encoding: gzip" \
+            -u "${USERNAME}:${PASSWORD}" \
+            -o "$RESPONSE_FILE" \
+            -w '%{http_code}' \
+            "$url" \
+            --data-binary @"$body" 2>>"$RESPONSE_FILE") || true
+        rm -f "$body"
+        case "$HTTP_CODE" in
+            411|415) GZIP_UPLOAD=0 ;;
+            400) grep -qiE 'gzip|encoding|compress|decod' "$RESPONSE_FILE" || return 0 ;;
+            *) return 0 ;;
+        esac
+        echo -n "(gzip refused with HTTP $HTTP_CODE, retrying uncompressed) "
+    fi
+
+    : > "$RESPONSE_FILE"
+    HTTP_CODE=$(curl -sS -X POST \
+        -H "Content-Type: application/json" \
+        -u "${USERNAME}:${PASSWORD}" \
+        -o "$RESPONSE_FILE" \
+        -w '%{http_code}' \
+        "$url" \
+        -d @"$file" 2>>"$RESPONSE_FILE") || true
+}
+
 import_file() {
     local file=$1
     local description=$2
+    local checksum
     
     if [ ! -f "$file" ]; then
         echo -e "${RED}✗ File not found: $file${NC}" | tee -a "$LOG_FILE"
-        ((FAILED++))
+        FAILED=$((FAILED + 1))
         return 1
     fi
     
-    ((TOTAL++))
+    TOTAL=$((TOTAL + 1))
+    checksum=$(sha256sum "$file" | cut -d' ' -f1)
+    if [ "$RESUME" = "1" ] && grep -qxF "${checksum}  ${file}" "$CHECKPOINT_FILE" 2>/dev/null; then
+        echo -e "${YELLOW}↷${NC} $description already imported (unchanged), skipping" | tee -a "$LOG_FILE"
+        SKIPPED=$((SKIPPED + 1))
+        SUCCESS=$((SUCCESS + 1))
+        return 0
+    fi
     echo -n "Importing $description... "
     
-    RESPONSE=$(curl -s -X POST \
-        -H "Content-Type: application/json" \
-        -u "${USERNAME}:${PASSWORD}" \
-        "${BASE_URL}/api/metadata?importStrategy=${IMPORT_STRATEGY}&atomicMode=${ATOMIC_MODE}" \
-        -d @"$file" 2>&1)
-    
-    if echo "$RESPONSE" | grep -q '"status":"OK"'; then
-        STATS=$(echo "$RESPONSE" | grep -o '"stats":{[^}]*}' | head -1)
-        echo -e "${GREEN}✓${NC} $STATS" | tee -a "$LOG_FILE"
-        ((SUCCESS++))
-        return 0
-    elif echo "$RESPONSE" | grep -q '"httpStatusCode":200'; then
-        echo -e "${GREEN}✓${NC} HTTP 200 OK" | tee -a "$LOG_FILE"
-        ((SUCCESS++))
+    post_metadata "$file"
+
+    # Status, stats and per-object errors are parsed from the report and
+    # appended to RESULT_LOG; the parser exits non-zero on an ERROR report
+    if SUMMARY=$(python3 "$REPORT_PARSER" record "$RESULT_LOG" "$RESPONSE_FILE" \
+            --file "$file" --description "$description" --http-status "${HTTP_CODE:-0}"); then
+        echo -e "${GREEN}✓${NC} $SUMMARY" | tee -a "$LOG_FILE"
+        echo "${checksum}  ${file}" >> "$CHECKPOINT_FILE"
+        SUCCESS=$((SUCCESS + 1))
         return 0
     else
-        ERROR=$(echo "$RESPONSE" | grep -o '"message":"[^"]*"' | head -1 || echo '"message":"Unknown error"')
-        echo -e "${RED}✗${NC} $ERROR" | tee -a "$LOG_FILE"
-        ((FAILED++))
+        echo -e "${RED}✗${NC} $SUMMARY" | tee -a "$LOG_FILE"
+        echo "Re-run with --resume to continue after the files already imported" | tee -a "$LOG_FILE"
+        FAILED=$((FAILED + 1))
         return 1
     fi
 }
@@ -102,15 +175,19 @@ done
 echo -e "\n---" | tee -a "$LOG_FILE"
 echo "Import Summary:" | tee -a "$LOG_FILE"
 echo "  Total files:    $TOTAL" | tee -a "$LOG_FILE"
-echo -e "  ${GREEN}Successful: $SUCCESS${NC}" | tee -a "$LOG_FILE"
+echo -e "  ${GREEN}Successful: $SUCCESS${NC} ($SKIPPED skipped as already imported)" | tee -a "$LOG_FILE"
 echo -e "  ${RED}Failed:     $FAILED${NC}" | tee -a "$LOG_FILE"
+[ -f "$RESULT_LOG" ] && python3 "$REPORT_PARSER" summary "$RESULT_LOG" | tee -a "$LOG_FILE"
 echo "Log file: $LOG_FILE" | tee -a "$LOG_FILE"
+echo "Import results: $RESULT_LOG" | tee -a "$LOG_FILE"
 echo "Completed at $(date)" | tee -a "$LOG_FILE"
 
 if [ $FAILED -eq 0 ]; then
+    rm -f "$CHECKPOINT_FILE"
     echo -e "\n${GREEN}✓ All enhancements imported successfully!${NC}"
     exit 0
 else
     echo -e "\n${RED}✗ Some imports failed. Check $LOG_FILE for details.${NC}"
+    echo "Object errors: python3 $REPORT_PARSER errors $RESULT_LOG"
     exit 1
 fi
@@ -2,12 +2,14 @@
 """Import Cancer Element and Indicator Groups to DHIS2."""
 
 import json
-import subprocess
 import sys
+from pathlib import Path
 
-DHIS2_URL = "http://localhost:8085"
-USERNAME = "Meduletu_Kamati"
-PASSWORD = "Covid19!#@$"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.dhis2_client import DHIS2Client, DHIS2Error
+
+client = DHIS2Client(timeout=30)
 
 def import_groups(file_path, endpoint, group_key):
     """Import groups from JSON file to DHIS2."""
@@ -25,21 +27,14 @@ def import_groups(file_path, endpoint, group_key):
     
     payload = {group_key: groups}
     
-    # Use curl to POST
-    cmd = [
-        "curl", "-s", "-X", "POST",
-        f"{DHIS2_URL}/api/{endpoint}",
-        "-u", f"{USERNAME}:{PASSWORD}",
-        "-H", "Content-Type: application/json",
-        "-d", json.dumps(payload)
-    ]
-    
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-    
+    # POST over the shared keep-alive connection
     try:
-        response = json.loads(result.stdout)
-    except json.JSONDecodeError:
-        print(f"   ❌ Failed to parse response: {result.stdout[:200]}")
+        response = client.post_json(f"/api/{endpoint}", payload)
+    except DHIS2Error as e:
+        # Error responses still carry the import report
+        response = e.body
+    if not isinstance(response, dict):
+        print(f"   ❌ Failed to parse response: {str(response)[:200]}")
         return
     
     # Parse response
@@ -62,3 +57,5 @@ try:
 except Exception as e:
     print(f"\n❌ Error: {e}")
     sys.exit(1)
+finally:
+    client.close()
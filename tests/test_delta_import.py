@@ -0,0 +1,53 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from common.delta_import import Manifest, compute_delta
+
+
+def write(path, *objects):
+    path.write_text(json.dumps({'dataElements': list(objects)}), encoding='utf-8')
+    return path
+
+
+def imported(tmp_path, paths):
+    """Manifest as left by a successful full import of paths"""
+    manifest = Manifest('test', path=tmp_path / "manifest.json")
+    for path in paths:
+        manifest.record(path)
+    return manifest
+
+
+def test_duplicate_uid_last_copy_wins(tmp_path):
+    a = write(tmp_path / "A.json", {'id': 'a1b2c3d4e5F', 'name': 'from A'})
+    b = write(tmp_path / "B.json", {'id': 'a1b2c3d4e5F', 'name': 'from B'})
+    manifest = imported(tmp_path, [a, b])
+
+    delta = compute_delta([a, b], manifest)
+    assert (delta.created, delta.updated, delta.deleted) == (0, 0, 0)
+    assert [(t, uid) for t, uid, _, _ in delta.conflicts] == [('dataElements', 'a1b2c3d4e5F')]
+
+    # An edit to the copy a full import leaves on the server is sent
+    write(b, {'id': 'a1b2c3d4e5F', 'name': 'edited in B'})
+    delta = compute_delta([a, b], manifest)
+    assert (delta.created, delta.updated) == (0, 1)
+    assert delta.upserts == {'dataElements': [{'id': 'a1b2c3d4e5F', 'name': 'edited in B'}]}
+
+    # An edit to the copy it overwrites is not
+    write(b, {'id': 'a1b2c3d4e5F', 'name': 'from B'})
+    write(a, {'id': 'a1b2c3d4e5F', 'name': 'edited in A'})
+    delta = compute_delta([a, b], manifest)
+    assert (delta.created, delta.updated) == (0, 0)
+    assert not delta.upserts
+
+
+def test_new_and_removed_objects(tmp_path):
+    a = write(tmp_path / "A.json", {'id': 'a1b2c3d4e5F', 'name': 'x'}, {'id': 'f6g7h8i9j0K', 'name': 'y'})
+    manifest = imported(tmp_path, [a])
+    write(a, {'id': 'a1b2c3d4e5F', 'name': 'x'}, {'id': 'l1m2n3o4p5Q', 'name': 'z'})
+
+    delta = compute_delta([a], manifest)
+    assert (delta.created, delta.updated) == (1, 0)
+    assert delta.deletes == {'dataElements': [{'id': 'f6g7h8i9j0K'}]}
@@ -0,0 +1,23 @@
+import io
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from common.report_parser import parse_report, record_ok
+
+
+def test_truncated_success_body_is_not_ok():
+    record = parse_report(io.BytesIO(b'{"status": "OK", "stats": {"created": 3'), 200)
+    assert record['status'] == 'WARNING'
+    assert record['message'].startswith("Unparseable response")
+
+
+def test_unparseable_error_body_is_error():
+    record = parse_report(io.BytesIO(b'<html>Bad Gateway</html>'), 502)
+    assert record['status'] == 'ERROR'
+    assert not record_ok(record)
+
+
+def test_body_without_status_falls_back_to_http_status():
+    assert parse_report({'stats': {'created': 1}}, 200)['status'] == 'OK'
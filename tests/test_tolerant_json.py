@@ -0,0 +1,34 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from common.tolerant_json import LoadReport, iter_document
+
+# A stray field where item 1 should be, and an item appended after the document
+DAMAGED = (b'{\n  "dataElements": [\n    {"id": "a"},\n    "x": 1,\n    {"id": "c"}\n  ]\n}\n'
+           b'  ,{"id": "d"}\n  ]\n}\n')
+
+
+def salvage(path, chunk_size):
+    report = LoadReport(path)
+    items = [(index, obj['id']) for _, index, obj in iter_document(path, report, chunk_size=chunk_size)]
+    return items, [(e.index, e.error) for e in report.errors]
+
+
+def test_resync_across_buffer_fills(tmp_path):
+    path = tmp_path / "damaged.json"
+    path.write_bytes(DAMAGED)
+    expected = salvage(path, 1 << 16)
+    assert [index for index, _ in expected[0]] == [0, 2, 3]
+    # The item-start pattern spans a newline and indentation, so it straddles small fills
+    for chunk_size in (1, 2, 3, 5, 7):
+        assert salvage(path, chunk_size) == expected
+
+
+def test_items_after_document_keep_counting(tmp_path):
+    path = tmp_path / "damaged.json"
+    path.write_bytes(DAMAGED)
+    items, errors = salvage(path, 1 << 16)
+    assert items == [(0, 'a'), (2, 'c'), (3, 'd')]
+    assert errors == [(1, "object fragment outside of an object")]